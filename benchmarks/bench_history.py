@@ -0,0 +1,132 @@
+"""
+Microbenchmarks of the listening history, and its storage footprint.
+
+Each benchmark records the size of listening_history, with its indexes, in
+extra_info. On Postgres that is the size of its partitions.
+
+See benchmarks/conftest.py for how to run them.
+"""
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import delete, insert, text
+
+from sonority import settings
+from sonority.auth.models import User
+from sonority.plays import history
+from sonority.plays.models import HistoryEntry
+
+# the users given a history, and the plays in each
+HISTORY_USERS = 1000
+PLAYS_PER_USER = 200
+
+
+def history_rows(bench_db, now: datetime):
+    """
+    PLAYS_PER_USER plays over the retention period for each user with a
+    history, with popular albums played more often
+    """
+    dataset = bench_db.dataset
+    retention = settings.HISTORY_RETENTION_DAYS * 24 * 3600
+    play_id = 0
+    for index in range(min(HISTORY_USERS, dataset.spec.users)):
+        rng = random.Random(f"{dataset.spec.seed}:history:{index}")
+        for _ in range(PLAYS_PER_USER):
+            play_id += 1
+            yield {
+                "user_id": dataset.artist_id(index),
+                "played_at": now - timedelta(seconds=rng.randrange(retention)),
+                "play_id": play_id,
+                "album_id": dataset.album_id(dataset.pick_album(rng)),
+                "track_id": None,
+            }
+
+
+def footprint(bench_db, db):
+    """
+    The bytes taken by listening_history and its indexes
+    """
+    if bench_db.backend == "postgresql":
+        statement = (
+            "SELECT sum(pg_total_relation_size(inhrelid)) FROM pg_inherits "
+            "WHERE inhparent = 'listening_history'::regclass"
+        )
+    else:
+        statement = (
+            "SELECT sum(pgsize) FROM dbstat WHERE name IN "
+            "(SELECT name FROM sqlite_master WHERE tbl_name = 'listening_history')"
+        )
+    return db.execute(text(statement)).scalar_one()
+
+
+@pytest.fixture(scope="module")
+def history_db(bench_db):
+    """
+    The benchmark database with a fresh listening history
+
+    The history is written again on every run, as it is relative to now
+    """
+    now = datetime.utcnow()
+    rows = list(history_rows(bench_db, now))
+    with bench_db.Session() as db:
+        db.execute(delete(HistoryEntry))
+        if bench_db.backend == "postgresql":
+            history.create_partitions(db, now)
+        for start in range(0, len(rows), 5_000):
+            db.execute(insert(HistoryEntry), rows[start : start + 5_000])
+        db.commit()
+        if bench_db.backend == "postgresql":
+            db.connection().exec_driver_sql("ANALYZE listening_history")
+    return bench_db
+
+
+@pytest.fixture(scope="function")
+def db(history_db):
+    with history_db.Session() as db:
+        yield db
+
+
+@pytest.fixture(scope="function")
+def user(history_db, db):
+    return db.get(User, history_db.dataset.artist_id(0))
+
+
+def record_footprint(benchmark, bench_db, db):
+    size = footprint(bench_db, db)
+    plays = min(HISTORY_USERS, bench_db.dataset.spec.users) * PLAYS_PER_USER
+    benchmark.extra_info.update(
+        {"plays": plays, "bytes": size, "bytes_per_play": size / plays}
+    )
+
+
+def test_get_history_first_page(benchmark, history_db, db, user):
+    """
+    Benchmark reading the latest plays of a user
+    """
+    record_footprint(benchmark, history_db, db)
+    plays, next_cursor = benchmark(
+        lambda: history.get_history(db, user, before=None, take=20),
+        setup=db.expunge_all,
+    )
+    assert len(plays) == 20 and next_cursor
+
+
+def test_get_history_deep_page(benchmark, history_db, db, user):
+    """
+    Benchmark reading a page of plays from a cursor deep in the history
+    """
+    record_footprint(benchmark, history_db, db)
+    _, cursor = history.get_history(db, user, before=None, take=PLAYS_PER_USER // 2)
+    plays, _ = benchmark(
+        lambda: history.get_history(db, user, before=cursor, take=20),
+        setup=db.expunge_all,
+    )
+    assert len(plays) == 20
+
+
+def test_maintain_history(benchmark, history_db, db):
+    """
+    Benchmark the periodic maintenance when nothing has expired
+    """
+    benchmark(history.maintain_history, db)
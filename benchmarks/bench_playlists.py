@@ -0,0 +1,128 @@
+"""
+Microbenchmarks of editing and reading a large playlist.
+
+Adding, moving and removing a track should take about as long in the
+middle of a PLAYLIST_SIZE track playlist as in a short one, as each writes
+one item. Rebalancing rewrites every item, and is timed for comparison.
+
+See benchmarks/conftest.py for how to run them.
+"""
+from itertools import cycle
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select
+
+from sonority.auth.models import User
+from sonority.playlists.models import Playlist, PlaylistItem
+from sonority.playlists.schemas import (
+    MAX_TRACKS_ADDED,
+    PlaylistCreateSchema,
+    PlaylistPositionSchema,
+    PlaylistTracksAddSchema,
+)
+from sonority.playlists.service import (
+    add_tracks,
+    create_playlist,
+    get_item,
+    get_items,
+    move_item,
+    rebalance_playlist,
+    remove_item,
+)
+
+PLAYLIST_SIZE = 10_000
+
+
+@pytest.fixture(scope="module")
+def playlist_id(bench_db):
+    """
+    The ID of a new PLAYLIST_SIZE track playlist, replacing those of earlier
+    runs
+    """
+    dataset = bench_db.dataset
+    with bench_db.Session() as db:
+        user = db.get(User, dataset.artist_id(dataset.spec.artists))
+        old = select(Playlist.id).where(Playlist.owner_id == user.id)
+        db.execute(delete(PlaylistItem).where(PlaylistItem.playlist_id.in_(old)))
+        db.execute(delete(Playlist).where(Playlist.owner_id == user.id))
+        db.commit()
+
+        playlist = create_playlist(db, PlaylistCreateSchema(name="Bench"), user)
+        for _ in range(PLAYLIST_SIZE // MAX_TRACKS_ADDED):
+            track_ids = [uuid4() for _ in range(MAX_TRACKS_ADDED)]
+            add_tracks(db, playlist, PlaylistTracksAddSchema(track_ids=track_ids))
+        return playlist.id
+
+
+@pytest.fixture(scope="function")
+def db(bench_db):
+    with bench_db.Session() as db:
+        yield db
+
+
+@pytest.fixture(scope="function")
+def playlist(db, playlist_id):
+    return db.get(Playlist, playlist_id)
+
+
+def middle_items(db, playlist, count: int):
+    return get_items(db, playlist, skip=PLAYLIST_SIZE // 2, take=count)
+
+
+def test_get_items_deep_page(benchmark, db, playlist):
+    """
+    Benchmark reading a page from the middle of the playlist
+    """
+    items = benchmark(
+        lambda: middle_items(db, playlist, 20), setup=db.expunge_all, max_rounds=100
+    )
+    assert len(items) == 20
+
+
+def test_add_track_in_middle(benchmark, db, playlist):
+    """
+    Benchmark adding a track in the middle of the playlist
+    """
+    (anchor,) = middle_items(db, playlist, 1)
+    position = PlaylistTracksAddSchema(track_ids=[uuid4()], after=anchor.id)
+    benchmark(add_tracks, db, playlist, position, max_rounds=200)
+
+
+def test_move_item(benchmark, db, playlist):
+    """
+    Benchmark moving a track between two spots in the playlist
+    """
+    moved, first, second = middle_items(db, playlist, 3)
+    positions = cycle(
+        [
+            PlaylistPositionSchema(after=second.id),
+            PlaylistPositionSchema(before=first.id),
+        ]
+    )
+    benchmark(
+        lambda: move_item(db, playlist, moved, next(positions)), max_rounds=200
+    )
+
+
+def test_remove_item(benchmark, db, playlist):
+    """
+    Benchmark removing a track from the middle of the playlist
+    """
+    (anchor,) = middle_items(db, playlist, 1)
+    added = []
+
+    def add():
+        position = PlaylistTracksAddSchema(track_ids=[uuid4()], after=anchor.id)
+        (item,) = add_tracks(db, playlist, position)
+        added.append(get_item(db, playlist, item["id"]))
+
+    benchmark(lambda: remove_item(db, playlist, added.pop()), setup=add, max_rounds=200)
+
+
+def test_rebalance_playlist(benchmark, db, playlist):
+    """
+    Benchmark giving every track of the playlist new keys
+    """
+    count = benchmark(rebalance_playlist, db, playlist, max_rounds=5)
+    assert count >= PLAYLIST_SIZE
@@ -0,0 +1,120 @@
+"""
+Microbenchmarks of the service-layer hot paths, independent of HTTP.
+
+See benchmarks/conftest.py for how to run them.
+"""
+from uuid import uuid4
+
+import pytest
+
+from benchmarks.dataset import PASSWORD
+from sonority.albums.service import get_liked_albums
+from sonority.artists.models import Artist
+from sonority.artists.service import _get_artist, get_follows
+from sonority.auth.models import User
+from sonority.auth.service import login_user_from_token
+from sonority.auth.utils import TokenData, decode_token, hash_password, make_token
+from sonority.autocomplete import PrefixIndex
+from sonority.search.service import _load_completions, search
+
+
+@pytest.fixture(scope="function")
+def db(bench_db):
+    with bench_db.Session() as db:
+        yield db
+
+
+@pytest.fixture(scope="function")
+def user_id(bench_db):
+    """
+    The id of the first user that is not an artist
+    """
+    dataset = bench_db.dataset
+    return dataset.artist_id(dataset.spec.artists)
+
+
+def test_get_artist_by_id(benchmark, bench_db, db):
+    """
+    Benchmark loading the most followed artist by id
+    """
+    artist_id = bench_db.dataset.artist_id(0)
+    artist = benchmark(_get_artist, db, Artist.id, artist_id, setup=db.expunge_all)
+    assert artist.id == artist_id
+
+
+def test_get_artist_by_name(benchmark, bench_db, db):
+    """
+    Benchmark loading the most followed artist by name
+    """
+    name = bench_db.dataset.artist_name(0)
+    artist = benchmark(_get_artist, db, Artist.name, name, setup=db.expunge_all)
+    assert artist.name == name
+
+
+def test_get_follows(benchmark, db, user_id):
+    """
+    Benchmark listing the artists a user follows
+    """
+    user = db.get(User, user_id)
+    benchmark(
+        lambda: get_follows(db, user, skip=0, take=20), setup=db.expunge_all
+    )
+
+
+def test_get_liked_albums(benchmark, db, user_id):
+    """
+    Benchmark listing the albums a user likes
+    """
+    benchmark(
+        lambda: get_liked_albums(db, user_id, skip=0, take=20), setup=db.expunge_all
+    )
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        pytest.param("artist 1", id="common-prefix"),
+        pytest.param("artist 12345", id="exact"),
+        pytest.param("album 99", id="album-prefix"),
+    ],
+)
+def test_search(benchmark, db, query):
+    """
+    Benchmark searching as the user types (at scale: --bench-sizes 10000000)
+    """
+    benchmark(lambda: search(db, query, take=20), setup=db.expunge_all)
+
+
+@pytest.mark.parametrize("prefix", ["a", "artist 1", "album 12"])
+def test_autocomplete(benchmark, db, prefix):
+    """
+    Benchmark completing a prefix from the in-process index
+    """
+    index = PrefixIndex(max_entries=200_000)
+    index.build(_load_completions(db, index.max_entries))
+    benchmark(index.complete, prefix)
+
+
+def test_login_user_from_token(benchmark, db, user_id):
+    """
+    Benchmark authenticating a request from its token
+    """
+    token = make_token(TokenData(user_id=user_id))
+    user = benchmark(login_user_from_token, db, token, setup=db.expunge_all)
+    assert user.id == user_id
+
+
+def test_decode_token(benchmark):
+    """
+    Benchmark decoding a token
+    """
+    user_id = uuid4()
+    token = make_token(TokenData(user_id=user_id))
+    assert benchmark(decode_token, token).user_id == user_id
+
+
+def test_hash_password(benchmark):
+    """
+    Benchmark hashing a password
+    """
+    benchmark(hash_password, PASSWORD, min_time=1, max_rounds=10)
@@ -0,0 +1,287 @@
+"""
+Fixtures for the service-layer microbenchmarks.
+
+Benchmark files are named bench_*.py so the regular test run skips them,
+and run by passing them to pytest explicitly:
+
+    python -m pytest benchmarks/bench_service.py --bench-sizes 1000,100000 \\
+        --bench-postgres-url postgresql://localhost/sonority_bench
+
+Each benchmark is timed against every backend and dataset size, and the SQL
+it issues is recorded with its query plan. Results are written as JSON and
+compared with a stored baseline: a median slower than the baseline by more
+than the tolerance fails the benchmark. Timings depend on the machine, so
+record the baseline on the machine that checks for regressions, with
+--bench-save.
+
+Seeded databases are kept between runs (see --bench-data-dir), so large
+sizes only pay for seeding once. They can also be generated in bulk
+beforehand with python -m benchmarks.datagen (see benchmarks/datagen.py).
+"""
+import json
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.dataset import Dataset, DatasetSpec, seed
+from sonority.auth.models import User
+from sonority.database import init_db
+
+BENCHMARKS_DIR = Path(__file__).parent
+
+_results: dict[str, dict] = {}
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("sonority benchmarks")
+    group.addoption(
+        "--bench-sizes",
+        default="1000",
+        help="comma separated dataset sizes, in users (default: 1000)",
+    )
+    group.addoption(
+        "--bench-postgres-url",
+        default=None,
+        help="also benchmark against this Postgres server",
+    )
+    group.addoption(
+        "--bench-data-dir",
+        default=str(Path(tempfile.gettempdir()) / "sonority-bench"),
+        help="where seeded SQLite databases are kept",
+    )
+    group.addoption(
+        "--bench-baseline",
+        default=str(BENCHMARKS_DIR / "baseline.json"),
+        help="the stored results to compare against",
+    )
+    group.addoption(
+        "--bench-output",
+        default=str(BENCHMARKS_DIR / "results.json"),
+        help="where to write the results",
+    )
+    group.addoption(
+        "--bench-save",
+        action="store_true",
+        help="store the results as the new baseline",
+    )
+    group.addoption(
+        "--bench-tolerance",
+        type=float,
+        default=0.25,
+        help="allowed slowdown over the baseline median (default: 0.25)",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "bench_db" not in metafunc.fixturenames:
+        return
+
+    config = metafunc.config
+    sizes = [int(size) for size in config.getoption("--bench-sizes").split(",")]
+    backends = ["sqlite"]
+    if config.getoption("--bench-postgres-url"):
+        backends.append("postgresql")
+
+    params = [(backend, size) for backend in backends for size in sizes]
+    metafunc.parametrize(
+        "bench_db",
+        params,
+        ids=[f"{backend}-{size}" for backend, size in params],
+        indirect=True,
+        scope="session",
+    )
+
+
+def dataset_spec(size: int) -> DatasetSpec:
+    """
+    The shape of the dataset of a given size
+    """
+    return DatasetSpec(users=size, artists=max(10, size // 100))
+
+
+def _database_url(config, backend: str, size: int) -> str:
+    if backend == "sqlite":
+        data_dir = Path(config.getoption("--bench-data-dir"))
+        data_dir.mkdir(parents=True, exist_ok=True)
+        return f"sqlite:///{data_dir / f'bench_{size}.db'}"
+
+    from sqlalchemy.engine import make_url
+    from sqlalchemy_utils import create_database, database_exists
+
+    url = make_url(config.getoption("--bench-postgres-url"))
+    url = url.set(database=f"{url.database}_{size}")
+    if not database_exists(url):
+        create_database(url)
+    return url.render_as_string(hide_password=False)
+
+
+class BenchDatabase:
+    """
+    A seeded benchmark database
+    """
+
+    def __init__(self, backend: str, url: str, dataset: Dataset):
+        self.backend = backend
+        self.dataset = dataset
+        self.engine = create_engine(url)
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+    def explain(self, statement: str, parameters) -> str:
+        """
+        Return the query plan of a statement
+        """
+        prefix = "EXPLAIN QUERY PLAN " if self.backend == "sqlite" else "EXPLAIN "
+        with self.engine.connect() as connection:
+            rows = connection.exec_driver_sql(prefix + statement, parameters).all()
+        return "\n".join(" ".join(map(str, row)) for row in rows)
+
+
+@pytest.fixture(scope="session")
+def bench_db(request) -> BenchDatabase:
+    """
+    A database seeded with a dataset, reused if already seeded
+    """
+    backend, size = request.param
+    url = _database_url(request.config, backend, size)
+    spec = dataset_spec(size)
+    init_db(url=url)
+
+    database = BenchDatabase(backend, url, Dataset(spec))
+    with database.Session() as db:
+        users = db.execute(select(func.count(User.id))).scalar_one()
+        if users == 0:
+            seed(db, spec)
+        elif users != spec.users:
+            pytest.fail(f"{url} holds a different dataset, delete it first")
+
+    yield database
+    database.engine.dispose()
+
+
+class Benchmark:
+    """
+    Times a function and records the statements it executes
+    """
+
+    def __init__(self, request, database: BenchDatabase | None):
+        self.request = request
+        self.database = database
+        # recorded with the timings, for measurements other than time
+        self.extra_info = {}
+
+    def __call__(self, fn, *args, setup=None, min_time=0.2, max_rounds=1000):
+        """
+        Time fn(*args) over several rounds and return its last result
+
+        :param setup: Called before each round, outside of the timing.
+        :param min_time: Keep running rounds for at least this many seconds.
+        :param max_rounds: Stop after this many rounds regardless.
+        """
+        statements = self._capture_statements(fn, args, setup)
+
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < max_rounds and (
+            len(timings) < 3 or time.perf_counter() - started < min_time
+        ):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            result = fn(*args)
+            timings.append(time.perf_counter() - start)
+
+        self._record(timings, statements)
+        return result
+
+    def _capture_statements(self, fn, args, setup):
+        """
+        Run fn once, untimed, recording its statements and their plans
+        """
+        if setup:
+            setup()
+        if self.database is None:
+            fn(*args)
+            return []
+
+        executed = []
+
+        def before_cursor_execute(conn, cursor, statement, parameters, *_):
+            executed.append((statement, parameters))
+
+        engine = self.database.engine
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            fn(*args)
+        finally:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+        return [
+            {"sql": statement, "plan": self.database.explain(statement, parameters)}
+            for statement, parameters in executed
+        ]
+
+    def _record(self, timings: list[float], statements: list[dict]):
+        name = self.request.node.nodeid.split("::", 1)[-1]
+        median = statistics.median(timings)
+        _results[name] = {
+            "rounds": len(timings),
+            "min_s": min(timings),
+            "median_s": median,
+            "mean_s": statistics.fmean(timings),
+            "stdev_s": statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            "statements": statements,
+            "extra_info": self.extra_info,
+        }
+
+        config = self.request.config
+        baseline = _load_baseline(config.getoption("--bench-baseline")).get(name)
+        tolerance = config.getoption("--bench-tolerance")
+        if baseline and median > baseline["median_s"] * (1 + tolerance):
+            pytest.fail(
+                f"regression: median {median * 1e6:.1f}us, "
+                f"baseline {baseline['median_s'] * 1e6:.1f}us"
+            )
+
+
+_baselines: dict[str, dict] = {}
+
+
+def _load_baseline(path: str) -> dict:
+    if path not in _baselines:
+        try:
+            with open(path) as f:
+                _baselines[path] = json.load(f)
+        except FileNotFoundError:
+            _baselines[path] = {}
+    return _baselines[path]
+
+
+@pytest.fixture(scope="function")
+def benchmark(request):
+    """
+    Time a function, against bench_db if the benchmark uses it
+    """
+    database = None
+    if "bench_db" in request.fixturenames:
+        database = request.getfixturevalue("bench_db")
+    return Benchmark(request, database)
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if not _results:
+        return
+
+    config = session.config
+    paths = [config.getoption("--bench-output")]
+    if config.getoption("--bench-save"):
+        paths.append(config.getoption("--bench-baseline"))
+
+    for path in paths:
+        with open(path, "w") as f:
+            json.dump(_results, f, indent=2, sort_keys=True)
+            f.write("\n")
@@ -0,0 +1,254 @@
+"""
+This file generates a production-sized synthetic dataset.
+
+It writes the same dataset as benchmarks.dataset.seed (see
+benchmarks/dataset.py), but in bulk: rows are written in batches, with COPY
+on Postgres, by several worker processes each generating its own slice of
+every table. The dataset only depends on its shape and seed, so the same
+command always produces the same rows.
+
+    python -m benchmarks.datagen --database-url postgresql://localhost/perf \\
+        --users 5000000 --artists 50000 --workers 8
+
+To pre-seed a database for the microbenchmarks (benchmarks/conftest.py) at
+size N, use --users N --artists N/100.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from multiprocessing import Pool
+
+from sqlalchemy import Table, create_engine, insert
+
+from benchmarks.dataset import (
+    PASSWORD,
+    DatasetSpec,
+    album_rows,
+    artist_rows,
+    batched,
+    follow_rows,
+    like_rows,
+    user_rows,
+)
+from sonority.albums.models import Album, Likes
+from sonority.artists.models import Artist, Follow
+from sonority.auth.models import User
+from sonority.auth.utils import hash_password
+
+# (table, rows of a slice, number of slices to generate)
+# in an order that satisfies foreign keys
+TABLES = [
+    (User.__table__, user_rows, lambda spec: spec.users),
+    (Artist.__table__, artist_rows, lambda spec: spec.artists),
+    (Album.__table__, album_rows, lambda spec: spec.albums),
+    # follows and likes are generated per user
+    (Follow.__table__, follow_rows, lambda spec: spec.users),
+    (Likes.__table__, like_rows, lambda spec: spec.users),
+]
+
+
+def copy_rows(connection, table: Table, rows: list[dict]) -> None:
+    """
+    Write rows to a Postgres table with COPY
+    """
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row[column] for column in columns)
+    buffer.seek(0)
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def insert_rows(connection, table: Table, rows: list[dict]) -> None:
+    """
+    Write rows to a table with a multi-row INSERT
+    """
+    connection.execute(insert(table), rows)
+
+
+# the state of a worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(url: str, spec: DatasetSpec, pwd_hash: str, batch_size: int):
+    engine = create_engine(url)
+    _worker.update(
+        engine=engine,
+        spec=spec,
+        pwd_hash=pwd_hash,
+        batch_size=batch_size,
+        write=copy_rows if engine.dialect.name == "postgresql" else insert_rows,
+    )
+
+
+def _write_slice(task: tuple[int, int, int]) -> tuple[int, int, int]:
+    """
+    Generate and write a slice of a table, in a worker
+
+    :param task: The index of the table in TABLES and the slice's bounds.
+    :return: The table index, the size of the slice and the rows written.
+    """
+    table_index, start, stop = task
+    table, generate, _ = TABLES[table_index]
+    spec = _worker["spec"]
+    args = (_worker["pwd_hash"],) if generate is user_rows else ()
+
+    written = 0
+    with _worker["engine"].begin() as connection:
+        rows = generate(spec, start, stop, *args)
+        for batch in batched(rows, _worker["batch_size"]):
+            _worker["write"](connection, table, batch)
+            written += len(batch)
+
+    return table_index, stop - start, written
+
+
+def slices(total: int, size: int) -> list[tuple[int, int]]:
+    return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+
+class Progress:
+    """
+    Reports the progress of a table on stderr
+    """
+
+    def __init__(self, name: str, total: int, stream=sys.stderr):
+        self.name = name
+        self.total = total
+        self.done = 0
+        self.rows = 0
+        self.stream = stream
+        self.started = time.monotonic()
+        self._last_report = 0.0
+
+    def advance(self, done: int, rows: int) -> None:
+        self.done += done
+        self.rows += rows
+        now = time.monotonic()
+        if now - self._last_report >= 1 or self.done == self.total:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        percent = 100 * self.done / self.total if self.total else 100
+        self.stream.write(
+            f"{self.name:<12} {self.done:>11,}/{self.total:<11,} {percent:5.1f}%"
+            f" {self.rows:>13,} rows {self.rows / elapsed:>11,.0f} rows/s\n"
+        )
+        self.stream.flush()
+
+
+def generate(
+    url: str, spec: DatasetSpec, *, workers: int, batch_size: int, slice_size: int
+) -> dict[str, int]:
+    """
+    Write a dataset into the empty database at url
+
+    :return: The number of rows written to each table.
+    """
+    pwd_hash = hash_password(PASSWORD)
+    written = {}
+    initargs = (url, spec, pwd_hash, batch_size)
+    with Pool(workers, initializer=_init_worker, initargs=initargs) as pool:
+        for table_index, (table, _, count) in enumerate(TABLES):
+            total = count(spec)
+            progress = Progress(table.name, total)
+            tasks = [
+                (table_index, start, stop) for start, stop in slices(total, slice_size)
+            ]
+            for _, done, rows in pool.imap_unordered(_write_slice, tasks):
+                progress.advance(done, rows)
+            written[table.name] = progress.rows
+
+    return written
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.datagen",
+        description="Generate a synthetic dataset in bulk.",
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument(
+        "--drop", action="store_true", help="drop and recreate the schema first"
+    )
+    parser.add_argument("--users", type=int, default=DatasetSpec.users)
+    parser.add_argument("--artists", type=int, default=DatasetSpec.artists)
+    parser.add_argument(
+        "--albums-per-artist", type=float, default=DatasetSpec.albums_per_artist
+    )
+    parser.add_argument(
+        "--follows-per-user", type=float, default=DatasetSpec.follows_per_user
+    )
+    parser.add_argument(
+        "--likes-per-user", type=float, default=DatasetSpec.likes_per_user
+    )
+    parser.add_argument("--skew", type=float, default=DatasetSpec.skew)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="worker processes (always 1 on SQLite, which has a single writer)",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument(
+        "--slice-size",
+        type=int,
+        default=50_000,
+        help="rows (or users, for follows and likes) per unit of work",
+    )
+    args = parser.parse_args(argv)
+
+    if args.artists > args.users:
+        parser.error("--artists cannot exceed --users")
+
+    spec = DatasetSpec(
+        users=args.users,
+        artists=args.artists,
+        albums_per_artist=args.albums_per_artist,
+        follows_per_user=args.follows_per_user,
+        likes_per_user=args.likes_per_user,
+        skew=args.skew,
+        seed=args.seed,
+    )
+
+    import sonority.server  # noqa: F401, registers every model and the search index
+    from sonority.database import drop_db, init_db
+
+    if args.drop:
+        drop_db(url=args.database_url)
+    init_db(url=args.database_url)
+
+    workers = args.workers
+    if args.database_url.startswith("sqlite"):
+        workers = 1
+
+    started = time.monotonic()
+    written = generate(
+        args.database_url,
+        spec,
+        workers=workers,
+        batch_size=args.batch_size,
+        slice_size=args.slice_size,
+    )
+    elapsed = time.monotonic() - started
+    total = sum(written.values())
+    print(f"wrote {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+This file generates a synthetic dataset for benchmarks.
+
+Popularity follows a power law: a few artists get most of the follows and a
+few albums most of the likes, like on a real platform. Everything is
+derived from the seed and the row's index, so a dataset can be regenerated
+identically and any slice of it can be generated on its own.
+"""
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Iterator
+from uuid import UUID
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from sonority.albums.models import Album, Likes
+from sonority.artists.models import Artist, Follow
+from sonority.auth.models import User
+from sonority.auth.utils import hash_password
+
+PASSWORD = "benchmark-password"
+
+# the high bits of generated ids tell tables apart
+_USER_ID_PREFIX = 1
+_ALBUM_ID_PREFIX = 2
+
+_EPOCH = datetime(2020, 1, 1)
+
+
+@dataclass
+class DatasetSpec:
+    """
+    The shape of a synthetic dataset
+    """
+
+    users: int = 1_000
+    # the first `artists` users are artists
+    artists: int = 100
+    albums_per_artist: float = 5.0
+    follows_per_user: float = 10.0
+    likes_per_user: float = 10.0
+    # exponent of the power law popularity follows, higher is more skewed
+    skew: float = 1.1
+    released_ratio: float = 0.9
+    seed: int = 0
+
+    @property
+    def albums(self) -> int:
+        return round(self.artists * self.albums_per_artist)
+
+
+@dataclass
+class Dataset:
+    """
+    A generated dataset, as needed to drive requests against it
+    """
+
+    spec: DatasetSpec
+    released_albums: list[int] = field(init=False, repr=False)
+    _artist_weights: list[float] = field(init=False, repr=False)
+    _album_weights: list[float] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        spec = self.spec
+        self.released_albums = released_album_indices(spec)
+        self._artist_weights = cumulative_zipf_weights(spec.artists, spec.skew)
+        self._album_weights = list(
+            accumulate(1 / (i + 1) ** spec.skew for i in self.released_albums)
+        )
+
+    def user_email(self, index: int) -> str:
+        return user_email(index)
+
+    def artist_id(self, index: int) -> UUID:
+        return user_id(self.spec.seed, index)
+
+    def artist_name(self, index: int) -> str:
+        return artist_name(index)
+
+    def album_id(self, index: int) -> UUID:
+        return album_id(self.spec.seed, index)
+
+    def pick_user(self, rng: random.Random) -> int:
+        return rng.randrange(self.spec.users)
+
+    def pick_artist(self, rng: random.Random) -> int:
+        """
+        Pick an artist index, popular artists being picked more often
+        """
+        population = range(self.spec.artists)
+        return rng.choices(population, cum_weights=self._artist_weights)[0]
+
+    def pick_album(self, rng: random.Random) -> int:
+        """
+        Pick a released album index, popular albums being picked more often
+        """
+        population = self.released_albums
+        return rng.choices(population, cum_weights=self._album_weights)[0]
+
+
+def cumulative_zipf_weights(n: int, skew: float) -> list[float]:
+    """
+    Return the cumulative weights of ranks 0..n-1 under a Zipf law
+    """
+    return list(accumulate(1 / (rank + 1) ** skew for rank in range(n)))
+
+
+def user_id(seed: int, index: int) -> UUID:
+    return UUID(int=(_USER_ID_PREFIX << 120) | (seed << 64) | index)
+
+
+def album_id(seed: int, index: int) -> UUID:
+    return UUID(int=(_ALBUM_ID_PREFIX << 120) | (seed << 64) | index)
+
+
+def user_email(index: int) -> str:
+    return f"user{index}@bench.example.com"
+
+
+def artist_name(index: int) -> str:
+    return f"Artist {index}"
+
+
+def _rng(spec: DatasetSpec, table: str, index: int) -> random.Random:
+    """
+    The random generator for one row (or group of rows) of a table
+    """
+    return random.Random(f"{spec.seed}:{table}:{index}")
+
+
+def _timestamp(rng: random.Random) -> datetime:
+    return _EPOCH + timedelta(seconds=rng.randrange(3 * 365 * 24 * 3600))
+
+
+def _count(rng: random.Random, mean: float, limit: int) -> int:
+    """
+    Draw a count with the given mean, most being small and a few large
+    """
+    if mean <= 0:
+        return 0
+    return min(limit, int(rng.expovariate(1 / mean)))
+
+
+def _zipf_sample(
+    rng: random.Random, cum_weights: list[float], k: int, exclude=None
+) -> set[int]:
+    """
+    Draw k distinct indices, weighted by cum_weights
+    """
+    population = range(len(cum_weights))
+    chosen: set[int] = set()
+    attempts = 0
+    while len(chosen) < k and attempts < 10 * k:
+        index = rng.choices(population, cum_weights=cum_weights)[0]
+        if index != exclude:
+            chosen.add(index)
+        attempts += 1
+    return chosen
+
+
+def user_rows(
+    spec: DatasetSpec, start: int, stop: int, pwd_hash: str
+) -> Iterator[dict]:
+    for i in range(start, stop):
+        created_at = _timestamp(_rng(spec, "users", i))
+        yield {
+            "id": user_id(spec.seed, i),
+            "email": user_email(i),
+            "username": f"user{i}",
+            "full_name": f"User {i}",
+            "pwd_hash": pwd_hash,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def artist_rows(spec: DatasetSpec, start: int, stop: int) -> Iterator[dict]:
+    for i in range(start, stop):
+        yield {
+            "id": user_id(spec.seed, i),
+            "name": artist_name(i),
+            "description": f"Description of artist {i}",
+            "is_verified": i < spec.artists // 10,
+        }
+
+
+def album_rows(spec: DatasetSpec, start: int, stop: int) -> Iterator[dict]:
+    """
+    Albums are spread over artists with the same skew as their popularity
+    """
+    weights = cumulative_zipf_weights(spec.artists, spec.skew)
+    for i in range(start, stop):
+        rng = _rng(spec, "albums", i)
+        artist = rng.choices(range(spec.artists), cum_weights=weights)[0]
+        created_at = _timestamp(rng)
+        released = rng.random() < spec.released_ratio
+        yield {
+            "id": album_id(spec.seed, i),
+            "name": f"Album {i}",
+            "album_type": rng.choice(["album", "single"]),
+            "track_count": 0,
+            "artist_id": user_id(spec.seed, artist),
+            "released": released,
+            "release_date": created_at.date() if released else None,
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+
+
+def follow_rows(spec: DatasetSpec, start: int, stop: int) -> Iterator[dict]:
+    """
+    The follows of users start..stop
+    """
+    weights = cumulative_zipf_weights(spec.artists, spec.skew)
+    for i in range(start, stop):
+        rng = _rng(spec, "follows", i)
+        k = _count(rng, spec.follows_per_user, spec.artists - 1)
+        for artist in _zipf_sample(rng, weights, k, exclude=i):
+            yield {
+                "follower_id": user_id(spec.seed, i),
+                "artist_id": user_id(spec.seed, artist),
+                "created_at": _timestamp(rng),
+            }
+
+
+def like_rows(spec: DatasetSpec, start: int, stop: int) -> Iterator[dict]:
+    """
+    The likes of users start..stop
+    """
+    weights = cumulative_zipf_weights(spec.albums, spec.skew)
+    for i in range(start, stop):
+        rng = _rng(spec, "likes", i)
+        k = _count(rng, spec.likes_per_user, spec.albums)
+        for album in _zipf_sample(rng, weights, k):
+            yield {
+                "user_id": user_id(spec.seed, i),
+                "album_id": album_id(spec.seed, album),
+                "created_at": _timestamp(rng),
+            }
+
+
+def batched(rows: Iterator[dict], size: int) -> Iterator[list[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def seed(db: Session, spec: DatasetSpec, batch_size: int = 5_000) -> Dataset:
+    """
+    Insert a dataset into an empty database
+
+    Every user gets the password PASSWORD, hashed once.
+    """
+    pwd_hash = hash_password(PASSWORD)
+    tables = [
+        (User, user_rows(spec, 0, spec.users, pwd_hash)),
+        (Artist, artist_rows(spec, 0, spec.artists)),
+        (Album, album_rows(spec, 0, spec.albums)),
+        (Follow, follow_rows(spec, 0, spec.users)),
+        (Likes, like_rows(spec, 0, spec.users)),
+    ]
+    for model, rows in tables:
+        for batch in batched(rows, batch_size):
+            db.execute(insert(model), batch)
+        db.commit()
+
+    return Dataset(spec)
+
+
+def released_album_indices(spec: DatasetSpec) -> list[int]:
+    """
+    The indices of the albums of a dataset that are released
+    """
+    return [
+        i
+        for i, row in enumerate(album_rows(spec, 0, spec.albums))
+        if row["released"]
+    ]
+
@@ -0,0 +1,339 @@
+"""
+This file implements an end-to-end load test of the API.
+
+A synthetic dataset (see benchmarks/dataset.py) is seeded into the benchmark
+database, then the real ASGI app is driven in process by concurrent clients,
+each logged in as a different user and issuing a weighted mix of requests
+over the auth, artists and albums endpoints.
+
+Throughput and latency percentiles are reported per endpoint as JSON, and
+two reports can be compared to see what a commit changed:
+
+    python -m benchmarks.load --database-url sqlite:////tmp/bench.db \\
+        --clients 20 --duration 30 --output after.json
+    python -m benchmarks.load --compare before.json after.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict
+from datetime import datetime
+
+import httpx
+
+from benchmarks.dataset import Dataset, DatasetSpec, PASSWORD
+from sonority import settings
+
+
+# Each request is called with an authenticated client, the dataset, the
+# virtual user's random generator and the index of its user.
+
+
+async def login(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    data = {"username": dataset.user_email(user), "password": PASSWORD}
+    return await client.post("/users/login", data=data)
+
+
+async def get_me(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    return await client.get("/users/me")
+
+
+async def get_artist_by_id(client: httpx.AsyncClient, dataset: Dataset, rng, user):
+    artist_id = dataset.artist_id(dataset.pick_artist(rng))
+    return await client.get("/artists/", params={"id": str(artist_id)})
+
+
+async def get_artist_by_name(client: httpx.AsyncClient, dataset: Dataset, rng, user):
+    name = dataset.artist_name(dataset.pick_artist(rng))
+    return await client.get("/artists/", params={"name": name})
+
+
+async def get_artists_by_ids(client: httpx.AsyncClient, dataset: Dataset, rng, user):
+    ids = {str(dataset.artist_id(dataset.pick_artist(rng))) for _ in range(20)}
+    return await client.get("/artists/batch", params={"ids": list(ids)})
+
+
+async def get_follows(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    return await client.get("/artists/me/follows")
+
+
+async def follow(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    artist_id = dataset.artist_id(dataset.pick_artist(rng))
+    return await client.post(f"/artists/{artist_id}/follow")
+
+
+async def unfollow(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    artist_id = dataset.artist_id(dataset.pick_artist(rng))
+    return await client.post(f"/artists/{artist_id}/unfollow")
+
+
+async def get_album(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    album_id = dataset.album_id(dataset.pick_album(rng))
+    return await client.get(f"/albums/{album_id}")
+
+
+async def get_albums_by_artist(client: httpx.AsyncClient, dataset: Dataset, rng, user):
+    artist_id = dataset.artist_id(dataset.pick_artist(rng))
+    return await client.get(f"/albums/by/{artist_id}")
+
+
+async def get_albums_by_ids(client: httpx.AsyncClient, dataset: Dataset, rng, user):
+    ids = {str(dataset.album_id(dataset.pick_album(rng))) for _ in range(20)}
+    return await client.get("/albums/", params={"ids": list(ids)})
+
+
+async def record_plays(client: httpx.AsyncClient, dataset: Dataset, rng, user: int):
+    plays = [{"album_id": str(dataset.album_id(dataset.pick_album(rng)))}] * 10
+    return await client.post("/plays/", json=plays)
+
+
+# (endpoint, weight, request)
+SCENARIOS = [
+    ("POST /users/login", 2, login),
+    ("GET /users/me", 5, get_me),
+    ("GET /artists/?id", 15, get_artist_by_id),
+    ("GET /artists/?name", 10, get_artist_by_name),
+    ("GET /artists/batch", 10, get_artists_by_ids),
+    ("GET /artists/me/follows", 10, get_follows),
+    ("POST /artists/{artist_id}/follow", 5, follow),
+    ("POST /artists/{artist_id}/unfollow", 5, unfollow),
+    ("GET /albums/{album_id}", 30, get_album),
+    ("GET /albums/by/{artist_id}", 20, get_albums_by_artist),
+    ("GET /albums/?ids", 10, get_albums_by_ids),
+    ("POST /plays", 20, record_plays),
+]
+
+
+class Recorder:
+    """
+    Collects the latency and outcome of every request
+    """
+
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.recording = False
+
+    def record(self, endpoint: str, seconds: float, response: httpx.Response):
+        if not self.recording:
+            return
+
+        self.latencies[endpoint].append(seconds)
+        if response.status_code >= 400:
+            self.errors[endpoint] += 1
+
+
+async def timed(recorder: Recorder, endpoint: str, request) -> httpx.Response:
+    start = time.perf_counter()
+    response = await request
+    recorder.record(endpoint, time.perf_counter() - start, response)
+    return response
+
+
+async def virtual_user(
+    app, dataset: Dataset, user: int, recorder: Recorder, stop_at: float, seed: int
+):
+    """
+    Log in as user, then issue requests until stop_at
+    """
+    rng = random.Random(f"{seed}:{user}")
+    endpoints = [endpoint for endpoint, _, _ in SCENARIOS]
+    weights = [weight for _, weight, _ in SCENARIOS]
+    requests = {endpoint: request for endpoint, _, request in SCENARIOS}
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench")
+    async with client:
+        response = await login(client, dataset, rng, user)
+        token = response.json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+
+        while time.monotonic() < stop_at:
+            endpoint = rng.choices(endpoints, weights=weights)[0]
+            request = requests[endpoint](client, dataset, rng, user)
+            await timed(recorder, endpoint, request)
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """
+    The nearest-rank percentile p of sorted_values
+    """
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: list[float], errors: int, duration: float) -> dict:
+    """
+    The throughput and latencies of a run, all zero if no request succeeded
+    """
+    values = sorted(latencies)
+    if not values:
+        values = [0.0]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / duration, 2),
+        "mean_ms": round(1000 * sum(values) / len(values), 3),
+        "p50_ms": round(1000 * percentile(values, 50), 3),
+        "p95_ms": round(1000 * percentile(values, 95), 3),
+        "p99_ms": round(1000 * percentile(values, 99), 3),
+        "max_ms": round(1000 * values[-1], 3),
+    }
+
+
+def current_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(
+    app, dataset: Dataset, *, clients: int, duration: float, warmup: float, seed: int
+) -> dict:
+    """
+    Drive app with clients virtual users and return the report
+    """
+    recorder = Recorder()
+    start = time.monotonic()
+    users = random.Random(seed).sample(
+        range(dataset.spec.artists, dataset.spec.users), clients
+    )
+    tasks = [
+        asyncio.create_task(
+            virtual_user(app, dataset, user, recorder, start + warmup + duration, seed)
+        )
+        for user in users
+    ]
+
+    await asyncio.sleep(warmup)
+    recorder.recording = True
+    measured_from = time.monotonic()
+    await asyncio.gather(*tasks)
+    measured = time.monotonic() - measured_from
+
+    all_latencies = [
+        value for values in recorder.latencies.values() for value in values
+    ]
+    return {
+        "meta": {
+            "commit": current_commit(),
+            "timestamp": datetime.utcnow().isoformat(),
+            "clients": clients,
+            "duration_s": round(measured, 3),
+            "warmup_s": warmup,
+            "dataset": asdict(dataset.spec),
+        },
+        "total": summarize(all_latencies, sum(recorder.errors.values()), measured),
+        "endpoints": {
+            endpoint: summarize(latencies, recorder.errors[endpoint], measured)
+            for endpoint, latencies in sorted(recorder.latencies.items())
+        },
+    }
+
+
+def compare(before: dict, after: dict) -> str:
+    """
+    Format the change of every endpoint's metrics between two reports
+    """
+    metrics = ["throughput_rps", "p50_ms", "p95_ms", "p99_ms"]
+    lines = [f"{'endpoint':<36}" + "".join(f"{metric:>22}" for metric in metrics)]
+    rows = [("total", before["total"], after["total"])] + [
+        (endpoint, before["endpoints"].get(endpoint), new)
+        for endpoint, new in after["endpoints"].items()
+    ]
+    for endpoint, old, new in rows:
+        if not old:
+            continue
+
+        cells = []
+        for metric in metrics:
+            change = 0
+            if old[metric]:
+                change = (new[metric] - old[metric]) / old[metric] * 100
+            cells.append(f"{new[metric]:>12.2f} ({change:+6.1f}%)")
+        lines.append(f"{endpoint:<36}" + "".join(f"{cell:>22}" for cell in cells))
+    return "\n".join(lines)
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load", description="Load test the API."
+    )
+    parser.add_argument(
+        "--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="compare two reports"
+    )
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument(
+        "--no-seed",
+        action="store_true",
+        help="reuse a dataset already seeded with the same shape and seed",
+    )
+    parser.add_argument("--users", type=int, default=DatasetSpec.users)
+    parser.add_argument("--artists", type=int, default=DatasetSpec.artists)
+    parser.add_argument("--skew", type=float, default=DatasetSpec.skew)
+    parser.add_argument("--seed", type=int, default=DatasetSpec.seed)
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="seconds")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        before, after = (load_report(path) for path in args.compare)
+        print(compare(before, after))
+        return
+
+    spec = DatasetSpec(
+        users=args.users, artists=args.artists, skew=args.skew, seed=args.seed
+    )
+    if args.clients > spec.users - spec.artists:
+        parser.error("--clients cannot exceed the number of non-artist users")
+
+    settings.DATABASE_URL = args.database_url
+    from benchmarks.dataset import seed
+    from sonority.database import drop_db, get_sessionmaker, init_db
+    from sonority.server import app
+
+    if args.no_seed:
+        dataset = Dataset(spec)
+    else:
+        drop_db(url=args.database_url)
+        init_db(url=args.database_url)
+        with get_sessionmaker()() as db:
+            dataset = seed(db, spec)
+
+    report = asyncio.run(
+        run(
+            app,
+            dataset,
+            clients=args.clients,
+            duration=args.duration,
+            warmup=args.warmup,
+            seed=args.seed,
+        )
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
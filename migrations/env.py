@@ -10,6 +10,20 @@ from alembic import context
 from sonority.albums.models import Album  # noqa
 from sonority.artists.models import Artist  # noqa
 from sonority.auth.models import User  # noqa
+from sonority.charts.models import Activity, ChartEntry  # noqa
+from sonority.feed.models import FeedEntry  # noqa
+from sonority.jobs.models import Job  # noqa
+from sonority.playlists.models import Playlist, PlaylistItem  # noqa
+from sonority.plays.models import (  # noqa
+    HistoryEntry,
+    Play,
+    PlayCount,
+    PlayTotal,
+    PlayWatermark,
+)
+from sonority.recommendations.models import CoFollow, Neighbor  # noqa
+from sonority.search.models import SEARCH_INDEXES, SEARCH_TABLES
+from sonority.tracks.models import Track  # noqa
 from sonority.database import Base
 
 # this is the Alembic Config object, which provides
@@ -27,6 +41,17 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names):
+    """
+    Leave the search index, which has no models, out of autogenerate
+    """
+    if type_ == "table":
+        return not name.startswith(SEARCH_TABLES)
+    if type_ == "index":
+        return name not in SEARCH_INDEXES
+    return True
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -51,6 +76,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -78,7 +104,9 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
         )
 
         with context.begin_transaction():
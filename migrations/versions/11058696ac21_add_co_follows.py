@@ -0,0 +1,41 @@
+"""add co follows
+
+Revision ID: 11058696ac21
+Revises: 53cf10624c31
+Create Date: 2026-10-19 07:02:18.530144
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "11058696ac21"
+down_revision: Union[str, None] = "53cf10624c31"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "co_follows",
+        sa.Column("artist_id", sa.Uuid(), nullable=False),
+        sa.Column("other_id", sa.Uuid(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("artist_id", "other_id"),
+    )
+    op.execute(
+        """
+        INSERT INTO co_follows (artist_id, other_id, count)
+        SELECT mine.artist_id, theirs.artist_id, count(*)
+        FROM follows AS mine
+        JOIN follows AS theirs ON theirs.follower_id = mine.follower_id
+        GROUP BY mine.artist_id, theirs.artist_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("co_follows")
@@ -0,0 +1,45 @@
+"""add feed tables
+
+Revision ID: 4c406765b79f
+Revises: 56dbf62edb0f
+Create Date: 2026-10-19 10:12:41.503217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4c406765b79f"
+down_revision: Union[str, None] = "56dbf62edb0f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "feed_entries",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("released_at", sa.DateTime(), nullable=False),
+        sa.Column("album_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["album_id"], ["albums.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "released_at", "album_id"),
+    )
+    op.create_index(
+        op.f("ix_feed_entries_album_id"), "feed_entries", ["album_id"], unique=False
+    )
+    op.create_table(
+        "feed_pull_artists",
+        sa.Column("artist_id", sa.Uuid(), nullable=False),
+        sa.ForeignKeyConstraint(["artist_id"], ["artists.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("artist_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("feed_pull_artists")
+    op.drop_index(op.f("ix_feed_entries_album_id"), table_name="feed_entries")
+    op.drop_table("feed_entries")
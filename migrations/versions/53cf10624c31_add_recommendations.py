@@ -0,0 +1,34 @@
+"""add recommendations
+
+Revision ID: 53cf10624c31
+Revises: 6ca1f18f3b2e
+Create Date: 2026-10-19 06:10:45.414699
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "53cf10624c31"
+down_revision: Union[str, None] = "6ca1f18f3b2e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "recommendation_neighbors",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("neighbor_id", sa.Uuid(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "subject_id", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("recommendation_neighbors")
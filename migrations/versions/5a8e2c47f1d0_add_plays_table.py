@@ -0,0 +1,47 @@
+"""add plays table
+
+Revision ID: 5a8e2c47f1d0
+Revises: d71c0e5a8b93
+Create Date: 2026-10-19 18:22:53.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5a8e2c47f1d0"
+down_revision: Union[str, None] = "d71c0e5a8b93"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "plays",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("album_id", sa.Uuid(), nullable=False),
+        sa.Column("track_id", sa.Uuid(), nullable=True),
+        sa.Column("played_at", sa.DateTime(), nullable=False),
+        sa.Column("written_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["album_id"], ["albums.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_plays_album_id"), "plays", ["album_id"], unique=False)
+    op.create_index(
+        "ix_plays_user_id_played_at", "plays", ["user_id", "played_at"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_plays_user_id_played_at", table_name="plays")
+    op.drop_index(op.f("ix_plays_album_id"), table_name="plays")
+    op.drop_table("plays")
@@ -0,0 +1,45 @@
+"""add charts
+
+Revision ID: 6ca1f18f3b2e
+Revises: 729dcc337137
+Create Date: 2026-10-19 05:12:31.220418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6ca1f18f3b2e"
+down_revision: Union[str, None] = "729dcc337137"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "chart_activity",
+        sa.Column("starts_at", sa.BigInteger(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("follows", sa.Integer(), nullable=False),
+        sa.Column("plays", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("starts_at", "kind", "subject_id"),
+    )
+    op.create_table(
+        "chart_entries",
+        sa.Column("window", sa.String(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("score", sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint("window", "kind", "rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("chart_entries")
+    op.drop_table("chart_activity")
@@ -0,0 +1,53 @@
+"""add play counts
+
+Revision ID: 729dcc337137
+Revises: 5a8e2c47f1d0
+Create Date: 2026-10-19 03:45:55.901591
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "729dcc337137"
+down_revision: Union[str, None] = "5a8e2c47f1d0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "play_counts",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("granularity", sa.String(), nullable=False),
+        sa.Column("starts_at", sa.DateTime(), nullable=False),
+        sa.Column("play_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "subject_id", "granularity", "starts_at"),
+    )
+    op.create_table(
+        "play_totals",
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("subject_id", sa.Uuid(), nullable=False),
+        sa.Column("play_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("kind", "subject_id"),
+    )
+    op.create_table(
+        "play_watermarks",
+        sa.Column("consumer", sa.String(), nullable=False),
+        sa.Column(
+            "play_id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("consumer"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("play_watermarks")
+    op.drop_table("play_totals")
+    op.drop_table("play_counts")
@@ -0,0 +1,55 @@
+"""add playlists
+
+Revision ID: 88ebbb3c0af9
+Revises: c8a4dca9b69b
+Create Date: 2026-10-19 04:37:53.422019
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "88ebbb3c0af9"
+down_revision: Union[str, None] = "c8a4dca9b69b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "playlists",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("owner_id", sa.Uuid(), nullable=False),
+        sa.Column("track_count", sa.Integer(), nullable=False),
+        sa.Column("needs_rebalance", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["owner_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_playlists_owner_id"), "playlists", ["owner_id"], unique=False
+    )
+    op.create_table(
+        "playlist_items",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("playlist_id", sa.Uuid(), nullable=False),
+        sa.Column("rank", sa.String(), nullable=False),
+        sa.Column("track_id", sa.Uuid(), nullable=False),
+        sa.Column("added_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["playlist_id"], ["playlists.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("playlist_id", "rank", name="uq_playlist_item_rank"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("playlist_items")
+    op.drop_index(op.f("ix_playlists_owner_id"), table_name="playlists")
+    op.drop_table("playlists")
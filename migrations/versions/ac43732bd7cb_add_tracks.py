@@ -0,0 +1,38 @@
+"""add tracks
+
+Revision ID: ac43732bd7cb
+Revises: 88ebbb3c0af9
+Create Date: 2026-10-19 04:47:01.754028
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "ac43732bd7cb"
+down_revision: Union[str, None] = "88ebbb3c0af9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "tracks",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("album_id", sa.Uuid(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("number", sa.Integer(), nullable=False),
+        sa.Column("file_id", sa.Uuid(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(["album_id"], ["albums.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("album_id", "number", name="uq_track_album_id_number"),
+        sa.UniqueConstraint("file_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("tracks")
@@ -0,0 +1,56 @@
+"""add listening history
+
+Revision ID: c8a4dca9b69b
+Revises: 11058696ac21
+Create Date: 2026-10-19 08:14:37.902461
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from sonority.plays import history
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c8a4dca9b69b"
+down_revision: Union[str, None] = "11058696ac21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "listening_history",
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("played_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "play_id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            nullable=False,
+        ),
+        sa.Column("album_id", sa.Uuid(), nullable=False),
+        sa.Column("track_id", sa.Uuid(), nullable=True),
+        sa.PrimaryKeyConstraint("user_id", "played_at", "play_id"),
+        postgresql_partition_by="RANGE (played_at)",
+    )
+
+    now = datetime.utcnow()
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        # later partitions are created by the plays.maintain_history job
+        history.create_partitions(bind, now)
+    op.execute(
+        sa.text(
+            "INSERT INTO listening_history "
+            "(user_id, played_at, play_id, album_id, track_id) "
+            "SELECT user_id, played_at, id, album_id, track_id FROM plays "
+            "WHERE played_at >= :cutoff"
+        ).bindparams(cutoff=history.cutoff(now))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("listening_history")
@@ -0,0 +1,108 @@
+"""add search index
+
+Revision ID: d71c0e5a8b93
+Revises: 9e3b1f7a2c64
+Create Date: 2026-10-19 16:41:07.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d71c0e5a8b93"
+down_revision: Union[str, None] = "9e3b1f7a2c64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ARTIST_DOCUMENT = (
+    "to_tsvector('simple', artists.name || ' ' || coalesce(artists.description, ''))"
+)
+ALBUM_DOCUMENT = "to_tsvector('simple', albums.name)"
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute(
+            f"CREATE INDEX ix_artists_search ON artists USING gin ({ARTIST_DOCUMENT})"
+        )
+        op.execute(
+            "CREATE INDEX ix_artists_name_trgm ON artists USING gin (name gin_trgm_ops)"
+        )
+        op.execute(
+            "CREATE INDEX ix_albums_search ON albums"
+            f" USING gin ({ALBUM_DOCUMENT}) WHERE released"
+        )
+        op.execute(
+            "CREATE INDEX ix_albums_name_trgm ON albums"
+            " USING gin (name gin_trgm_ops) WHERE released"
+        )
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE artists_fts USING fts5("
+        "artist_id UNINDEXED, name, description,"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER artists_fts_insert AFTER INSERT ON artists BEGIN"
+        " INSERT INTO artists_fts (artist_id, name, description)"
+        " VALUES (new.id, new.name, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER artists_fts_update AFTER UPDATE OF name, description"
+        " ON artists BEGIN"
+        " DELETE FROM artists_fts WHERE artist_id = old.id;"
+        " INSERT INTO artists_fts (artist_id, name, description)"
+        " VALUES (new.id, new.name, new.description); END"
+    )
+    op.execute(
+        "CREATE TRIGGER artists_fts_delete AFTER DELETE ON artists BEGIN"
+        " DELETE FROM artists_fts WHERE artist_id = old.id; END"
+    )
+    op.execute(
+        "CREATE VIRTUAL TABLE albums_fts USING fts5("
+        "album_id UNINDEXED, name,"
+        " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    op.execute(
+        "CREATE TRIGGER albums_fts_insert AFTER INSERT ON albums"
+        " WHEN new.released BEGIN"
+        " INSERT INTO albums_fts (album_id, name) VALUES (new.id, new.name); END"
+    )
+    op.execute(
+        "CREATE TRIGGER albums_fts_update AFTER UPDATE OF name, released"
+        " ON albums BEGIN"
+        " DELETE FROM albums_fts WHERE album_id = old.id;"
+        " INSERT INTO albums_fts (album_id, name)"
+        " SELECT new.id, new.name WHERE new.released; END"
+    )
+    op.execute(
+        "CREATE TRIGGER albums_fts_delete AFTER DELETE ON albums BEGIN"
+        " DELETE FROM albums_fts WHERE album_id = old.id; END"
+    )
+    op.execute(
+        "INSERT INTO artists_fts (artist_id, name, description)"
+        " SELECT id, name, description FROM artists"
+    )
+    op.execute(
+        "INSERT INTO albums_fts (album_id, name)"
+        " SELECT id, name FROM albums WHERE released"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("DROP INDEX ix_albums_name_trgm")
+        op.execute("DROP INDEX ix_albums_search")
+        op.execute("DROP INDEX ix_artists_name_trgm")
+        op.execute("DROP INDEX ix_artists_search")
+        return
+
+    for trigger in ("insert", "update", "delete"):
+        op.execute(f"DROP TRIGGER albums_fts_{trigger}")
+        op.execute(f"DROP TRIGGER artists_fts_{trigger}")
+    op.execute("DROP TABLE albums_fts")
+    op.execute("DROP TABLE artists_fts")
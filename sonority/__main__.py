@@ -0,0 +1,4 @@
+from sonority.launcher import main
+
+
+main()
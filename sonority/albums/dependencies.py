@@ -5,7 +5,11 @@ from fastapi import Depends
 
 from sonority.albums.exceptions import AlbumDoesNotExist
 from sonority.albums.models import Album
-from sonority.albums.service import check_album_owner, get_album_by_id
+from sonority.albums.service import (
+    check_album_owner,
+    get_album_by_id,
+    read_album_by_id,
+)
 from sonority.artists.dependencies import CurrentArtist
 from sonority.dependencies import Session
 
@@ -32,13 +36,12 @@ def owned_album_by_id(
     return album
 
 
-def released_album_by_id(
-    album: Annotated[Album, Depends(album_by_id)],
-):
+def released_album_by_id(db: Session, album_id: UUID):
     """
-    Get a released album by ID
+    Get a released album by ID, to read only
     """
-    if not album.released:
+    album = read_album_by_id(db, album_id)
+    if not album or not album.released:
         raise AlbumDoesNotExist("Album does not exist")
 
     return album
@@ -1,4 +1,5 @@
 from datetime import date, datetime
+from typing import ClassVar
 from uuid import UUID, uuid4
 
 from sqlalchemy import ForeignKey, UniqueConstraint
@@ -33,6 +34,12 @@ class Album(Base):
         nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
     )
 
+    # only set when requested, see service.annotate_likes
+    is_liked: ClassVar[bool]
+    like_count: ClassVar[int]
+    # set on released albums, see service.annotate_play_counts
+    play_count: ClassVar[int]
+
 
 class Likes(Base):
     """
@@ -1,21 +1,40 @@
-from fastapi import APIRouter, status
-from fastapi.responses import RedirectResponse
+from typing import Annotated
+from uuid import UUID
 
-from sonority.albums.dependencies import AlbumById, OwnedAlbumById
+from fastapi import APIRouter, Query, Request, status
+from fastapi.responses import JSONResponse, RedirectResponse
+
+from sonority.albums.dependencies import OwnedAlbumById, released_album_by_id
 from sonority.albums import service
 from sonority.albums.schemas import (
+    AlbumBatchSchema,
     AlbumCreateSchema,
     AlbumOutSchema,
     AlbumUpdateSchema,
+    AlbumWithLikesSchema,
     UnreleasedAlbumSchema,
 )
-from sonority.artists.dependencies import ArtistById, CurrentArtist
+from sonority.artists.dependencies import artist_by_id, CurrentArtist
 from sonority.auth.dependencies import CurrentUser
+from sonority.cache import (
+    album_key,
+    artist_albums_key,
+    CachedResponse,
+    response_cache,
+)
 from sonority.dependencies import Session, Skip, Take, SKIP_DEFAULT, TAKE_DEFAULT
+from sonority.etags import etag_matches, make_etag, not_modified, set_cache_headers
 
 
 router = APIRouter(prefix="/albums", tags=["albums"])
 
+# released albums only change when deleted, so clients may reuse them briefly
+RELEASED_ALBUM_CACHE_CONTROL = "private, max-age=60"
+# new releases must show up at once, so clients always revalidate
+ALBUM_LIST_CACHE_CONTROL = "private, no-cache"
+# the most albums that can be fetched at once by ID
+MAX_ALBUM_IDS = 100
+
 
 @router.post(
     "/new", response_model=UnreleasedAlbumSchema, status_code=status.HTTP_201_CREATED
@@ -81,36 +100,135 @@ def get_unreleased_album(album: OwnedAlbumById):
     return album
 
 
-@router.get("/mine", response_model=list[AlbumOutSchema])
+@router.get("/", response_model=AlbumBatchSchema)
+def get_albums(
+    db: Session,
+    _: CurrentUser,
+    ids: Annotated[list[UUID], Query(max_length=MAX_ALBUM_IDS)] = [],
+):
+    """
+    Get released albums by ID
+
+    The albums are returned in the order requested, and the IDs with no
+    released album are listed as missing
+    """
+    albums = service.get_albums_by_ids(db, ids)
+    found = {album.id for album in albums}
+    missing = [album_id for album_id in dict.fromkeys(ids) if album_id not in found]
+    return {"albums": albums, "missing": missing}
+
+
+@router.get(
+    "/mine",
+    response_model=list[AlbumWithLikesSchema],
+    response_model_exclude_none=True,
+)
 def get_released_albums(
     db: Session,
     artist: CurrentArtist,
     skip: Skip = SKIP_DEFAULT,
     take: Take = TAKE_DEFAULT,
+    with_likes: bool = False,
 ):
     """
     Get all released albums owned by the current artist
+
+    With with_likes, include whether the artist likes each album and its
+    like count
     """
-    return service.get_released_albums(db, artist, skip=skip, take=take)
+    albums = service.get_released_albums(db, artist, skip=skip, take=take)
+    if with_likes:
+        service.annotate_likes(db, albums, artist.id)
+
+    return albums
+
+
+def _cached_response(request: Request, cached: CachedResponse, cache_control: str):
+    """
+    Respond with a cached body, or with 304 if the client already holds it
+    """
+    if etag_matches(request, cached.etag):
+        return not_modified(cached.etag, cache_control)
+
+    response = JSONResponse(cached.body)
+    set_cache_headers(response, cached.etag, cache_control)
+    return response
+
+
+def _with_likes(db: Session, cached: CachedResponse, user_id: UUID):
+    """
+    Overlay the like state of a user on a cached list of albums
+    """
+    album_ids = [UUID(album["id"]) for album in cached.body]
+    states = service.get_like_states(db, album_ids, user_id)
+    body = [
+        {**album, **states[album_id]} for album, album_id in zip(cached.body, album_ids)
+    ]
+    likes = [(album["is_liked"], album["like_count"]) for album in body]
+    return CachedResponse(etag=make_etag(cached.etag, *likes), body=body)
 
 
 @router.get("/{album_id}", response_model=AlbumOutSchema)
-def get_album(album: AlbumById, _: CurrentUser):
+def get_album(db: Session, album_id: UUID, _: CurrentUser, request: Request):
     """
     Get a released album by ID
+
+    Released albums are immutable, so the serialized album is cached; its
+    play count may lag by up to RESPONSE_CACHE_TTL
     """
-    return album
 
+    def compute():
+        album = released_album_by_id(db, album_id)
+        service.annotate_play_counts(db, [album])
+        return CachedResponse(
+            etag=make_etag(
+                album.id, album.updated_at, album.release_date, album.play_count
+            ),
+            body=AlbumOutSchema.model_validate(album).model_dump(mode="json"),
+        )
+
+    cached = response_cache.get_or_compute(album_key(album_id), compute)
+    return _cached_response(request, cached, RELEASED_ALBUM_CACHE_CONTROL)
 
-@router.get("/by/{artist_id}", response_model=list[AlbumOutSchema])
+
+@router.get(
+    "/by/{artist_id}",
+    response_model=list[AlbumWithLikesSchema],
+    response_model_exclude_none=True,
+)
 def get_albums_by_artist(
     db: Session,
-    _: CurrentUser,
-    artist: ArtistById,
+    user: CurrentUser,
+    artist_id: UUID,
+    request: Request,
     skip: Skip = SKIP_DEFAULT,
     take: Take = TAKE_DEFAULT,
+    with_likes: bool = False,
 ):
     """
     Get all albums released by an artist
-    """
-    return service.get_released_albums(db, artist, skip=skip, take=take)
+
+    The serialized page is cached until the artist releases or deletes an album,
+    or for up to RESPONSE_CACHE_TTL, as play counts change.
+    With with_likes, the current user's like state is overlaid on it.
+    """
+
+    def compute():
+        artist = artist_by_id(db, artist_id)
+        albums = service.get_released_albums(db, artist, skip=skip, take=take)
+        versions = [(album.id, album.play_count) for album in albums]
+        return CachedResponse(
+            etag=make_etag(artist.id, skip, take, *versions),
+            body=[
+                AlbumOutSchema.model_validate(album).model_dump(mode="json")
+                for album in albums
+            ],
+        )
+
+    cached = response_cache.get_or_compute(
+        artist_albums_key(artist_id, skip, take), compute
+    )
+    if with_likes:
+        cached = _with_likes(db, cached, user.id)
+
+    return _cached_response(request, cached, ALBUM_LIST_CACHE_CONTROL)
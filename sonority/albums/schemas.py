@@ -43,6 +43,25 @@ class AlbumOutSchema(UnreleasedAlbumSchema):
     """
 
     release_date: date
+    play_count: int
+
+
+class AlbumWithLikesSchema(AlbumOutSchema):
+    """
+    Schema for an album in a list, with like state when requested
+    """
+
+    is_liked: bool | None = None
+    like_count: int | None = None
+
+
+class AlbumBatchSchema(BaseModel):
+    """
+    Schema for a batch of albums fetched by ID
+    """
+
+    albums: list[AlbumOutSchema]
+    missing: list[UUID]
 
 
 class AlbumSchema(AlbumOutSchema):
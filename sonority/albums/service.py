@@ -1,9 +1,10 @@
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
 
-from sqlalchemy import select
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
+from sonority import autocomplete
 from sonority.albums.exceptions import (
     AlbumAlreadyReleased,
     AlbumNameInUse,
@@ -13,6 +14,11 @@ from sonority.albums.exceptions import (
 from sonority.albums.models import Album, Likes
 from sonority.albums.schemas import AlbumCreateSchema, AlbumUpdateSchema
 from sonority.artists.models import Artist
+from sonority.cache import invalidate_album
+from sonority.charts import service as charts_service
+from sonority.jobs import enqueue
+from sonority.plays import service as plays_service
+from sonority.singleflight import coalesce, get_flight
 
 
 def _commit_and_refresh(db: Session, album: Album):
@@ -31,6 +37,38 @@ def get_album_by_id(db: Session, album_id: UUID):
     return db.execute(select(Album).where(Album.id == album_id)).scalar_one_or_none()
 
 
+def read_album_by_id(db: Session, album_id: UUID):
+    """
+    Get an album by ID, to read only
+
+    Concurrent identical calls share a single query, so the album may have
+    been read in another request's transaction. Use get_album_by_id to check
+    an album before changing it
+    """
+    return coalesce(
+        get_flight("read_album_by_id"),
+        album_id,
+        db,
+        lambda: db.execute(
+            select(Album).where(Album.id == album_id)
+        ).scalar_one_or_none(),
+    )
+
+
+def get_albums_by_ids(db: Session, album_ids: list[UUID]):
+    """
+    Get the released albums among album_ids with their play counts
+
+    The albums are returned in the order of album_ids, leaving out ids with
+    no released album
+    """
+    albums = db.execute(
+        select(Album).where(Album.id.in_(album_ids), Album.released == True)  # noqa
+    ).scalars()
+    by_id = {album.id: album for album in annotate_play_counts(db, list(albums))}
+    return [by_id[id] for id in dict.fromkeys(album_ids) if id in by_id]
+
+
 def get_album_by_name(db: Session, name: str):
     """
     Get an album by name
@@ -100,22 +138,41 @@ def update_album(db: Session, album: Album, album_schema: AlbumUpdateSchema):
 
 def delete_album(db: Session, album: Album):
     """
-    Delete an album
+    Delete an album, its tracks and their files
     """
+    from sonority.tracks import service as tracks_service
+
+    album_id, artist_id = album.id, album.artist_id
+    file_ids = tracks_service.delete_tracks(db, album)
     db.delete(album)
     db.commit()
+    invalidate_album(album_id, artist_id)
+    autocomplete.unindex(album_id)
+    tracks_service.delete_files(file_ids)
 
 
 def release_album(db: Session, album: Album):
     """
     Release an album
+
+    Writing the release to the followers' feeds is left to a job, enqueued
+    in the same transaction
     """
     if album.released:
         raise AlbumAlreadyReleased("Album is already released")
 
     album.released = True
     album.release_date = date.today()
-    return _commit_and_refresh(db, album)
+    enqueue(
+        db,
+        "feed.fan_out_release",
+        {"album_id": str(album.id)},
+        idempotency_key=f"feed.fan_out_release:{album.id}",
+    )
+    _commit_and_refresh(db, album)
+    invalidate_album(album.id, album.artist_id)
+    autocomplete.index_album(album.id, album.name)
+    return annotate_play_counts(db, [album])[0]
 
 
 def get_all_albums(db: Session, artist: Artist, *, skip: int, take: int):
@@ -137,21 +194,36 @@ def get_all_albums(db: Session, artist: Artist, *, skip: int, take: int):
 
 def get_released_albums(db: Session, artist: Artist, *, skip: int, take: int):
     """
-    Get released albums for an artist
-    """
-    return (
-        db.execute(
-            select(Album)
-            .where(Album.artist_id == artist.id, Album.released == True)  # noqa
-            .order_by(Album.release_date.desc())
-            .offset(skip)
-            .limit(take)
-        )
-        .scalars()
-        .all()
+    Get released albums for an artist, with their play counts
+
+    Concurrent identical calls share the same queries
+    """
+    return coalesce(
+        get_flight("get_released_albums"),
+        (artist.id, skip, take),
+        db,
+        lambda: annotate_play_counts(
+            db,
+            db.execute(
+                select(Album)
+                .where(Album.artist_id == artist.id, Album.released == True)  # noqa
+                .order_by(Album.release_date.desc())
+                .offset(skip)
+                .limit(take)
+            )
+            .scalars()
+            .all(),
+        ),
     )
 
 
+def annotate_play_counts(db: Session, albums: list[Album]):
+    """
+    Set play_count on each album, in one query
+    """
+    return plays_service.annotate_play_counts(db, "album", albums)
+
+
 def get_unreleased_albums(db: Session, artist: Artist, *, skip: int, take: int):
     """
     Get unreleased albums for an artist
@@ -192,9 +264,11 @@ def like_album(db: Session, album: Album, user_id: UUID):
     if likes(db, album, user_id):
         return False
 
-    like = Likes(album_id=album.id, user_id=user_id)
+    like = Likes(album_id=album.id, user_id=user_id, created_at=datetime.utcnow())
     db.add(like)
+    charts_service.record_like(db, album, like.created_at, 1)
     db.commit()
+    autocomplete.add_popularity(album.id, 1)
     return True
 
 
@@ -207,10 +281,49 @@ def unlike_album(db: Session, album: Album, user_id: UUID):
         return False
 
     db.delete(like)
+    charts_service.record_like(db, album, like.created_at, -1)
     db.commit()
+    autocomplete.add_popularity(album.id, -1)
     return True
 
 
+def get_like_states(db: Session, album_ids: list[UUID], user_id: UUID):
+    """
+    Get the like count of albums and whether a user likes them, in one query
+
+    Returns a dict of album ID to {"is_liked": bool, "like_count": int}
+    """
+    states = {album_id: {"is_liked": False, "like_count": 0} for album_id in album_ids}
+    if not album_ids:
+        return states
+
+    rows = db.execute(
+        select(
+            Likes.album_id,
+            func.count(Likes.user_id),
+            func.max(case((Likes.user_id == user_id, 1), else_=0)),
+        )
+        .where(Likes.album_id.in_(album_ids))
+        .group_by(Likes.album_id)
+    ).all()
+    for album_id, like_count, is_liked in rows:
+        states[album_id] = {"is_liked": bool(is_liked), "like_count": like_count}
+
+    return states
+
+
+def annotate_likes(db: Session, albums: list[Album], user_id: UUID):
+    """
+    Set is_liked and like_count on each album, in one query
+    """
+    states = get_like_states(db, [album.id for album in albums], user_id)
+    for album in albums:
+        album.is_liked = states[album.id]["is_liked"]
+        album.like_count = states[album.id]["like_count"]
+
+    return albums
+
+
 def get_liked_albums(db: Session, user_id: UUID, *, skip: int, take: int):
     """
     Get a list of albums that a user likes
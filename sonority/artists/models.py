@@ -21,6 +21,7 @@ class Artist(Base):
     is_verified: Mapped[bool] = mapped_column(default=False)
 
     follower_count: ClassVar[int]
+    play_count: ClassVar[int]
 
 
 class Follow(Base):
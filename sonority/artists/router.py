@@ -1,10 +1,12 @@
-from typing import Literal
+from typing import Annotated, Literal
+from uuid import UUID
 
-from fastapi import APIRouter, status
+from fastapi import APIRouter, Query, Request, Response, status
 
 from sonority.artists.dependencies import ArtistById, ArtistByIdOrName, CurrentArtist
 from sonority.artists import service
 from sonority.artists.schemas import (
+    ArtistBatchSchema,
     ArtistCreateSchema,
     ArtistOutSchema,
     ArtistUpdateSchema,
@@ -12,10 +14,17 @@ from sonority.artists.schemas import (
 )
 from sonority.auth.dependencies import CurrentUser
 from sonority.dependencies import Session, Skip, Take, SKIP_DEFAULT, TAKE_DEFAULT
+from sonority.etags import etag_matches, make_etag, not_modified, set_cache_headers
+from sonority.feed import service as feed_service
 
 
 router = APIRouter(prefix="/artists", tags=["artists"])
 
+# follower counts change often, so clients always revalidate
+ARTIST_CACHE_CONTROL = "private, no-cache"
+# the most artists that can be fetched at once by ID
+MAX_ARTIST_IDS = 100
+
 
 @router.post(
     "/new", response_model=ArtistOutSchema, status_code=status.HTTP_201_CREATED
@@ -66,11 +75,57 @@ def verify_artist(db: Session, artist: CurrentArtist):
 
 
 @router.get("/", response_model=GetArtistSchema)
-def get_artist_by_id_or_name(db: Session, artist: ArtistByIdOrName, user: CurrentUser):
+def get_artist_by_id_or_name(
+    db: Session,
+    artist: ArtistByIdOrName,
+    user: CurrentUser,
+    request: Request,
+    response: Response,
+):
     """
     Get an artist by ID or name
+
+    If the client already holds the current version, respond with 304
+    """
+    is_following = service.follows(db, user, artist)
+    etag = make_etag(
+        artist.id,
+        artist.name,
+        artist.description,
+        artist.is_verified,
+        artist.follower_count,
+        artist.play_count,
+        is_following,
+    )
+    if etag_matches(request, etag):
+        return not_modified(etag, ARTIST_CACHE_CONTROL)
+
+    set_cache_headers(response, etag, ARTIST_CACHE_CONTROL)
+    return {"artist": artist, "is_following": is_following}
+
+
+@router.get("/batch", response_model=ArtistBatchSchema)
+def get_artists_by_ids(
+    db: Session,
+    user: CurrentUser,
+    ids: Annotated[list[UUID], Query(max_length=MAX_ARTIST_IDS)] = [],
+):
     """
-    return {"artist": artist, "is_following": service.follows(db, user, artist)}
+    Get artists by ID, with whether the current user follows each
+
+    The artists are returned in the order requested, and the IDs with no
+    artist are listed as missing
+    """
+    rows = service.get_artists_by_ids(db, ids, user)
+    found = {artist.id for artist, _ in rows}
+    missing = [artist_id for artist_id in dict.fromkeys(ids) if artist_id not in found]
+    return {
+        "artists": [
+            {"artist": artist, "is_following": is_following}
+            for artist, is_following in rows
+        ],
+        "missing": missing,
+    }
 
 
 @router.post("/{artist_id}/follow")
@@ -93,8 +148,14 @@ def unfollow_artist(
 ) -> dict[Literal["unfollowed"], bool]:
     """
     Unfollow an artist
+
+    The artist's releases are removed from the current user's feed
     """
-    return {"unfollowed": service.unfollow_artist(db, artist, user)}
+    unfollowed = service.unfollow_artist(db, artist, user)
+    if unfollowed:
+        feed_service.remove_artist_from_feed(db, user, artist.id)
+
+    return {"unfollowed": unfollowed}
 
 
 @router.get("/me/follows", response_model=list[ArtistOutSchema])
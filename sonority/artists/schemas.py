@@ -30,6 +30,7 @@ class ArtistOutSchema(ArtistCreateSchema):
 
     id: UUID
     follower_count: int
+    play_count: int
     is_verified: bool
 
     model_config = ConfigDict(from_attributes=True, **ArtistCreateSchema.model_config)
@@ -49,4 +50,13 @@ class GetArtistSchema(BaseModel):
     """
 
     artist: ArtistOutSchema
-    is_following: bool
\ No newline at end of file
+    is_following: bool
+
+
+class ArtistBatchSchema(BaseModel):
+    """
+    Schema for a batch of artists fetched by ID
+    """
+
+    artists: list[GetArtistSchema]
+    missing: list[UUID]
@@ -1,8 +1,10 @@
+from datetime import datetime
 from uuid import UUID
 
-from sqlalchemy import func, select
+from sqlalchemy import case, func, select
 from sqlalchemy.orm import Session
 
+from sonority import autocomplete
 from sonority.artists.exceptions import (
     ArtistExists,
     ArtistNameInUse,
@@ -12,6 +14,35 @@ from sonority.artists.exceptions import (
 from sonority.artists.models import Artist, Follow
 from sonority.artists.schemas import ArtistCreateSchema, ArtistUpdateSchema
 from sonority.auth.models import User
+from sonority.cache import invalidate_artist_albums
+from sonority.singleflight import coalesce, get_flight
+
+
+# the plays, charts and recommendations packages depend on the albums package,
+# which depends on this one, so they are imported when first used
+
+
+def _annotate_play_counts(db: Session, artists: list[Artist]):
+    """
+    Set play_count on each artist, in one query
+    """
+    from sonority.plays import service as plays_service
+
+    return plays_service.annotate_play_counts(db, "artist", artists)
+
+
+def _record_follow(db: Session, follow: Follow, delta: int):
+    """
+    Count a follow, or with a delta of -1 take it back, towards the charts
+    and the similar artists
+    """
+    from sonority.charts import service as charts_service
+    from sonority.recommendations import service as recommendations_service
+
+    charts_service.record_follow(db, follow.artist_id, follow.created_at, delta)
+    recommendations_service.record_follow(
+        db, follow.artist_id, follow.follower_id, delta
+    )
 
 
 def _get_artist(db: Session, column, value):
@@ -30,6 +61,7 @@ def _get_artist(db: Session, column, value):
     artist, follower_count = row._tuple()
     if artist:
         artist.follower_count = follower_count
+        _annotate_play_counts(db, [artist])
 
     return artist
 
@@ -50,6 +82,7 @@ def _commit_and_refresh(db: Session, artist: Artist):
     db.commit()
     db.refresh(artist)
     _update_follower_count(db, artist)
+    _annotate_play_counts(db, [artist])
     return artist
 
 
@@ -81,8 +114,44 @@ def get_artist_by_id(db: Session, artist_id: UUID):
 def get_artist_by_name(db: Session, name: str):
     """
     Get an Artist from the database
+
+    Concurrent identical calls share a single query
     """
-    return _get_artist(db, Artist.name, name)
+    return coalesce(
+        get_flight("get_artist_by_name"),
+        name,
+        db,
+        lambda: _get_artist(db, Artist.name, name),
+    )
+
+
+def get_artists_by_ids(db: Session, artist_ids: list[UUID], user: User):
+    """
+    Get the artists among artist_ids with whether user follows each
+
+    Returns (artist, is_following) pairs in the order of artist_ids, leaving
+    out ids with no artist
+    """
+    rows = db.execute(
+        select(
+            Artist,
+            func.count(Follow.follower_id),
+            func.max(case((Follow.follower_id == user.id, 1), else_=0)),
+        )
+        .join(Follow, isouter=True)
+        .where(Artist.id.in_(artist_ids))
+        .group_by(Artist.id)
+    ).all()
+
+    by_id = {}
+    for row in rows:
+        artist, follower_count, is_following = row._tuple()
+        artist.follower_count = follower_count
+        by_id[artist.id] = (artist, bool(is_following))
+
+    artists = [artist for artist, _ in by_id.values()]
+    _annotate_play_counts(db, artists)
+    return [by_id[id] for id in dict.fromkeys(artist_ids) if id in by_id]
 
 
 def create_artist(db: Session, schema: ArtistCreateSchema, user: User):
@@ -97,7 +166,9 @@ def create_artist(db: Session, schema: ArtistCreateSchema, user: User):
 
     artist = Artist(**schema.model_dump(), id=user.id)
     db.add(artist)
-    return _commit_and_refresh(db, artist)
+    _commit_and_refresh(db, artist)
+    autocomplete.index_artist(artist.id, artist.name)
+    return artist
 
 
 def update_artist(db: Session, artist: Artist, schema: ArtistUpdateSchema):
@@ -119,15 +190,21 @@ def update_artist(db: Session, artist: Artist, schema: ArtistUpdateSchema):
     if schema.description:
         artist.description = schema.description
 
-    return _commit_and_refresh(db, artist)
+    _commit_and_refresh(db, artist)
+    invalidate_artist_albums(artist.id)
+    autocomplete.index_artist(artist.id, artist.name, artist.follower_count)
+    return artist
 
 
 def delete_artist(db: Session, artist: Artist):
     """
     Delete an Artist from the database
     """
+    artist_id = artist.id
     db.delete(artist)
     db.commit()
+    invalidate_artist_albums(artist_id)
+    autocomplete.unindex(artist_id)
 
 
 def verify_artist(db: Session, artist: Artist):
@@ -138,7 +215,9 @@ def verify_artist(db: Session, artist: Artist):
         raise VerifiedArtistIsImmutable("Artist is already verified")
 
     artist.is_verified = True
-    return _commit_and_refresh(db, artist)
+    _commit_and_refresh(db, artist)
+    invalidate_artist_albums(artist.id)
+    return artist
 
 
 def _get_follow(db: Session, artist_id: UUID, follower_id: UUID):
@@ -173,9 +252,13 @@ def follow_artist(db: Session, artist: Artist, user: User):
     if follows(db, user, artist):
         return False
 
-    follow = Follow(artist_id=artist.id, follower_id=user.id)
+    follow = Follow(
+        artist_id=artist.id, follower_id=user.id, created_at=datetime.utcnow()
+    )
     db.add(follow)
+    _record_follow(db, follow, 1)
     db.commit()
+    autocomplete.add_popularity(artist.id, 1)
     return True
 
 
@@ -190,7 +273,9 @@ def unfollow_artist(db: Session, artist: Artist, user: User):
         return False
 
     db.delete(follow)
+    _record_follow(db, follow, -1)
     db.commit()
+    autocomplete.add_popularity(artist.id, -1)
     return True
 
 
@@ -214,4 +299,4 @@ def get_follows(db: Session, user: User, *, skip: int, take: int):
         artist.follower_count = follower_count
         artists.append(artist)
 
-    return artists
+    return _annotate_play_counts(db, artists)
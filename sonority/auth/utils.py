@@ -1,8 +1,7 @@
 from datetime import datetime, timedelta
+from functools import cache
 from uuid import UUID
 
-from jose import jwt, JWTError
-from passlib.context import CryptContext
 from pydantic import BaseModel
 
 from sonority import settings
@@ -16,12 +15,21 @@ class TokenData(BaseModel):
     user_id: UUID
 
 
+@cache
+def _crypt_context():
+    """
+    Return the password hashing context, importing passlib on first use
+    """
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
 def hash_password(password: str):
     """
     Return the hash of password
     """
-    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    return context.hash(password)
+    return _crypt_context().hash(password)
 
 
 def verify_password(hash: str, password: str):
@@ -30,14 +38,15 @@ def verify_password(hash: str, password: str):
 
     Return True if the passwords match
     """
-    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    return context.verify(password, hash)
+    return _crypt_context().verify(password, hash)
 
 
 def decode_token(token: str):
     """
     Decode and validate the contents of token and return the TokenData or None
     """
+    from jose import jwt, JWTError
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.HASH_ALGORITHM]
@@ -56,6 +65,8 @@ def make_token(token_data: TokenData):
     """
     Make and return a new access token for user with id
     """
+    from jose import jwt
+
     to_encode = {
         "sub": str(token_data.user_id),
         "exp": datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_IN),
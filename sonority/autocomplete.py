@@ -0,0 +1,225 @@
+"""
+This file implements an in-process prefix index for autocompleting names.
+
+Names are normalized (case, accents and punctuation folded) and indexed from
+the start of each of their words, in a sorted array searched by bisection.
+The best completions of short prefixes, which match the most names, are
+cached until a name under them changes.
+
+The index is built from the database on first use (see
+sonority.search.service.autocomplete) and kept fresh by the services, which
+call the helpers at the bottom of this file after committing. Changes made by
+other processes are picked up when the index is rebuilt, every
+AUTOCOMPLETE_MAX_AGE seconds.
+"""
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Iterable, NamedTuple
+from uuid import UUID
+
+from sonority import settings
+
+NON_WORD = re.compile(r"[\W_]+")
+# names are indexed from the start of at most this many of their words
+MAX_WORDS = 4
+# the best completions of prefixes up to this long are cached
+CACHED_PREFIX_LENGTH = 3
+# the most completions returned at once
+MAX_COMPLETIONS = 10
+
+
+class Completion(NamedTuple):
+    """
+    A name that completes a prefix
+    """
+
+    kind: str
+    id: UUID
+    name: str
+    score: int
+
+
+def normalize(text: str) -> str:
+    """
+    Fold case, accents and punctuation out of text
+    """
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return NON_WORD.sub(" ", text.casefold()).strip()
+
+
+def index_keys(name: str) -> list[str]:
+    """
+    The keys a name is found under: its normalized form from each word on
+    """
+    words = normalize(name).split()[:MAX_WORDS]
+    return list(dict.fromkeys(" ".join(words[i:]) for i in range(len(words))))
+
+
+def _order(completion: Completion):
+    return -completion.score, completion.name, completion.id
+
+
+class PrefixIndex:
+    """
+    A sorted array of the keys of names, holding at most max_entries names
+
+    Once full, new names are left out until the index is rebuilt, which keeps
+    the most popular ones.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.built_at: float | None = None
+        self._entries: dict[UUID, Completion] = {}
+        self._keys: list[tuple[str, UUID]] = []
+        self._cache: dict[str, list[Completion]] = {}
+        self._lock = threading.Lock()
+
+    def build(self, completions: Iterable[Completion]) -> None:
+        """
+        Replace the contents of the index, keeping the most popular names
+        """
+        best = heapq.nsmallest(self.max_entries, completions, key=_order)
+        entries = {completion.id: completion for completion in best}
+        keys = sorted(
+            (key, completion.id)
+            for completion in best
+            for key in index_keys(completion.name)
+        )
+        with self._lock:
+            self._entries, self._keys, self._cache = entries, keys, {}
+            self.built_at = time.monotonic()
+
+    def is_stale(self, max_age: float) -> bool:
+        """
+        Check if the index was never built, or built over max_age seconds ago
+        """
+        return self.built_at is None or time.monotonic() - self.built_at > max_age
+
+    def _invalidate(self, keys: list[str]) -> None:
+        for key in keys:
+            for length in range(1, CACHED_PREFIX_LENGTH + 1):
+                self._cache.pop(key[:length], None)
+
+    def _remove(self, id: UUID) -> None:
+        completion = self._entries.pop(id, None)
+        if completion is None:
+            return
+
+        keys = index_keys(completion.name)
+        for key in keys:
+            i = bisect_left(self._keys, (key, id))
+            if i < len(self._keys) and self._keys[i] == (key, id):
+                del self._keys[i]
+        self._invalidate(keys)
+
+    def put(self, completion: Completion) -> None:
+        """
+        Add a name, or replace the name with the same id
+        """
+        with self._lock:
+            self._remove(completion.id)
+            if len(self._entries) >= self.max_entries:
+                return
+
+            self._entries[completion.id] = completion
+            keys = index_keys(completion.name)
+            for key in keys:
+                insort(self._keys, (key, completion.id))
+            self._invalidate(keys)
+
+    def remove(self, id: UUID) -> None:
+        """
+        Remove a name, if it is indexed
+        """
+        with self._lock:
+            self._remove(id)
+
+    def add_score(self, id: UUID, delta: int) -> None:
+        """
+        Change the popularity of a name, if it is indexed
+        """
+        with self._lock:
+            completion = self._entries.get(id)
+            if completion is None:
+                return
+
+            self._entries[id] = completion._replace(score=completion.score + delta)
+            self._invalidate(index_keys(completion.name))
+
+    def _complete(self, prefix: str, take: int) -> list[Completion]:
+        start = bisect_left(self._keys, (prefix,))
+        stop = bisect_left(self._keys, (prefix + "\U0010ffff",))
+        ids = {id for _, id in self._keys[start:stop]}
+        return heapq.nsmallest(take, (self._entries[id] for id in ids), key=_order)
+
+    def complete(self, prefix: str, take: int = MAX_COMPLETIONS) -> list[Completion]:
+        """
+        Get the most popular names that have a word starting with prefix
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            if len(prefix) > CACHED_PREFIX_LENGTH:
+                return self._complete(prefix, take)
+
+            completions = self._cache.get(prefix)
+            if completions is None:
+                completions = self._complete(prefix, MAX_COMPLETIONS)
+                self._cache[prefix] = completions
+            return completions[:take]
+
+    def clear(self) -> None:
+        """
+        Empty the index, so that it is built again on next use
+        """
+        with self._lock:
+            self._entries, self._keys, self._cache = {}, [], {}
+            self.built_at = None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+autocomplete_index = PrefixIndex(settings.AUTOCOMPLETE_MAX_ENTRIES)
+
+
+def _is_built() -> bool:
+    return autocomplete_index.built_at is not None
+
+
+def index_artist(artist_id: UUID, name: str, follower_count: int = 0) -> None:
+    """
+    Index a new or renamed artist
+    """
+    if _is_built():
+        autocomplete_index.put(Completion("artist", artist_id, name, follower_count))
+
+
+def index_album(album_id: UUID, name: str, like_count: int = 0) -> None:
+    """
+    Index a newly released album
+    """
+    if _is_built():
+        autocomplete_index.put(Completion("album", album_id, name, like_count))
+
+
+def unindex(id: UUID) -> None:
+    """
+    Remove a deleted artist or album from the index
+    """
+    autocomplete_index.remove(id)
+
+
+def add_popularity(id: UUID, delta: int) -> None:
+    """
+    Count a follow of an artist or a like of an album, or undo it with -1
+    """
+    autocomplete_index.add_score(id, delta)
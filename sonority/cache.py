@@ -0,0 +1,354 @@
+"""
+This file implements a response cache for public, rarely changing data.
+
+Entries are keyed by route and parameters and hold the serialized body of a
+response along with its ETag. Storage is pluggable: an in-process LRU is the
+default, and any external key-value store (Redis, memcached, ...) can be used
+through the KeyValueStore interface, which is what multi-process deployments
+need for invalidations to reach every worker.
+
+Invalidation is explicit: services that change cached data call the
+invalidate_* helpers at the bottom of this file after committing.
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Iterable
+from uuid import UUID
+
+from sonority import settings
+
+
+@dataclass
+class CachedResponse:
+    """
+    A cached response body and its ETag
+    """
+
+    etag: str
+    body: Any
+
+
+class CacheBackend(ABC):
+    """
+    Storage for cached responses
+    """
+
+    # whether every process sees the same entries, so invalidations reach all
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> CachedResponse | None:
+        """
+        Get the entry stored under key, or None if it is missing or expired
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        """
+        Store value under key for ttl seconds
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Delete the entry stored under key, if any
+        """
+
+    @abstractmethod
+    def delete_prefix(self, prefix: str) -> None:
+        """
+        Delete all entries whose key starts with prefix
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Delete all entries
+        """
+
+
+class LRUCacheBackend(CacheBackend):
+    """
+    An in-process cache holding at most max_entries entries
+
+    The least recently used entry is evicted first.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, CachedResponse]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class KeyValueStore(ABC):
+    """
+    The operations needed from an external key-value store
+    """
+
+    shared = True
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """
+        Get the value stored under key, or None
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Store value under key, expiring after ttl seconds
+        """
+
+    @abstractmethod
+    def delete(self, *keys: str) -> None:
+        """
+        Delete the given keys
+        """
+
+    @abstractmethod
+    def scan(self, prefix: str) -> Iterable[str]:
+        """
+        Iterate over the keys starting with prefix
+        """
+
+
+class LocalKeyValueStore(KeyValueStore):
+    """
+    A KeyValueStore kept in process memory
+
+    This stands in for a real external store in development and tests.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._values: dict[str, tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                return None
+            return entry[1]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def scan(self, prefix: str) -> Iterable[str]:
+        with self._lock:
+            return [key for key in self._values if key.startswith(prefix)]
+
+
+class StoreCacheBackend(CacheBackend):
+    """
+    A cache kept in a KeyValueStore, with entries serialized as JSON
+    """
+
+    def __init__(self, store: KeyValueStore, namespace: str = "sonority:"):
+        self.store = store
+        self.namespace = namespace
+
+    @property
+    def shared(self) -> bool:
+        return self.store.shared
+
+    def get(self, key: str) -> CachedResponse | None:
+        value = self.store.get(self.namespace + key)
+        if value is None:
+            return None
+        return CachedResponse(**json.loads(value))
+
+    def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        self.store.set(self.namespace + key, json.dumps(asdict(value)).encode(), ttl)
+
+    def delete(self, key: str) -> None:
+        self.store.delete(self.namespace + key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        keys = list(self.store.scan(self.namespace + prefix))
+        if keys:
+            self.store.delete(*keys)
+
+    def clear(self) -> None:
+        self.delete_prefix("")
+
+
+class ResponseCache:
+    """
+    A response cache with stampede protection
+
+    Concurrent misses on the same key wait for a single computation instead
+    of all recomputing the response.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self._locks: dict[str, list] = {}
+        self._locks_lock = threading.Lock()
+        self._generation = 0
+
+    def _acquire_lock(self, key: str) -> threading.Lock:
+        with self._locks_lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+            return entry[0]
+
+    def _release_lock(self, key: str) -> None:
+        with self._locks_lock:
+            entry = self._locks[key]
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    def get_or_compute(
+        self, key: str, compute: Callable[[], CachedResponse]
+    ) -> CachedResponse:
+        """
+        Get the entry stored under key, computing and storing it on a miss
+
+        Exceptions raised by compute are propagated and nothing is stored.
+        """
+        value = self.backend.get(key)
+        if value is not None:
+            return value
+
+        lock = self._acquire_lock(key)
+        try:
+            with lock:
+                value = self.backend.get(key)
+                if value is not None:
+                    return value
+
+                generation = self._generation
+                value = compute()
+                # an invalidation while computing may have made value stale
+                if generation == self._generation:
+                    self.backend.set(key, value, self.ttl)
+                return value
+        finally:
+            self._release_lock(key)
+
+    def invalidate(self, *keys: str) -> None:
+        """
+        Delete the entries stored under keys
+        """
+        self._generation += 1
+        for key in keys:
+            self.backend.delete(key)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """
+        Delete all entries whose key starts with prefix
+        """
+        self._generation += 1
+        self.backend.delete_prefix(prefix)
+
+    def clear(self) -> None:
+        """
+        Delete all entries
+        """
+        self._generation += 1
+        self.backend.clear()
+
+
+def make_key(route: str, *params) -> str:
+    """
+    Make a cache key for route called with params
+    """
+    return ":".join([route, *map(str, params)])
+
+
+def _make_backend(name: str) -> CacheBackend:
+    """
+    Make the cache backend configured by name
+    """
+    if name == "lru":
+        return LRUCacheBackend(settings.RESPONSE_CACHE_MAX_ENTRIES)
+
+    if name == "local":
+        return StoreCacheBackend(LocalKeyValueStore())
+
+    raise ValueError(f"Unknown response cache backend: {name}")
+
+
+response_cache = ResponseCache(
+    _make_backend(settings.RESPONSE_CACHE_BACKEND), settings.RESPONSE_CACHE_TTL
+)
+
+
+def album_key(album_id: UUID) -> str:
+    """
+    The cache key of a released album
+    """
+    return make_key("albums", album_id)
+
+
+def artist_albums_key(artist_id: UUID, skip: int, take: int) -> str:
+    """
+    The cache key of a page of an artist's released albums
+    """
+    return make_key("albums/by", artist_id, skip, take)
+
+
+def invalidate_album(album_id: UUID, artist_id: UUID) -> None:
+    """
+    Invalidate the cached album and its artist's album lists
+    """
+    response_cache.invalidate(album_key(album_id))
+    invalidate_artist_albums(artist_id)
+
+
+def invalidate_artist_albums(artist_id: UUID) -> None:
+    """
+    Invalidate the cached album lists of an artist
+    """
+    response_cache.invalidate_prefix(make_key("albums/by", artist_id, ""))
@@ -0,0 +1,16 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority.charts.exceptions import ChartNotFound
+
+
+async def chart_not_found_exception_handler(request, exc: ChartNotFound):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    ChartNotFound: chart_not_found_exception_handler,
+}
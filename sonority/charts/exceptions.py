@@ -0,0 +1,6 @@
+class ChartNotFound(Exception):
+    """
+    Exception raised when there is no chart over a window
+    """
+
+    pass
@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.charts import service
+from sonority.jobs import handler
+
+
+@handler("charts.refresh", every=settings.CHARTS_REFRESH_INTERVAL)
+def refresh_charts(db: Session, payload: dict):
+    """
+    Compute the charts from the latest activity
+    """
+    service.refresh_charts(db)
@@ -0,0 +1,45 @@
+from uuid import UUID
+
+from sqlalchemy import BigInteger
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Activity(Base):
+    """
+    Model for the likes, follows and plays of an album or artist in a bucket
+    of time
+
+    Counted as they happen, see service.record_activity, and dropped once
+    older than every chart window
+    """
+
+    __tablename__ = "chart_activity"
+
+    # seconds since the epoch, a multiple of CHARTS_BUCKET_SIZE
+    starts_at: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    # album or artist
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    subject_id: Mapped[UUID] = mapped_column(primary_key=True)
+    likes: Mapped[int] = mapped_column(nullable=False, default=0)
+    follows: Mapped[int] = mapped_column(nullable=False, default=0)
+    plays: Mapped[int] = mapped_column(nullable=False, default=0)
+
+
+class ChartEntry(Base):
+    """
+    Model for an album or artist ranked in a chart
+
+    Charts are computed in the background, see service.refresh_charts, so
+    reading one is a range of the primary key
+    """
+
+    __tablename__ = "chart_entries"
+
+    window: Mapped[str] = mapped_column(primary_key=True)
+    # album or artist
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    rank: Mapped[int] = mapped_column(primary_key=True)
+    subject_id: Mapped[UUID] = mapped_column(nullable=False)
+    score: Mapped[float] = mapped_column(nullable=False)
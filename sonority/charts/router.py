@@ -0,0 +1,27 @@
+from fastapi import APIRouter
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.charts import service
+from sonority.charts.schemas import ChartSchema
+from sonority.dependencies import Session, Skip, Take, SKIP_DEFAULT, TAKE_DEFAULT
+
+
+router = APIRouter(prefix="/charts", tags=["charts"])
+
+
+@router.get("/{window}", response_model=ChartSchema)
+def get_chart(
+    db: Session,
+    user: CurrentUser,
+    window: str,
+    skip: Skip = SKIP_DEFAULT,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the albums and artists trending over a window, such as 24h
+
+    Charts are refreshed every minute or so, from the likes, follows and
+    plays in the window, the latest counting the most
+    """
+    albums, artists = service.get_chart(db, window, user, skip=skip, take=take)
+    return {"window": window, "albums": albums, "artists": artists}
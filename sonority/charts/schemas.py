@@ -0,0 +1,15 @@
+from pydantic import BaseModel
+
+from sonority.albums.schemas import AlbumOutSchema
+from sonority.artists.schemas import ArtistOutSchema
+
+
+class ChartSchema(BaseModel):
+    """
+    Schema for a page of the trending albums and artists over a window, best
+    first
+    """
+
+    window: str
+    albums: list[AlbumOutSchema]
+    artists: list[ArtistOutSchema]
@@ -0,0 +1,230 @@
+import re
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums import service as albums_service
+from sonority.albums.models import Album
+from sonority.artists import service as artists_service
+from sonority.artists.models import Artist
+from sonority.auth.models import User
+from sonority.charts.exceptions import ChartNotFound
+from sonority.charts.models import Activity, ChartEntry
+
+KINDS = ("album", "artist")
+
+WINDOW = re.compile(r"(\d+)([mhd])")
+UNITS = {"m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_window(window: str):
+    """
+    The seconds in a chart window such as 24h
+
+    Raise ValueError if it is not a number of minutes, hours or days
+    """
+    match = WINDOW.fullmatch(window)
+    if not match:
+        raise ValueError(f"Invalid chart window {window!r}")
+    return int(match[1]) * UNITS[match[2]]
+
+
+def get_windows():
+    """
+    The seconds in each of CHARTS_WINDOWS, by name
+    """
+    windows = [window.strip() for window in settings.CHARTS_WINDOWS]
+    return {window: parse_window(window) for window in windows}
+
+
+def _timestamp(at: datetime):
+    return int(at.replace(tzinfo=timezone.utc).timestamp())
+
+
+def bucket(at: datetime):
+    """
+    The start of the bucket of activity a naive UTC time falls in
+    """
+    timestamp = _timestamp(at)
+    return timestamp - timestamp % settings.CHARTS_BUCKET_SIZE
+
+
+def _upsert(db: Session):
+    """
+    An INSERT into chart_activity that adds to the counts already there
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(Activity)
+    return statement.on_conflict_do_update(
+        index_elements=["starts_at", "kind", "subject_id"],
+        set_={
+            column: getattr(Activity, column) + getattr(statement.excluded, column)
+            for column in ("likes", "follows", "plays")
+        },
+    )
+
+
+def activity(
+    kind: str,
+    subject_id: UUID,
+    starts_at: int,
+    *,
+    likes: int = 0,
+    follows: int = 0,
+    plays: int = 0,
+):
+    """
+    A row of activity of an album or artist in a bucket, for record_activity
+    """
+    return {
+        "starts_at": starts_at,
+        "kind": kind,
+        "subject_id": subject_id,
+        "likes": likes,
+        "follows": follows,
+        "plays": plays,
+    }
+
+
+def record_activity(db: Session, rows: list[dict]):
+    """
+    Add rows made by activity to the activity counts, without committing
+
+    There must be one row at most per album or artist and bucket
+    """
+    db.execute(_upsert(db), rows)
+
+
+def record_like(db: Session, album: Album, liked_at: datetime, delta: int):
+    """
+    Count a like of an album, or with a delta of -1 take it back, towards
+    the album and its artist, without committing
+    """
+    record_activity(
+        db,
+        [
+            activity("album", album.id, bucket(liked_at), likes=delta),
+            activity("artist", album.artist_id, bucket(liked_at), likes=delta),
+        ],
+    )
+
+
+def record_follow(db: Session, artist_id: UUID, followed_at: datetime, delta: int):
+    """
+    Count a follow of an artist, or with a delta of -1 take it back, without
+    committing
+    """
+    row = activity("artist", artist_id, bucket(followed_at), follows=delta)
+    record_activity(db, [row])
+
+
+def _score(start: int, window: int):
+    """
+    The trending score of an album or artist over the window ending now
+
+    Activity counts for less the older it is, down to nothing at the start
+    of the window
+    """
+    signal = (
+        Activity.likes * settings.CHARTS_LIKE_WEIGHT
+        + Activity.follows * settings.CHARTS_FOLLOW_WEIGHT
+        + Activity.plays * settings.CHARTS_PLAY_WEIGHT
+    )
+    return func.sum(signal * (Activity.starts_at - start) / float(window))
+
+
+def compute_chart(db: Session, kind: str, window: int, now: datetime):
+    """
+    Rank the released albums or artists by their activity in the window
+    ending at now, best first
+
+    Returns up to CHARTS_SIZE (id, score) pairs
+    """
+    start = _timestamp(now) - window
+    score = _score(start, window)
+    query = select(Activity.subject_id, score).where(
+        Activity.kind == kind, Activity.starts_at >= start
+    )
+    if kind == "album":
+        query = query.join(Album, Album.id == Activity.subject_id).where(
+            Album.released == True  # noqa
+        )
+    else:
+        query = query.join(Artist, Artist.id == Activity.subject_id)
+
+    return db.execute(
+        query.group_by(Activity.subject_id)
+        .having(score > 0)
+        .order_by(score.desc(), Activity.subject_id)
+        .limit(settings.CHARTS_SIZE)
+    ).all()
+
+
+def refresh_charts(db: Session, now: datetime | None = None):
+    """
+    Compute every chart again, each window in its own transaction, and drop
+    the activity older than every window
+    """
+    now = now or datetime.utcnow()
+    windows = get_windows()
+    for name, window in windows.items():
+        db.execute(delete(ChartEntry).where(ChartEntry.window == name))
+        for kind in KINDS:
+            ranked = compute_chart(db, kind, window, now)
+            if ranked:
+                db.execute(
+                    insert(ChartEntry),
+                    [
+                        {
+                            "window": name,
+                            "kind": kind,
+                            "rank": rank,
+                            "subject_id": subject_id,
+                            "score": score,
+                        }
+                        for rank, (subject_id, score) in enumerate(ranked, 1)
+                    ],
+                )
+        db.commit()
+
+    db.execute(delete(ChartEntry).where(ChartEntry.window.not_in(list(windows))))
+    db.execute(
+        delete(Activity).where(
+            Activity.starts_at < _timestamp(now) - max(windows.values())
+        )
+    )
+    db.commit()
+
+
+def get_chart(db: Session, window: str, user: User, *, skip: int, take: int):
+    """
+    Get a page of the trending albums and artists over a window, best first,
+    as of the last refresh
+
+    Raise ChartNotFound if window is not one of CHARTS_WINDOWS
+    """
+    if window not in get_windows():
+        raise ChartNotFound("Chart not found")
+
+    entries = db.execute(
+        select(ChartEntry.kind, ChartEntry.subject_id)
+        .where(
+            ChartEntry.window == window,
+            ChartEntry.rank > skip,
+            ChartEntry.rank <= skip + take,
+        )
+        .order_by(ChartEntry.kind, ChartEntry.rank)
+    ).all()
+
+    album_ids = [subject_id for kind, subject_id in entries if kind == "album"]
+    artist_ids = [subject_id for kind, subject_id in entries if kind == "artist"]
+    albums = albums_service.get_albums_by_ids(db, album_ids)
+    artists = artists_service.get_artists_by_ids(db, artist_ids, user)
+    return albums, [artist for artist, _ in artists]
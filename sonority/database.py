@@ -1,3 +1,5 @@
+import threading
+
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm import DeclarativeBase
@@ -17,8 +19,7 @@ def get_new_db_session():
     """
     Create a new database session for each request.
     """
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    with SessionLocal() as session:
+    with get_sessionmaker()() as session:
         yield session
 
 
@@ -40,4 +41,53 @@ def drop_db(_engine=None, url: str = None):
     Base.metadata.drop_all(bind=_engine)
 
 
-engine = create_engine(settings.DATABASE_URL)
+def engine_options() -> dict:
+    """
+    Connection pool options for the application engine
+    """
+    options = {}
+    if settings.DATABASE_POOL_SIZE is not None:
+        options["pool_size"] = int(settings.DATABASE_POOL_SIZE)
+    if settings.DATABASE_MAX_OVERFLOW is not None:
+        options["max_overflow"] = int(settings.DATABASE_MAX_OVERFLOW)
+    return options
+
+
+_engine = None
+_sessionmaker = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Get the application engine, creating it on first use.
+
+    Creating it lazily keeps importing the application cheap.
+    """
+    global _engine, _sessionmaker
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(settings.DATABASE_URL, **engine_options())
+                _sessionmaker = sessionmaker(
+                    autocommit=False, autoflush=False, bind=_engine
+                )
+    return _engine
+
+
+def get_sessionmaker():
+    """
+    Get the session factory bound to the application engine.
+    """
+    get_engine()
+    return _sessionmaker
+
+
+def dispose_engine():
+    """
+    Forget the connections of the application engine without closing them.
+
+    Used after forking, as connections must not be shared between processes.
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
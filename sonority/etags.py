@@ -0,0 +1,76 @@
+"""
+This file implements conditional GET support.
+
+Responses carry a weak ETag derived from the versions of the resource
+(timestamps, counters, ...) rather than from the serialized body, so a
+request whose If-None-Match header matches can be answered with a bodiless
+304 before the body is ever built.
+"""
+from hashlib import sha1
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*versions) -> str:
+    """
+    Make a weak ETag from the given versions of a resource
+
+    :param versions: Anything that changes whenever the representation changes.
+    :return: The ETag, ready to be used as a header value.
+    """
+    digest = sha1("|".join(str(version) for version in versions).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def _opaque_tag(etag: str) -> str:
+    """
+    Strip the weakness indicator from an ETag, for weak comparison
+    """
+    etag = etag.strip()
+    if etag.startswith("W/"):
+        etag = etag[2:]
+    return etag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Check if the request's If-None-Match header matches etag
+
+    :param request: The incoming request.
+    :param etag: The current ETag of the requested resource.
+    :return: True if the client already holds the current representation.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    current = _opaque_tag(etag)
+    return any(_opaque_tag(tag) == current for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str, cache_control: str) -> None:
+    """
+    Set the ETag and Cache-Control headers on a response
+
+    :param response: The response to set the headers on.
+    :param etag: The ETag of the resource.
+    :param cache_control: The Cache-Control policy of the route.
+    """
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """
+    Make a 304 Not Modified response
+
+    :param etag: The ETag of the resource.
+    :param cache_control: The Cache-Control policy of the route.
+    :return: A response with no body.
+    """
+    response = Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    set_cache_headers(response, etag, cache_control)
+    return response
@@ -0,0 +1,16 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority.feed.exceptions import InvalidFeedCursor
+
+
+async def invalid_feed_cursor_exception_handler(request, exc: InvalidFeedCursor):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    InvalidFeedCursor: invalid_feed_cursor_exception_handler,
+}
@@ -0,0 +1,6 @@
+class InvalidFeedCursor(Exception):
+    """
+    Exception raised when a feed cursor cannot be decoded
+    """
+
+    pass
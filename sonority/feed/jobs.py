@@ -0,0 +1,14 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from sonority.feed import service
+from sonority.jobs import handler
+
+
+@handler("feed.fan_out_release")
+def fan_out_release(db: Session, payload: dict):
+    """
+    Write a released album to the feeds of its artist's followers
+    """
+    service.fan_out_release(db, UUID(payload["album_id"]))
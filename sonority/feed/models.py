@@ -0,0 +1,42 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class FeedEntry(Base):
+    """
+    Model for a release in a user's feed
+
+    The primary key is the feed in reading order, so pages of a feed are
+    read from the index alone
+    """
+
+    __tablename__ = "feed_entries"
+
+    user_id: Mapped[UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    released_at: Mapped[datetime] = mapped_column(primary_key=True)
+    # indexed for the cascade when an album is deleted
+    album_id: Mapped[UUID] = mapped_column(
+        ForeignKey("albums.id", ondelete="CASCADE"), primary_key=True, index=True
+    )
+
+
+class FeedPullArtist(Base):
+    """
+    Model for an artist whose releases are not fanned out
+
+    Artists with too many followers to write to every feed are read from
+    their albums when feeds are read instead
+    """
+
+    __tablename__ = "feed_pull_artists"
+
+    artist_id: Mapped[UUID] = mapped_column(
+        ForeignKey("artists.id", ondelete="CASCADE"), primary_key=True
+    )
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session, Take, TAKE_DEFAULT
+from sonority.feed import service
+from sonority.feed.schemas import FeedSchema
+
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+
+@router.get("/", response_model=FeedSchema)
+def get_feed(
+    db: Session,
+    user: CurrentUser,
+    before: str | None = None,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the latest releases of the artists the current user follows
+
+    Pass the returned `next` cursor as `before` to get the following page
+    """
+    albums, next_cursor = service.get_feed(db, user, before=before, take=take)
+    return {"albums": albums, "next": next_cursor}
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+from sonority.albums.schemas import AlbumOutSchema
+
+
+class FeedSchema(BaseModel):
+    """
+    Schema for a page of a user's feed
+    """
+
+    albums: list[AlbumOutSchema]
+    next: str | None
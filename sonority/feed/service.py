@@ -0,0 +1,183 @@
+import heapq
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import delete, func, select, tuple_
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.models import Album
+from sonority.albums import service as albums_service
+from sonority.artists.models import Follow
+from sonority.auth.models import User
+from sonority.feed.exceptions import InvalidFeedCursor
+from sonority.feed.models import FeedEntry, FeedPullArtist
+
+
+def encode_cursor(released_at: datetime, album_id: UUID):
+    """
+    Encode the position of an album in a feed
+    """
+    return f"{released_at.isoformat()}_{album_id}"
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a position encoded by encode_cursor
+
+    Raise InvalidFeedCursor if the cursor is malformed
+    """
+    try:
+        released_at, album_id = cursor.split("_")
+        return datetime.fromisoformat(released_at), UUID(album_id)
+    except ValueError:
+        raise InvalidFeedCursor("Invalid feed cursor")
+
+
+def _insert_ignoring_duplicates(db: Session):
+    """
+    An INSERT into feed_entries that skips entries already there
+
+    Fan-out may be retried, so writing an entry twice must be harmless
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    return insert(FeedEntry).on_conflict_do_nothing()
+
+
+def is_pulled(db: Session, artist_id: UUID):
+    """
+    Check if the releases of an artist are read instead of fanned out
+    """
+    return db.get(FeedPullArtist, artist_id) is not None
+
+
+def fan_out_release(db: Session, album_id: UUID):
+    """
+    Write a released album to the feed of each follower of its artist
+
+    Followers are written in batches, each in its own transaction. Artists
+    with more followers than FEED_FANOUT_THRESHOLD are switched to being
+    read on demand instead.
+
+    Returns the number of feeds written to
+    """
+    album = db.get(Album, album_id)
+    if not album or not album.released:
+        return 0
+
+    artist_id, released_at = album.artist_id, album.updated_at
+    if is_pulled(db, artist_id):
+        return 0
+
+    follower_count = db.execute(
+        select(func.count(Follow.follower_id)).where(Follow.artist_id == artist_id)
+    ).scalar_one()
+    if follower_count > settings.FEED_FANOUT_THRESHOLD:
+        db.add(FeedPullArtist(artist_id=artist_id))
+        db.commit()
+        return 0
+
+    written = 0
+    last_follower_id = None
+    while True:
+        query = select(Follow.follower_id).where(Follow.artist_id == artist_id)
+        if last_follower_id is not None:
+            query = query.where(Follow.follower_id > last_follower_id)
+        query = query.order_by(Follow.follower_id)
+        follower_ids = (
+            db.execute(query.limit(settings.FEED_FANOUT_BATCH_SIZE)).scalars().all()
+        )
+        if not follower_ids:
+            return written
+
+        db.execute(
+            _insert_ignoring_duplicates(db),
+            [
+                {"user_id": id, "released_at": released_at, "album_id": album_id}
+                for id in follower_ids
+            ],
+        )
+        db.commit()
+        written += len(follower_ids)
+        last_follower_id = follower_ids[-1]
+
+
+def remove_artist_from_feed(db: Session, user: User, artist_id: UUID):
+    """
+    Remove the releases of an artist from a user's feed
+    """
+    db.execute(
+        delete(FeedEntry).where(
+            FeedEntry.user_id == user.id,
+            FeedEntry.album_id.in_(
+                select(Album.id).where(Album.artist_id == artist_id)
+            ),
+        )
+    )
+    db.commit()
+
+
+def _fanned_out(db: Session, user: User, before, take: int):
+    """
+    The positions of the releases written to a user's feed
+    """
+    query = select(FeedEntry.released_at, FeedEntry.album_id).where(
+        FeedEntry.user_id == user.id
+    )
+    if before:
+        query = query.where(tuple_(FeedEntry.released_at, FeedEntry.album_id) < before)
+    order = (FeedEntry.released_at.desc(), FeedEntry.album_id.desc())
+    return db.execute(query.order_by(*order).limit(take)).all()
+
+
+def _pulled(db: Session, user: User, before, take: int):
+    """
+    The positions of the releases of pulled artists that a user follows
+    """
+    query = (
+        select(Album.updated_at, Album.id)
+        .join(Follow, Follow.artist_id == Album.artist_id)
+        .join(FeedPullArtist, FeedPullArtist.artist_id == Album.artist_id)
+        .where(Follow.follower_id == user.id, Album.released == True)  # noqa
+    )
+    if before:
+        query = query.where(tuple_(Album.updated_at, Album.id) < before)
+    return db.execute(
+        query.order_by(Album.updated_at.desc(), Album.id.desc()).limit(take)
+    ).all()
+
+
+def get_feed(db: Session, user: User, *, before: str | None, take: int):
+    """
+    Get a page of the releases of the artists a user follows, newest first
+
+    Releases fanned out to the user's feed are merged with those of the
+    followed artists that are read on demand.
+
+    Returns the albums and the cursor of the next page, if there may be one
+    """
+    position = decode_cursor(before) if before else None
+    merged = heapq.merge(
+        _fanned_out(db, user, position, take),
+        _pulled(db, user, position, take),
+        key=tuple,
+        reverse=True,
+    )
+
+    page = []
+    seen = set()
+    for released_at, album_id in merged:
+        if album_id not in seen:
+            seen.add(album_id)
+            page.append((released_at, album_id))
+        if len(page) == take:
+            break
+
+    album_ids = [album_id for _, album_id in page]
+    albums = albums_service.get_albums_by_ids(db, album_ids)
+    next_cursor = encode_cursor(*page[-1]) if len(page) == take else None
+    return albums, next_cursor
@@ -0,0 +1,87 @@
+"""
+This file implements a report of the import time of the application.
+
+It imports a module in a fresh interpreter with `-X importtime` and lists the
+modules that took the longest, which is what worker boot time is made of.
+
+Usage: python -m sonority.importtime [--module sonority.server] [--top 20]
+"""
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+
+
+@dataclass
+class ImportTime:
+    """
+    The time taken to import a module, in microseconds
+    """
+
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+def measure_imports(module: str) -> list[ImportTime]:
+    """
+    Import module in a fresh interpreter and return the time taken per module
+
+    :param module: The module to import.
+    :return: The import time of every module imported along the way.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    times = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        times.append(ImportTime(name.strip(), int(self_us), int(cumulative_us)))
+
+    return times
+
+
+def total_import_time(times: list[ImportTime], module: str) -> int:
+    """
+    Return the cumulative import time of module, in microseconds
+    """
+    return next(time.cumulative_us for time in times if time.module == module)
+
+
+def report(times: list[ImportTime], top: int) -> str:
+    """
+    Format the slowest imports as a table, slowest first
+    """
+    lines = [f"{'self [ms]':>10} {'cumulative [ms]':>16}  module"]
+    for time in sorted(times, key=lambda time: time.self_us, reverse=True)[:top]:
+        lines.append(
+            f"{time.self_us / 1000:>10.1f} {time.cumulative_us / 1000:>16.1f}"
+            f"  {time.module}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m sonority.importtime",
+        description="Report the slowest imports of the application.",
+    )
+    parser.add_argument("--module", default="sonority.server")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    times = measure_imports(args.module)
+    print(report(times, args.top))
+    total = total_import_time(times, args.module)
+    print(f"\nimporting {args.module} took {total / 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+from .queue import coalesce, coalesce_many, enqueue, handler, schedule
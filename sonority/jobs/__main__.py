@@ -0,0 +1,3 @@
+from sonority.jobs.worker import main
+
+main()
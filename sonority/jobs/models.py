@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Job(Base):
+    """
+    Model for a unit of deferred work
+
+    A job can be claimed once run_at has passed. Claiming it pushes run_at
+    past the visibility timeout, so a job whose worker died becomes
+    claimable again.
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # enqueuing a job with the key of an existing job returns that job
+    idempotency_key: Mapped[str] = mapped_column(nullable=True, unique=True)
+    # queued, running, done or failed
+    status: Mapped[str] = mapped_column(nullable=False, default="queued")
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(nullable=False)
+    run_at: Mapped[datetime] = mapped_column(nullable=False, default=datetime.utcnow)
+    # changes on every claim, so a worker can tell it still owns a job
+    claimed_by: Mapped[str] = mapped_column(nullable=True)
+    last_error: Mapped[str] = mapped_column(nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
@@ -0,0 +1,278 @@
+"""
+This file implements a durable job queue on top of the database.
+
+Jobs are rows of the jobs table. Enqueuing a job does not commit, so a job
+is enqueued atomically with the changes that called for it. Workers claim
+jobs with SELECT ... FOR UPDATE SKIP LOCKED where the database supports it,
+and with a conditional UPDATE in every case, so a job is only ever claimed
+by one worker at a time.
+
+Finished jobs are kept for JOBS_RETENTION seconds, and so are their
+idempotency keys, then purged by a periodic job.
+"""
+import time
+from datetime import datetime, timedelta
+from typing import Callable
+from uuid import uuid4
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.jobs.models import Job
+
+# job name -> function called with a session and the job's payload
+handlers: dict[str, Callable[[Session, dict], None]] = {}
+# job name -> seconds between runs, for jobs the worker schedules itself
+periodic: dict[str, float] = {}
+
+
+def handler(name: str, *, every: float | None = None):
+    """
+    Register the decorated function as the handler of the jobs called name
+
+    With every, the worker also runs the job every that many seconds.
+    Handlers may run more than once for the same job, and must be idempotent
+    """
+
+    def register(fn):
+        handlers[name] = fn
+        if every:
+            periodic[name] = every
+        return fn
+
+    return register
+
+
+def enqueue(
+    db: Session,
+    name: str,
+    payload: dict | None = None,
+    *,
+    idempotency_key: str | None = None,
+    delay: float = 0,
+    max_attempts: int | None = None,
+):
+    """
+    Add a job to the queue, without committing
+
+    If a job with the same idempotency key exists, return it instead
+    """
+    if idempotency_key:
+        job = db.execute(
+            select(Job).where(Job.idempotency_key == idempotency_key)
+        ).scalar_one_or_none()
+        if job:
+            return job
+
+    job = Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=idempotency_key,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=datetime.utcnow() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    return job
+
+
+def _window(interval: float):
+    """
+    The current interval, counted from the epoch, and the seconds until it
+    ends
+    """
+    now = time.time()
+    window = int(now // interval)
+    return window, (window + 1) * interval - now
+
+
+def schedule(db: Session, name: str, *, interval: float):
+    """
+    Enqueue a job to run at the end of the current interval, unless one is
+    already, and commit
+
+    Intervals are counted from the epoch, so every process schedules the
+    same job
+    """
+    window, delay = _window(interval)
+    try:
+        job = enqueue(db, name, idempotency_key=f"{name}:{window}", delay=delay)
+        db.commit()
+    except IntegrityError:
+        # another process enqueued it first
+        db.rollback()
+        return None
+    return job
+
+
+def coalesce(db: Session, name: str, payload: dict, *, key: str, interval: float):
+    """
+    Enqueue a job to run at the end of the current interval, unless one with
+    the same key is already, without committing
+
+    Unlike schedule, concurrent calls do not conflict, so the job can be
+    enqueued along with the change that called for it
+    """
+    coalesce_many(db, name, {key: payload}, interval=interval)
+
+
+def coalesce_many(
+    db: Session, name: str, payloads: dict[str, dict], *, interval: float
+):
+    """
+    Like coalesce, for a payload per key, in a single INSERT
+    """
+    if not payloads:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    window, delay = _window(interval)
+    run_at = datetime.utcnow() + timedelta(seconds=delay)
+    db.execute(
+        insert(Job)
+        .values(
+            [
+                {
+                    "name": name,
+                    "payload": payload,
+                    "idempotency_key": f"{name}:{key}:{window}",
+                    "max_attempts": settings.JOBS_MAX_ATTEMPTS,
+                    "run_at": run_at,
+                }
+                # in the order of the key, so concurrent calls do not deadlock
+                for key, payload in sorted(payloads.items())
+            ]
+        )
+        .on_conflict_do_nothing(index_elements=["idempotency_key"])
+    )
+
+
+def claim(db: Session, limit: int = 1):
+    """
+    Claim up to limit jobs that are due, and commit
+
+    Jobs whose worker timed out on their last attempt are marked as failed
+    instead. Returns the claimed jobs, each with a new claimed_by token
+    """
+    now = datetime.utcnow()
+    db.execute(
+        update(Job)
+        .where(
+            Job.status == "running",
+            Job.run_at <= now,
+            Job.attempts >= Job.max_attempts,
+        )
+        .values(
+            status="failed",
+            claimed_by=None,
+            last_error="Timed out on the last attempt",
+        )
+    )
+    candidates = db.execute(
+        select(Job.id, Job.run_at)
+        .where(Job.status.in_(["queued", "running"]), Job.run_at <= now)
+        .order_by(Job.run_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    claimed = []
+    visible_at = now + timedelta(seconds=settings.JOBS_VISIBILITY_TIMEOUT)
+    for job_id, run_at in candidates:
+        token = uuid4().hex
+        result = db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.run_at == run_at)
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                run_at=visible_at,
+                claimed_by=token,
+            )
+        )
+        # another worker claimed it between the select and the update
+        if result.rowcount == 1:
+            claimed.append(token)
+
+    db.commit()
+    if not claimed:
+        return []
+
+    return (
+        db.execute(select(Job).where(Job.claimed_by.in_(claimed))).scalars().all()
+    )
+
+
+def backoff(attempts: int):
+    """
+    The seconds to wait before retrying a job that failed attempts times
+    """
+    delay = settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1)
+    return min(delay, settings.JOBS_RETRY_BACKOFF_MAX)
+
+
+def complete(db: Session, job: Job):
+    """
+    Mark a claimed job as done, and commit
+
+    Returns False if the job was claimed by another worker in the meantime
+    """
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.claimed_by == job.claimed_by)
+        .values(status="done", claimed_by=None)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def fail(db: Session, job: Job, error: str):
+    """
+    Schedule a retry of a claimed job that failed, and commit
+
+    The job is marked as failed for good once it is out of attempts.
+    Returns False if the job was claimed by another worker in the meantime
+    """
+    if job.attempts >= job.max_attempts:
+        values = {"status": "failed"}
+    else:
+        retry_at = datetime.utcnow() + timedelta(seconds=backoff(job.attempts))
+        values = {"status": "queued", "run_at": retry_at}
+
+    result = db.execute(
+        update(Job)
+        .where(Job.id == job.id, Job.claimed_by == job.claimed_by)
+        .values(claimed_by=None, last_error=error, **values)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def purge(db: Session, now: datetime | None = None):
+    """
+    Delete the jobs that finished more than JOBS_RETENTION seconds ago, and
+    commit
+
+    Returns the number of jobs deleted
+    """
+    now = now or datetime.utcnow()
+    result = db.execute(
+        delete(Job).where(
+            Job.status.in_(["done", "failed"]),
+            Job.updated_at < now - timedelta(seconds=settings.JOBS_RETENTION),
+        )
+    )
+    db.commit()
+    return result.rowcount
+
+
+@handler("jobs.purge", every=settings.JOBS_PURGE_INTERVAL)
+def purge_jobs(db: Session, payload: dict):
+    """
+    Purge the jobs past their retention
+    """
+    purge(db)
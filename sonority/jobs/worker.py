@@ -0,0 +1,196 @@
+"""
+This file implements the worker process that runs queued jobs.
+
+    python -m sonority.jobs --concurrency 8
+
+Each of the worker's threads claims one job at a time and runs its handler
+in a session of its own, while the main thread schedules the periodic jobs.
+On SIGTERM or SIGINT, the worker stops claiming jobs and exits once the
+jobs in progress are done.
+"""
+import argparse
+import importlib
+import logging
+import signal
+import threading
+import traceback
+from typing import Callable
+
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.jobs import queue
+from sonority.jobs.models import Job
+
+# modules that register job handlers
+HANDLER_MODULES = [
+    "sonority.charts.jobs",
+    "sonority.feed.jobs",
+    "sonority.playlists.jobs",
+    "sonority.plays.jobs",
+    "sonority.recommendations.jobs",
+    "sonority.tracks.jobs",
+]
+
+logger = logging.getLogger("sonority.jobs")
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+class Worker:
+    """
+    Runs queued jobs with a pool of threads
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        *,
+        concurrency: int = 1,
+        poll_interval: float = 1,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.stopping = threading.Event()
+
+    def run_job(self, job: Job) -> bool:
+        """
+        Run a claimed job and record its outcome
+
+        Returns whether the job succeeded
+        """
+        fn = queue.handlers.get(job.name)
+        with self.session_factory() as db:
+            try:
+                if fn is None:
+                    raise LookupError(f"No handler for job {job.name!r}")
+                fn(db, job.payload)
+            except Exception:
+                db.rollback()
+                logger.exception("job %s (%s) failed", job.id, job.name)
+                queue.fail(db, job, traceback.format_exc())
+                return False
+
+            queue.complete(db, job)
+            return True
+
+    def run_once(self) -> int:
+        """
+        Claim and run one job, if one is due
+
+        Returns the number of jobs run
+        """
+        with self.session_factory() as db:
+            jobs = queue.claim(db, limit=1)
+            db.expunge_all()
+
+        for job in jobs:
+            self.run_job(job)
+        return len(jobs)
+
+    def run_pending(self) -> int:
+        """
+        Run jobs until none is due
+
+        Returns the number of jobs run
+        """
+        total = 0
+        while ran := self.run_once():
+            total += ran
+        return total
+
+    def schedule_periodic(self) -> None:
+        """
+        Make sure the next run of every periodic job is queued
+        """
+        with self.session_factory() as db:
+            for name, interval in queue.periodic.items():
+                queue.schedule(db, name, interval=interval)
+
+    def _loop(self) -> None:
+        while not self.stopping.is_set():
+            try:
+                ran = self.run_once()
+            except Exception:
+                logger.exception("failed to claim a job")
+                ran = 0
+            if not ran:
+                self.stopping.wait(self.poll_interval)
+
+    def run(self) -> None:
+        """
+        Run jobs, and schedule the periodic ones, until stop is called
+        """
+        threads = [
+            threading.Thread(target=self._loop, name=f"jobs-{i}")
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        while not self.stopping.is_set():
+            try:
+                self.schedule_periodic()
+            except Exception:
+                logger.exception("failed to schedule periodic jobs")
+            self.stopping.wait(self.poll_interval)
+
+        for thread in threads:
+            thread.join()
+
+    def stop(self) -> None:
+        """
+        Stop claiming jobs, letting the jobs in progress finish
+        """
+        self.stopping.set()
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m sonority.jobs", description="Run queued jobs."
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.JOBS_CONCURRENCY,
+        help="jobs run at the same time (default: $JOBS_CONCURRENCY or 4)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=settings.JOBS_POLL_INTERVAL,
+        help="seconds to wait when no job is due",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1")
+
+    return args
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run a worker from the command line
+    """
+    args = parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper())
+
+    from sonority.database import get_sessionmaker
+
+    load_handlers()
+    worker = Worker(
+        get_sessionmaker(),
+        concurrency=args.concurrency,
+        poll_interval=args.poll_interval,
+    )
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: worker.stop())
+
+    logger.info("running jobs with %d threads", args.concurrency)
+    worker.run()
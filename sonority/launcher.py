@@ -0,0 +1,290 @@
+"""
+This file implements a pre-forking launcher for production deployments.
+
+The application is imported once in the master process and every worker is
+forked from it, so workers share the memory of everything loaded at import.
+Workers serve a socket bound by the master with uvicorn, and the database
+connection budget is split evenly between them.
+
+Signals handled by the master:
+    SIGTERM, SIGINT: drain workers gracefully and exit
+    SIGHUP: replace workers one at a time, without dropping the socket
+"""
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+from dataclasses import dataclass
+
+from sonority import settings
+
+
+@dataclass
+class LaunchConfig:
+    """
+    The effective configuration of a launch
+    """
+
+    host: str
+    port: int
+    workers: int
+    connection_budget: int
+    loop: str = "uvloop"
+    http: str = "httptools"
+    backlog: int = 2048
+    graceful_timeout: int = 30
+    log_level: str = "info"
+
+    @property
+    def pool_size(self) -> int:
+        """
+        The connection pool size of each worker
+        """
+        return max(1, self.connection_budget // self.workers)
+
+
+def summary(config: LaunchConfig) -> str:
+    """
+    Describe the effective configuration of a launch
+    """
+    lines = [
+        "sonority effective configuration",
+        f"  bind              {config.host}:{config.port}",
+        f"  workers           {config.workers}",
+        f"  event loop        {config.loop}",
+        f"  http parser       {config.http}",
+        f"  db budget         {config.connection_budget} connections",
+        f"  db pool/worker    {config.pool_size} (no overflow)",
+        f"  graceful timeout  {config.graceful_timeout}s",
+        f"  master pid        {os.getpid()}",
+    ]
+    if config.pool_size * config.workers > config.connection_budget:
+        lines.append(
+            "  warning: fewer connections than workers, the budget is exceeded"
+        )
+    return "\n".join(lines)
+
+
+def check_response_cache(config: LaunchConfig) -> None:
+    """
+    Refuse to run several workers with a response cache kept in each
+
+    Invalidations would only reach the worker that made them, and the others
+    would serve stale responses until their entries expire.
+    """
+    from sonority.cache import response_cache
+
+    if config.workers > 1 and not response_cache.backend.shared:
+        raise SystemExit(
+            f"RESPONSE_CACHE_BACKEND={settings.RESPONSE_CACHE_BACKEND} keeps a "
+            "cache in each worker: run one worker, or a store shared between them"
+        )
+
+
+def configure_pool(config: LaunchConfig) -> None:
+    """
+    Size the connection pool of each worker from the connection budget
+
+    This must run before the engine is first used.
+    """
+    settings.DATABASE_POOL_SIZE = config.pool_size
+    settings.DATABASE_MAX_OVERFLOW = 0
+
+
+def bind_socket(config: LaunchConfig) -> socket.socket:
+    """
+    Bind the listening socket shared by all workers
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((config.host, config.port))
+    sock.listen(config.backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Launcher:
+    """
+    Forks and supervises the worker processes
+    """
+
+    def __init__(self, config: LaunchConfig):
+        self.config = config
+        self.workers: set[int] = set()
+        self._signals: list[int] = []
+        self._app = None
+        self._socket = None
+
+    def run(self) -> None:
+        """
+        Start the workers and supervise them until told to stop
+        """
+        configure_pool(self.config)
+        from sonority.server import app
+
+        self._app = app
+        check_response_cache(self.config)
+        self._socket = bind_socket(self.config)
+        print(summary(self.config), flush=True)
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, lambda sig, _: self._signals.append(sig))
+
+        while True:
+            self._reap()
+            if self._signals:
+                sig = self._signals.pop(0)
+                if sig == signal.SIGHUP:
+                    self.reload()
+                    continue
+
+                self.stop()
+                return
+
+            while len(self.workers) < self.config.workers:
+                self._spawn()
+
+            time.sleep(0.1)
+
+    def reload(self) -> None:
+        """
+        Replace every worker, starting each replacement before draining the old
+        """
+        for pid in list(self.workers):
+            self._spawn()
+            self._terminate([pid])
+
+    def stop(self) -> None:
+        """
+        Drain every worker
+        """
+        self._terminate(list(self.workers))
+        self._socket.close()
+
+    def _spawn(self) -> None:
+        """
+        Fork a worker
+        """
+        pid = os.fork()
+        if pid:
+            self.workers.add(pid)
+            return
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, signal.SIG_DFL)
+
+        code = 0
+        try:
+            self._serve()
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        finally:
+            os._exit(code)
+
+    def _serve(self) -> None:
+        """
+        Serve the preloaded app on the shared socket, in a worker
+        """
+        import uvicorn
+
+        from sonority.database import dispose_engine
+
+        dispose_engine()
+
+        config = uvicorn.Config(
+            self._app,
+            loop=self.config.loop,
+            http=self.config.http,
+            log_level=self.config.log_level,
+            timeout_graceful_shutdown=self.config.graceful_timeout,
+        )
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _terminate(self, pids: list[int]) -> None:
+        """
+        Ask workers to shut down gracefully, killing those that take too long
+        """
+        for pid in pids:
+            self._kill(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.config.graceful_timeout + 5
+        while any(pid in self.workers for pid in pids):
+            if time.monotonic() > deadline:
+                for pid in pids:
+                    self._kill(pid, signal.SIGKILL)
+            self._reap()
+            time.sleep(0.1)
+
+    def _kill(self, pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            self.workers.discard(pid)
+
+    def _reap(self) -> None:
+        """
+        Forget workers that have exited
+        """
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+
+            if not pid:
+                return
+
+            self.workers.discard(pid)
+
+
+def parse_args(argv: list[str] | None = None) -> LaunchConfig:
+    """
+    Parse the command line into a LaunchConfig
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m sonority", description="Run the sonority API server."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.WEB_CONCURRENCY,
+        help="number of worker processes (default: $WEB_CONCURRENCY or CPU count)",
+    )
+    parser.add_argument(
+        "--db-connection-budget",
+        dest="connection_budget",
+        type=int,
+        default=settings.DATABASE_CONNECTION_BUDGET,
+        help="database connections shared by all workers",
+    )
+    parser.add_argument("--loop", choices=["uvloop", "asyncio"], default="uvloop")
+    parser.add_argument("--http", choices=["httptools", "h11"], default="httptools")
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument(
+        "--graceful-timeout",
+        type=int,
+        default=30,
+        help="seconds a worker may take to drain before it is killed",
+    )
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    return LaunchConfig(**vars(args))
+
+
+def main(argv: list[str] | None = None) -> None:
+    """
+    Run the launcher from the command line
+    """
+    Launcher(parse_args(argv)).run()
+    sys.exit(0)
@@ -0,0 +1,2 @@
+from .exception_handlers import exception_handlers
+from .router import router
\ No newline at end of file
@@ -0,0 +1,36 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import Depends
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session
+from sonority.playlists.exceptions import PlaylistDoesNotExist
+from sonority.playlists.models import Playlist
+from sonority.playlists.service import check_playlist_owner, get_playlist_by_id
+
+
+def playlist_by_id(db: Session, playlist_id: UUID, _: CurrentUser):
+    """
+    Get a playlist by ID
+    """
+    playlist = get_playlist_by_id(db, playlist_id)
+    if not playlist:
+        raise PlaylistDoesNotExist("Playlist does not exist")
+
+    return playlist
+
+
+def owned_playlist_by_id(
+    playlist: Annotated[Playlist, Depends(playlist_by_id)],
+    user: CurrentUser,
+):
+    """
+    Get a playlist by ID that is owned by the current user
+    """
+    check_playlist_owner(playlist, user)
+    return playlist
+
+
+PlaylistById = Annotated[Playlist, Depends(playlist_by_id)]
+OwnedPlaylistById = Annotated[Playlist, Depends(owned_playlist_by_id)]
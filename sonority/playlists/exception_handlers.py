@@ -0,0 +1,51 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority.playlists.exceptions import (
+    InvalidPlaylistPosition,
+    PlaylistDoesNotExist,
+    PlaylistItemDoesNotExist,
+    PlaylistNotOwned,
+)
+
+
+async def playlist_does_not_exist_exception_handler(
+    request, exc: PlaylistDoesNotExist
+):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def playlist_not_owned_exception_handler(request, exc: PlaylistNotOwned):
+    return JSONResponse(
+        status_code=status.HTTP_403_FORBIDDEN,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def playlist_item_does_not_exist_exception_handler(
+    request, exc: PlaylistItemDoesNotExist
+):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def invalid_playlist_position_exception_handler(
+    request, exc: InvalidPlaylistPosition
+):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    PlaylistDoesNotExist: playlist_does_not_exist_exception_handler,
+    PlaylistNotOwned: playlist_not_owned_exception_handler,
+    PlaylistItemDoesNotExist: playlist_item_does_not_exist_exception_handler,
+    InvalidPlaylistPosition: invalid_playlist_position_exception_handler,
+}
@@ -0,0 +1,31 @@
+class PlaylistDoesNotExist(Exception):
+    """
+    Exception raised when a playlist does not exist
+    """
+
+    pass
+
+
+class PlaylistNotOwned(Exception):
+    """
+    Exception raised when a playlist is not owned by the current user
+    """
+
+    pass
+
+
+class PlaylistItemDoesNotExist(Exception):
+    """
+    Exception raised when an item is not in a playlist
+    """
+
+    pass
+
+
+class InvalidPlaylistPosition(Exception):
+    """
+    Exception raised when a position in a playlist is both after and before
+    an item
+    """
+
+    pass
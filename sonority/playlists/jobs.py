@@ -0,0 +1,14 @@
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.jobs import handler
+from sonority.playlists import service
+
+
+@handler("playlists.rebalance", every=settings.PLAYLISTS_REBALANCE_INTERVAL)
+def rebalance_playlists(db: Session, payload: dict):
+    """
+    Give the items of the playlists whose keys grew too long evenly spaced
+    keys again
+    """
+    service.rebalance_playlists(db)
@@ -0,0 +1,54 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Playlist(Base):
+    """
+    Model for a playlist of tracks
+    """
+
+    __tablename__ = "playlists"
+
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(nullable=False)
+    owner_id: Mapped[UUID] = mapped_column(
+        ForeignKey("users.id"), nullable=False, index=True
+    )
+    track_count: Mapped[int] = mapped_column(nullable=False, default=0)
+    # set when the rank keys of the items grew too long, see service.py
+    needs_rebalance: Mapped[bool] = mapped_column(nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+
+class PlaylistItem(Base):
+    """
+    Model for a track in a playlist
+
+    Items are in the order of their rank keys, see sonority/ranking.py, and
+    the unique constraint is the playlist in that order
+    """
+
+    __tablename__ = "playlist_items"
+    __table_args__ = (
+        UniqueConstraint("playlist_id", "rank", name="uq_playlist_item_rank"),
+    )
+
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    playlist_id: Mapped[UUID] = mapped_column(
+        ForeignKey("playlists.id", ondelete="CASCADE"), nullable=False
+    )
+    rank: Mapped[str] = mapped_column(nullable=False)
+    track_id: Mapped[UUID] = mapped_column(nullable=False)
+    added_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
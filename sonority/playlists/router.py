@@ -0,0 +1,124 @@
+from uuid import UUID
+
+from fastapi import APIRouter, status
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session, Skip, Take, SKIP_DEFAULT, TAKE_DEFAULT
+from sonority.playlists import service
+from sonority.playlists.dependencies import OwnedPlaylistById, PlaylistById
+from sonority.playlists.schemas import (
+    PlaylistCreateSchema,
+    PlaylistItemSchema,
+    PlaylistPositionSchema,
+    PlaylistSchema,
+    PlaylistTracksAddSchema,
+    PlaylistUpdateSchema,
+)
+
+
+router = APIRouter(prefix="/playlists", tags=["playlists"])
+
+
+@router.post(
+    "/new", response_model=PlaylistSchema, status_code=status.HTTP_201_CREATED
+)
+def new_playlist(db: Session, playlist_schema: PlaylistCreateSchema, user: CurrentUser):
+    """
+    Create a new playlist
+    """
+    return service.create_playlist(db, playlist_schema, user)
+
+
+@router.get("/mine", response_model=list[PlaylistSchema])
+def get_my_playlists(
+    db: Session,
+    user: CurrentUser,
+    skip: Skip = SKIP_DEFAULT,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the playlists of the current user, last updated first
+    """
+    return service.get_playlists(db, user, skip=skip, take=take)
+
+
+@router.get("/{playlist_id}", response_model=PlaylistSchema)
+def get_playlist(playlist: PlaylistById):
+    """
+    Get a playlist by ID
+    """
+    return playlist
+
+
+@router.patch("/{playlist_id}", response_model=PlaylistSchema)
+def update_playlist(
+    db: Session,
+    playlist: OwnedPlaylistById,
+    playlist_schema: PlaylistUpdateSchema,
+):
+    """
+    Update a playlist
+    """
+    return service.update_playlist(db, playlist, playlist_schema)
+
+
+@router.delete("/{playlist_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_playlist(db: Session, playlist: OwnedPlaylistById):
+    """
+    Delete a playlist
+    """
+    service.delete_playlist(db, playlist)
+
+
+@router.get("/{playlist_id}/items", response_model=list[PlaylistItemSchema])
+def get_playlist_items(
+    db: Session,
+    playlist: PlaylistById,
+    skip: Skip = SKIP_DEFAULT,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the tracks of a playlist, in order
+    """
+    return service.get_items(db, playlist, skip=skip, take=take)
+
+
+@router.post(
+    "/{playlist_id}/items",
+    response_model=list[PlaylistItemSchema],
+    status_code=status.HTTP_201_CREATED,
+)
+def add_playlist_tracks(
+    db: Session,
+    playlist: OwnedPlaylistById,
+    tracks_schema: PlaylistTracksAddSchema,
+):
+    """
+    Add tracks to a playlist, in order, right after or before an item, or at
+    the end
+    """
+    return service.add_tracks(db, playlist, tracks_schema)
+
+
+@router.patch("/{playlist_id}/items/{item_id}", response_model=PlaylistItemSchema)
+def move_playlist_item(
+    db: Session,
+    playlist: OwnedPlaylistById,
+    item_id: UUID,
+    position: PlaylistPositionSchema,
+):
+    """
+    Move a track of a playlist right after or before another, or to the end
+    """
+    item = service.get_item(db, playlist, item_id)
+    return service.move_item(db, playlist, item, position)
+
+
+@router.delete(
+    "/{playlist_id}/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+def remove_playlist_item(db: Session, playlist: OwnedPlaylistById, item_id: UUID):
+    """
+    Remove a track from a playlist
+    """
+    service.remove_item(db, playlist, service.get_item(db, playlist, item_id))
@@ -0,0 +1,72 @@
+from datetime import datetime
+from typing import Annotated
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict, Field
+
+# the most tracks that can be added to a playlist at once
+MAX_TRACKS_ADDED = 500
+
+
+class PlaylistCreateSchema(BaseModel):
+    """
+    Schema for creating a playlist
+    """
+
+    name: str
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class PlaylistUpdateSchema(BaseModel):
+    """
+    Schema for updating a playlist
+    """
+
+    name: str | None = None
+
+
+class PlaylistSchema(PlaylistCreateSchema):
+    """
+    Schema for a playlist returned by the API
+    """
+
+    id: UUID
+    owner_id: UUID
+    track_count: int
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True, **PlaylistCreateSchema.model_config)
+
+
+class PlaylistPositionSchema(BaseModel):
+    """
+    Schema for a position in a playlist, right after or right before an item
+
+    With neither, the position is the end of the playlist
+    """
+
+    after: UUID | None = None
+    before: UUID | None = None
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class PlaylistTracksAddSchema(PlaylistPositionSchema):
+    """
+    Schema for adding tracks to a playlist, in order, at a position
+    """
+
+    track_ids: Annotated[list[UUID], Field(min_length=1, max_length=MAX_TRACKS_ADDED)]
+
+
+class PlaylistItemSchema(BaseModel):
+    """
+    Schema for a track in a playlist
+    """
+
+    id: UUID
+    track_id: UUID
+    added_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
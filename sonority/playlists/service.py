@@ -0,0 +1,318 @@
+"""
+This file implements playlists.
+
+Items are in the order of their rank keys (see sonority/ranking.py) rather
+than of integer positions, so adding, moving or removing an item writes that
+item alone, however long the playlist. Edits of a playlist are serialized by
+locking its row, so two edits never pick the same key.
+
+Keys grow as items are put between the same two others. When an edit gives a
+key longer than PLAYLISTS_MAX_KEY_LENGTH the playlist is marked, and a
+periodic job gives the items of marked playlists evenly spaced keys again,
+see jobs.py.
+"""
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from sonority import ranking, settings
+from sonority.auth.models import User
+from sonority.playlists.exceptions import (
+    InvalidPlaylistPosition,
+    PlaylistItemDoesNotExist,
+    PlaylistNotOwned,
+)
+from sonority.playlists.models import Playlist, PlaylistItem
+from sonority.playlists.schemas import (
+    PlaylistCreateSchema,
+    PlaylistPositionSchema,
+    PlaylistTracksAddSchema,
+    PlaylistUpdateSchema,
+)
+
+
+def _commit_and_refresh(db: Session, playlist: Playlist):
+    """
+    Commit and refresh a playlist
+    """
+    db.commit()
+    db.refresh(playlist)
+    return playlist
+
+
+def get_playlist_by_id(db: Session, playlist_id: UUID):
+    """
+    Get a playlist by ID
+    """
+    return db.get(Playlist, playlist_id)
+
+
+def check_playlist_owner(playlist: Playlist, user: User):
+    """
+    Check if a playlist belongs to a user
+    """
+    if playlist.owner_id != user.id:
+        raise PlaylistNotOwned("Playlist does not belong to user")
+
+
+def create_playlist(db: Session, playlist_schema: PlaylistCreateSchema, user: User):
+    """
+    Create a playlist
+    """
+    playlist = Playlist(**playlist_schema.model_dump(), owner_id=user.id)
+    db.add(playlist)
+    return _commit_and_refresh(db, playlist)
+
+
+def update_playlist(
+    db: Session, playlist: Playlist, playlist_schema: PlaylistUpdateSchema
+):
+    """
+    Update a playlist
+    """
+    if not playlist_schema.name:
+        return playlist
+
+    playlist.name = playlist_schema.name
+    return _commit_and_refresh(db, playlist)
+
+
+def delete_playlist(db: Session, playlist: Playlist):
+    """
+    Delete a playlist and its items
+    """
+    db.execute(delete(PlaylistItem).where(PlaylistItem.playlist_id == playlist.id))
+    db.delete(playlist)
+    db.commit()
+
+
+def get_playlists(db: Session, user: User, *, skip: int, take: int):
+    """
+    Get the playlists of a user, last updated first
+    """
+    return (
+        db.execute(
+            select(Playlist)
+            .where(Playlist.owner_id == user.id)
+            .order_by(Playlist.updated_at.desc())
+            .offset(skip)
+            .limit(take)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def get_items(db: Session, playlist: Playlist, *, skip: int, take: int):
+    """
+    Get the items of a playlist, in order
+    """
+    return (
+        db.execute(
+            select(PlaylistItem)
+            .where(PlaylistItem.playlist_id == playlist.id)
+            .order_by(PlaylistItem.rank)
+            .offset(skip)
+            .limit(take)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def get_item(db: Session, playlist: Playlist, item_id: UUID):
+    """
+    Get an item of a playlist by ID
+
+    Raise PlaylistItemDoesNotExist if the playlist has no such item
+    """
+    item = db.execute(
+        select(PlaylistItem).where(
+            PlaylistItem.id == item_id, PlaylistItem.playlist_id == playlist.id
+        )
+    ).scalar_one_or_none()
+    if not item:
+        raise PlaylistItemDoesNotExist("Item is not in playlist")
+
+    return item
+
+
+def _lock(db: Session, playlist: Playlist):
+    """
+    Lock a playlist until the transaction ends, serializing its edits
+    """
+    db.refresh(playlist, with_for_update=True)
+
+
+def _next_rank(
+    db: Session,
+    playlist: Playlist,
+    rank: str | None,
+    direction: int,
+    moving: PlaylistItem | None,
+):
+    """
+    The key of the item after rank, or before it with a direction of -1,
+    leaving out the item being moved
+
+    With rank None, the key of the first or the last item
+    """
+    query = select(PlaylistItem.rank).where(PlaylistItem.playlist_id == playlist.id)
+    if moving:
+        query = query.where(PlaylistItem.id != moving.id)
+    if direction > 0:
+        if rank is not None:
+            query = query.where(PlaylistItem.rank > rank)
+        query = query.order_by(PlaylistItem.rank)
+    else:
+        if rank is not None:
+            query = query.where(PlaylistItem.rank < rank)
+        query = query.order_by(PlaylistItem.rank.desc())
+    return db.execute(query.limit(1)).scalar_one_or_none()
+
+
+def _bounds(
+    db: Session,
+    playlist: Playlist,
+    position: PlaylistPositionSchema,
+    moving: PlaylistItem | None = None,
+):
+    """
+    The keys of the items on either side of a position, None at the ends
+
+    Raise InvalidPlaylistPosition if the position is both after and before
+    an item
+    """
+    if position.after and position.before:
+        raise InvalidPlaylistPosition("Position is both after and before an item")
+
+    if position.after:
+        rank = get_item(db, playlist, position.after).rank
+        return rank, _next_rank(db, playlist, rank, 1, moving)
+    if position.before:
+        rank = get_item(db, playlist, position.before).rank
+        return _next_rank(db, playlist, rank, -1, moving), rank
+    return _next_rank(db, playlist, None, -1, moving), None
+
+
+def _mark_if_unbalanced(playlist: Playlist, keys: list[str]):
+    """
+    Mark a playlist for rebalancing if any of keys is too long
+    """
+    if max(map(len, keys)) > settings.PLAYLISTS_MAX_KEY_LENGTH:
+        playlist.needs_rebalance = True
+
+
+def add_tracks(
+    db: Session, playlist: Playlist, tracks_schema: PlaylistTracksAddSchema
+):
+    """
+    Add tracks to a playlist at a position, in order, and commit
+
+    Returns the items added, as rows
+    """
+    _lock(db, playlist)
+    before, after = _bounds(db, playlist, tracks_schema)
+    keys = ranking.keys_between(before, after, len(tracks_schema.track_ids))
+
+    now = datetime.utcnow()
+    items = [
+        {
+            "id": uuid4(),
+            "playlist_id": playlist.id,
+            "rank": key,
+            "track_id": track_id,
+            "added_at": now,
+        }
+        for key, track_id in zip(keys, tracks_schema.track_ids)
+    ]
+    db.execute(insert(PlaylistItem), items)
+    playlist.track_count += len(items)
+    _mark_if_unbalanced(playlist, keys)
+    db.commit()
+    return items
+
+
+def move_item(
+    db: Session,
+    playlist: Playlist,
+    item: PlaylistItem,
+    position: PlaylistPositionSchema,
+):
+    """
+    Move an item of a playlist to a position, and commit
+    """
+    _lock(db, playlist)
+    item.rank = ranking.key_between(*_bounds(db, playlist, position, item))
+    playlist.updated_at = datetime.utcnow()
+    _mark_if_unbalanced(playlist, [item.rank])
+    db.commit()
+    return item
+
+
+def remove_item(db: Session, playlist: Playlist, item: PlaylistItem):
+    """
+    Remove an item from a playlist, and commit
+    """
+    _lock(db, playlist)
+    db.delete(item)
+    playlist.track_count -= 1
+    db.commit()
+
+
+def rebalance_playlist(db: Session, playlist: Playlist):
+    """
+    Give the items of a playlist evenly spaced keys, in the same order, and
+    commit
+
+    Returns the number of items
+    """
+    _lock(db, playlist)
+    items = db.execute(
+        select(PlaylistItem.id, PlaylistItem.track_id, PlaylistItem.added_at)
+        .where(PlaylistItem.playlist_id == playlist.id)
+        .order_by(PlaylistItem.rank)
+    ).all()
+    rows = [
+        {
+            "id": item_id,
+            "playlist_id": playlist.id,
+            "rank": key,
+            "track_id": track_id,
+            "added_at": added_at,
+        }
+        for (item_id, track_id, added_at), key in zip(
+            items, ranking.spread_keys(len(items))
+        )
+    ]
+
+    # updating keys in place could collide with keys not updated yet
+    db.execute(delete(PlaylistItem).where(PlaylistItem.playlist_id == playlist.id))
+    if rows:
+        db.execute(insert(PlaylistItem), rows)
+    # rebalancing does not change the playlist as users see it
+    db.execute(
+        update(Playlist)
+        .where(Playlist.id == playlist.id)
+        .values(needs_rebalance=False, updated_at=Playlist.updated_at)
+    )
+    db.commit()
+    return len(rows)
+
+
+def rebalance_playlists(db: Session):
+    """
+    Rebalance every playlist marked for it, committing each
+
+    Returns the number of playlists rebalanced
+    """
+    playlists = (
+        db.execute(select(Playlist).where(Playlist.needs_rebalance == True))  # noqa
+        .scalars()
+        .all()
+    )
+    for playlist in playlists:
+        rebalance_playlist(db, playlist)
+    return len(playlists)
@@ -0,0 +1,237 @@
+"""
+This file implements the in-memory buffer that plays are written through.
+
+Accepted plays are held in memory and written in bulk by a background
+thread, once PLAYS_FLUSH_SIZE of them are pending or every
+PLAYS_FLUSH_INTERVAL seconds. When more than PLAYS_BUFFER_MAX are pending,
+new plays are refused until the writes catch up.
+
+The buffer is started and stopped with the app. Stopping writes whatever is
+pending; if that fails, the plays are spilled to a file in PLAYS_SPOOL_DIR,
+which the next process to start writes to the database. Plays are only
+lost if the process dies without stopping.
+
+Plays the database rejects, rather than fails to write, would fail every
+retry and hold up the plays behind them. They are moved to a dead-letter
+file in PLAYS_SPOOL_DIR instead, which is kept for inspection and never
+written again.
+"""
+import json
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Callable
+from uuid import UUID, uuid4
+
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.plays.exceptions import PlayBufferFull
+
+logger = logging.getLogger("sonority.plays")
+
+
+def _dump(play: dict) -> str:
+    return json.dumps(
+        {
+            "user_id": str(play["user_id"]),
+            "album_id": str(play["album_id"]),
+            "track_id": play["track_id"] and str(play["track_id"]),
+            "played_at": play["played_at"].isoformat(),
+        }
+    )
+
+
+def _load(line: str) -> dict:
+    play = json.loads(line)
+    return {
+        "user_id": UUID(play["user_id"]),
+        "album_id": UUID(play["album_id"]),
+        "track_id": play["track_id"] and UUID(play["track_id"]),
+        "played_at": datetime.fromisoformat(play["played_at"]),
+    }
+
+
+class PlayBuffer:
+    """
+    Holds accepted plays until they are written to the database in bulk
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        flush_size: int,
+        flush_interval: float,
+        spool_dir: Path,
+        session_factory: Callable[[], Session] | None = None,
+    ):
+        self.max_size = max_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.spool_dir = spool_dir
+        self.session_factory = session_factory
+        self._pending: deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def add(self, plays: list[dict]) -> None:
+        """
+        Accept plays for writing
+
+        Raise PlayBufferFull if there is no room for all of them
+        """
+        with self._lock:
+            if len(self._pending) + len(plays) > self.max_size:
+                raise PlayBufferFull("Too many plays pending, retry later")
+            self._pending.extend(plays)
+            if len(self._pending) >= self.flush_size:
+                self._wakeup.set()
+
+    def _write(self, plays: list[dict]) -> int:
+        """
+        Write plays, moving those the database rejects to a dead-letter file
+
+        Returns the number written
+        """
+        from sonority.database import get_sessionmaker
+        from sonority.plays.service import write_plays
+
+        session_factory = self.session_factory or get_sessionmaker()
+        with session_factory() as db:
+            written, rejected = write_plays(db, plays)
+        if rejected:
+            path = self._spool("rejected", rejected)
+            logger.error("%d plays were rejected, moved to %s", len(rejected), path)
+        return written
+
+    def flush(self) -> int:
+        """
+        Write the pending plays, flush_size at a time
+
+        Plays that fail to be written stay pending, and plays the database
+        rejects are moved aside. Returns the number written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    count = min(self.flush_size, len(self._pending))
+                    batch = [self._pending.popleft() for _ in range(count)]
+                if not batch:
+                    return written
+
+                try:
+                    written += self._write(batch)
+                except Exception:
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    raise
+
+    def _spool(self, prefix: str, plays: list[dict]) -> Path:
+        """
+        Write plays to a new file in the spool directory
+        """
+        self.spool_dir.mkdir(parents=True, exist_ok=True)
+        path = self.spool_dir / f"{prefix}-{os.getpid()}-{uuid4().hex}.jsonl"
+        with open(path, "w") as file:
+            file.writelines(_dump(play) + "\n" for play in plays)
+            file.flush()
+            os.fsync(file.fileno())
+        return path
+
+    def spill(self) -> Path | None:
+        """
+        Move the pending plays to a new file in the spool directory
+        """
+        with self._lock:
+            plays, self._pending = list(self._pending), deque()
+        if not plays:
+            return None
+
+        return self._spool("plays", plays)
+
+    def recover(self) -> int:
+        """
+        Write the plays spilled by processes that could not write them
+
+        Each file is claimed by renaming it, so concurrent processes do not
+        write the same plays twice. Returns the number of plays written
+        """
+        recovered = 0
+        for path in sorted(self.spool_dir.glob("plays-*.jsonl")):
+            claimed = path.with_suffix(".claimed")
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            plays = [_load(line) for line in claimed.read_text().splitlines()]
+            try:
+                recovered += self._write(plays)
+            except Exception:
+                os.rename(claimed, path)
+                raise
+            claimed.unlink()
+        return recovered
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("failed to write plays, retrying")
+
+    def start(self) -> None:
+        """
+        Write spilled plays, then start writing plays in the background
+        """
+        try:
+            self.recover()
+        except Exception:
+            logger.exception("failed to write spilled plays")
+
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="plays", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop writing in the background, and write or spill the pending plays
+        """
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("failed to write plays, spilled to %s", self.spill())
+
+    def clear(self) -> None:
+        """
+        Drop the pending plays
+        """
+        with self._lock:
+            self._pending.clear()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+play_buffer = PlayBuffer(
+    max_size=settings.PLAYS_BUFFER_MAX,
+    flush_size=settings.PLAYS_FLUSH_SIZE,
+    flush_interval=settings.PLAYS_FLUSH_INTERVAL,
+    spool_dir=settings.PLAYS_SPOOL_DIR,
+)
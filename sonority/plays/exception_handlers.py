@@ -0,0 +1,26 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority import settings
+from sonority.plays.exceptions import InvalidHistoryCursor, PlayBufferFull
+
+
+async def play_buffer_full_exception_handler(request, exc: PlayBufferFull):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": exc.args[0]},
+        headers={"Retry-After": str(settings.PLAYS_RETRY_AFTER)},
+    )
+
+
+async def invalid_history_cursor_exception_handler(request, exc: InvalidHistoryCursor):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    InvalidHistoryCursor: invalid_history_cursor_exception_handler,
+    PlayBufferFull: play_buffer_full_exception_handler,
+}
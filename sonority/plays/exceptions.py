@@ -0,0 +1,14 @@
+class PlayBufferFull(Exception):
+    """
+    Exception raised when plays arrive faster than they can be written
+    """
+
+    pass
+
+
+class InvalidHistoryCursor(Exception):
+    """
+    Exception raised when a listening history cursor cannot be decoded
+    """
+
+    pass
@@ -0,0 +1,177 @@
+"""
+This file implements the listening history of users.
+
+Every play is also written to listening_history, keyed by user and time, so
+the latest plays of a user are a range of the primary key, read a page at a
+time from a cursor. Plays are kept for HISTORY_RETENTION_DAYS.
+
+On Postgres the table is partitioned by time, HISTORY_PARTITION_DAYS to a
+partition, so old plays are dropped a partition at a time instead of row by
+row. Partitions are created HISTORY_PARTITIONS_AHEAD ahead of the current
+one, so writes never lack one. SQLite has no partitioning, and old plays
+are deleted instead. Both are done by a periodic job, see jobs.py.
+"""
+from datetime import datetime, timedelta
+
+from sqlalchemy import Connection, delete, insert, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums import service as albums_service
+from sonority.auth.models import User
+from sonority.plays.exceptions import InvalidHistoryCursor
+from sonority.plays.models import HistoryEntry
+
+EPOCH = datetime(1970, 1, 1)
+PARTITION_PREFIX = "listening_history_p"
+
+
+def cutoff(now: datetime):
+    """
+    The time plays in the history must be newer than
+    """
+    return now - timedelta(days=settings.HISTORY_RETENTION_DAYS)
+
+
+def add_to_history(db: Session, plays: list[dict]):
+    """
+    Add written plays, with their play_id, to the history, without committing
+
+    Plays older than the cutoff are left out
+    """
+    oldest = cutoff(datetime.utcnow())
+    entries = [play for play in plays if play["played_at"] >= oldest]
+    if entries:
+        db.execute(insert(HistoryEntry), entries)
+
+
+def partition_start(at: datetime):
+    """
+    The start of the partition a time falls in
+    """
+    days = settings.HISTORY_PARTITION_DAYS
+    return EPOCH + timedelta(days=(at - EPOCH).days // days * days)
+
+
+def _get_partitions(db: Session):
+    """
+    The partitions of listening_history, by start
+    """
+    names = db.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = 'listening_history'::regclass"
+        )
+    ).scalars()
+    return {
+        datetime.strptime(name.removeprefix(PARTITION_PREFIX), "%Y%m%d"): name
+        for name in names
+        if name.startswith(PARTITION_PREFIX)
+    }
+
+
+def create_partitions(db: Session | Connection, now: datetime):
+    """
+    Create the partitions from the cutoff to HISTORY_PARTITIONS_AHEAD after
+    the current one, without committing
+    """
+    size = timedelta(days=settings.HISTORY_PARTITION_DAYS)
+    start = partition_start(cutoff(now))
+    last = partition_start(now) + size * settings.HISTORY_PARTITIONS_AHEAD
+    while start <= last:
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {PARTITION_PREFIX}{start:%Y%m%d} "
+                "PARTITION OF listening_history "
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{(start + size).isoformat()}')"
+            )
+        )
+        start += size
+
+
+def drop_partitions(db: Session, now: datetime):
+    """
+    Drop the partitions that only hold plays older than the cutoff, without
+    committing
+
+    Returns the number of partitions dropped
+    """
+    oldest = partition_start(cutoff(now))
+    dropped = 0
+    for start, name in _get_partitions(db).items():
+        if start < oldest:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped += 1
+    return dropped
+
+
+def maintain_history(db: Session, now: datetime | None = None):
+    """
+    Drop the plays older than the cutoff, create the partitions to come, and
+    commit
+    """
+    now = now or datetime.utcnow()
+    if db.get_bind().dialect.name == "postgresql":
+        drop_partitions(db, now)
+        create_partitions(db, now)
+    else:
+        db.execute(delete(HistoryEntry).where(HistoryEntry.played_at < cutoff(now)))
+    db.commit()
+
+
+def encode_cursor(played_at: datetime, play_id: int):
+    """
+    Encode the position of a play in a history
+    """
+    return f"{played_at.isoformat()}_{play_id}"
+
+
+def decode_cursor(cursor: str):
+    """
+    Decode a position encoded by encode_cursor
+
+    Raise InvalidHistoryCursor if the cursor is malformed
+    """
+    try:
+        played_at, play_id = cursor.split("_")
+        return datetime.fromisoformat(played_at), int(play_id)
+    except ValueError:
+        raise InvalidHistoryCursor("Invalid history cursor")
+
+
+def get_history(db: Session, user: User, *, before: str | None, take: int):
+    """
+    Get a page of the plays of a user, newest first, with their albums
+
+    Plays of albums since deleted are left out. Returns (plays, next_cursor),
+    next_cursor being None on the last page
+    """
+    query = select(HistoryEntry).where(
+        HistoryEntry.user_id == user.id,
+        HistoryEntry.played_at >= cutoff(datetime.utcnow()),
+    )
+    if before:
+        position = tuple_(HistoryEntry.played_at, HistoryEntry.play_id)
+        query = query.where(position < decode_cursor(before))
+    order = (HistoryEntry.played_at.desc(), HistoryEntry.play_id.desc())
+    entries = db.execute(query.order_by(*order).limit(take + 1)).scalars().all()
+
+    next_cursor = None
+    if len(entries) > take:
+        entries = entries[:take]
+        next_cursor = encode_cursor(entries[-1].played_at, entries[-1].play_id)
+
+    albums = albums_service.get_albums_by_ids(db, [entry.album_id for entry in entries])
+    by_id = {album.id: album for album in albums}
+    plays = [
+        {
+            "album": by_id[entry.album_id],
+            "track_id": entry.track_id,
+            "played_at": entry.played_at,
+        }
+        for entry in entries
+        if entry.album_id in by_id
+    ]
+    return plays, next_cursor
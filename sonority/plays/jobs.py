@@ -0,0 +1,39 @@
+"""
+This file implements the rollup of plays and the upkeep of the listening
+history, done by the jobs worker.
+"""
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.jobs import handler, schedule
+from sonority.plays import history
+from sonority.plays.rollup import has_pending_plays, roll_up_plays
+
+
+def schedule_rollup(db: Session):
+    """
+    Enqueue a rollup at the end of the current PLAYS_ROLLUP_INTERVAL, unless
+    one is already, and commit
+    """
+    return schedule(db, "plays.roll_up", interval=settings.PLAYS_ROLLUP_INTERVAL)
+
+
+@handler("plays.roll_up")
+def roll_up(db: Session, payload: dict):
+    """
+    Roll up every play written since the last rollup, and schedule another
+    for those written too recently
+    """
+    while roll_up_plays(db):
+        pass
+    if has_pending_plays(db):
+        schedule_rollup(db)
+
+
+@handler("plays.maintain_history", every=settings.HISTORY_MAINTENANCE_INTERVAL)
+def maintain(db: Session, payload: dict):
+    """
+    Drop the plays past the retention of the history, and create the
+    partitions to come
+    """
+    history.maintain_history(db)
@@ -0,0 +1,112 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import BigInteger, event, ForeignKey, Index, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Play(Base):
+    """
+    Model for a user listening to an album
+    """
+
+    __tablename__ = "plays"
+    __table_args__ = (Index("ix_plays_user_id_played_at", "user_id", "played_at"),)
+
+    # increasing, so consumers can process new plays from a watermark
+    id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    user_id: Mapped[UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    album_id: Mapped[UUID] = mapped_column(
+        ForeignKey("albums.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    # reported by clients and not checked, so not a foreign key to tracks
+    track_id: Mapped[UUID] = mapped_column(nullable=True)
+    played_at: Mapped[datetime] = mapped_column(nullable=False)
+    # when the play was written, unlike played_at which clients report
+    written_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
+
+
+class HistoryEntry(Base):
+    """
+    Model for a play in the listening history of a user
+
+    Kept for HISTORY_RETENTION_DAYS. On Postgres the table is partitioned by
+    the time of the play, see history.py
+    """
+
+    __tablename__ = "listening_history"
+    __table_args__ = {"postgresql_partition_by": "RANGE (played_at)"}
+
+    # in the order history is read in, newest first by user
+    user_id: Mapped[UUID] = mapped_column(primary_key=True)
+    played_at: Mapped[datetime] = mapped_column(primary_key=True)
+    play_id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), primary_key=True
+    )
+    album_id: Mapped[UUID] = mapped_column(nullable=False)
+    track_id: Mapped[UUID] = mapped_column(nullable=True)
+
+
+@event.listens_for(HistoryEntry.__table__, "after_create")
+def create_history_partitions(target, connection, **kw):
+    """
+    Create the partitions of the history along with the table, so plays can
+    be written before the maintenance job first runs
+    """
+    if connection.dialect.name == "postgresql":
+        from sonority.plays import history
+
+        history.create_partitions(connection, datetime.utcnow())
+
+
+class PlayCount(Base):
+    """
+    Model for the plays of a track, album or artist in an hour or a day
+
+    Written by the rollup, see rollup.roll_up_plays
+    """
+
+    __tablename__ = "play_counts"
+
+    # track, album or artist
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    subject_id: Mapped[UUID] = mapped_column(primary_key=True)
+    # hour or day
+    granularity: Mapped[str] = mapped_column(primary_key=True)
+    starts_at: Mapped[datetime] = mapped_column(primary_key=True)
+    play_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class PlayTotal(Base):
+    """
+    Model for the plays of a track, album or artist of all time
+
+    Written by the rollup, see rollup.roll_up_plays
+    """
+
+    __tablename__ = "play_totals"
+
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    subject_id: Mapped[UUID] = mapped_column(primary_key=True)
+    play_count: Mapped[int] = mapped_column(nullable=False)
+
+
+class PlayWatermark(Base):
+    """
+    Model for the last play processed by a consumer of plays
+    """
+
+    __tablename__ = "play_watermarks"
+
+    consumer: Mapped[str] = mapped_column(primary_key=True)
+    play_id: Mapped[int] = mapped_column(
+        BigInteger().with_variant(Integer, "sqlite"), nullable=False
+    )
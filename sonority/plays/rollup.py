@@ -0,0 +1,171 @@
+"""
+This file implements the rollup of plays into play counts.
+
+Play counts are kept per track, album and artist, by hour, by day and of
+all time, so totals are read without counting plays. The plays of albums
+and artists also count towards the charts. The rollup reads the
+plays written since its watermark, in order of id, and adds them to the
+counts in the same transaction that moves the watermark, so every play is
+counted once.
+
+Ids are given out as plays are inserted, but concurrent writes can commit
+in another order, so a play can become visible after plays with higher
+ids. The rollup only moves the watermark over plays written more than
+PLAYS_ROLLUP_LAG seconds ago, by which time every play with a lower id has
+been committed.
+
+The rollup runs as a job, scheduled whenever plays are written and at most
+once every PLAYS_ROLLUP_INTERVAL seconds, so counts lag plays by about that,
+see jobs.py.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import takewhile
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.models import Album
+from sonority.charts import service as charts_service
+from sonority.plays.models import Play, PlayCount, PlayTotal, PlayWatermark
+
+CONSUMER = "rollup"
+
+
+def _insert(db: Session, model):
+    """
+    An INSERT into the table of model that can handle conflicts
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    return insert(model)
+
+
+def _add_counts(db: Session, model, rows: list[dict]):
+    """
+    Add the play counts of rows to those already in the table of model
+    """
+    statement = _insert(db, model)
+    db.execute(
+        statement.on_conflict_do_update(
+            index_elements=[key.name for key in model.__table__.primary_key],
+            set_={"play_count": model.play_count + statement.excluded.play_count},
+        ),
+        rows,
+    )
+
+
+def _lock_watermark(db: Session, consumer: str):
+    """
+    Get the last play processed by consumer, locked until the transaction ends
+    """
+    db.execute(
+        _insert(db, PlayWatermark)
+        .values(consumer=consumer, play_id=0)
+        .on_conflict_do_nothing()
+    )
+    return db.execute(
+        select(PlayWatermark.play_id)
+        .where(PlayWatermark.consumer == consumer)
+        .with_for_update()
+    ).scalar_one()
+
+
+def _buckets(played_at: datetime):
+    hour = played_at.replace(minute=0, second=0, microsecond=0)
+    return ("hour", hour), ("day", hour.replace(hour=0))
+
+
+def roll_up_plays(db: Session, *, batch_size: int | None = None):
+    """
+    Add the next batch of plays since the watermark to the play counts, and
+    commit
+
+    Plays written in the last PLAYS_ROLLUP_LAG seconds are left for a later
+    rollup, along with every play after them. Returns the number of plays
+    rolled up
+    """
+    batch_size = batch_size or settings.PLAYS_ROLLUP_BATCH_SIZE
+    horizon = datetime.utcnow() - timedelta(seconds=settings.PLAYS_ROLLUP_LAG)
+    watermark = _lock_watermark(db, CONSUMER)
+    rows = db.execute(
+        select(
+            Play.id,
+            Play.track_id,
+            Play.album_id,
+            Album.artist_id,
+            Play.played_at,
+            Play.written_at,
+        )
+        .join(Album, Album.id == Play.album_id)
+        .where(Play.id > watermark)
+        .order_by(Play.id)
+        .limit(batch_size)
+    ).all()
+    # a play with a lower id than these may not be committed yet
+    plays = list(takewhile(lambda play: play.written_at <= horizon, rows))
+    if not plays:
+        db.rollback()
+        return 0
+
+    counts, totals, activity = Counter(), Counter(), Counter()
+    for _, track_id, album_id, artist_id, played_at, _ in plays:
+        subjects = [("album", album_id), ("artist", artist_id)]
+        for subject in subjects:
+            activity[subject + (charts_service.bucket(played_at),)] += 1
+        if track_id is not None:
+            subjects.append(("track", track_id))
+        for subject in subjects:
+            totals[subject] += 1
+            for bucket in _buckets(played_at):
+                counts[subject + bucket] += 1
+
+    keys = ("kind", "subject_id", "granularity", "starts_at")
+    _add_counts(
+        db,
+        PlayCount,
+        [{**dict(zip(keys, key)), "play_count": n} for key, n in counts.items()],
+    )
+    _add_counts(
+        db,
+        PlayTotal,
+        [
+            {"kind": kind, "subject_id": subject_id, "play_count": n}
+            for (kind, subject_id), n in totals.items()
+        ],
+    )
+    charts_service.record_activity(
+        db,
+        [
+            charts_service.activity(kind, subject_id, starts_at, plays=n)
+            for (kind, subject_id, starts_at), n in activity.items()
+        ],
+    )
+    db.execute(
+        update(PlayWatermark)
+        .where(PlayWatermark.consumer == CONSUMER)
+        .values(play_id=plays[-1].id)
+    )
+    db.commit()
+    return len(plays)
+
+
+def has_pending_plays(db: Session):
+    """
+    Whether plays were written since the watermark, that the rollup has yet
+    to count
+    """
+    watermark = db.execute(
+        select(PlayWatermark.play_id).where(PlayWatermark.consumer == CONSUMER)
+    ).scalar_one_or_none()
+    play = db.execute(
+        select(Play.id)
+        .join(Album, Album.id == Play.album_id)
+        .where(Play.id > (watermark or 0))
+        .limit(1)
+    ).first()
+    return play is not None
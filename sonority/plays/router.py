@@ -0,0 +1,54 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Body, status
+from pydantic import Field
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session, Take, TAKE_DEFAULT
+from sonority.plays import history, service
+from sonority.plays.schemas import HistorySchema, PlayCreateSchema, PlaysAcceptedSchema
+
+
+router = APIRouter(prefix="/plays", tags=["plays"])
+
+history_router = APIRouter(prefix="/users/me/history", tags=["plays"])
+
+# the most plays that can be reported at once
+MAX_PLAYS = 500
+
+PlayBatch = Annotated[list[PlayCreateSchema], Field(min_length=1, max_length=MAX_PLAYS)]
+
+
+@router.post(
+    "/", response_model=PlaysAcceptedSchema, status_code=status.HTTP_202_ACCEPTED
+)
+def record_plays(
+    db: Session,
+    user: CurrentUser,
+    plays: Annotated[PlayCreateSchema | PlayBatch, Body()],
+):
+    """
+    Report one play, or a batch of plays, of the current user
+
+    Plays are written shortly after being accepted. When too many are
+    pending, they are refused with a 503 and a Retry-After header
+    """
+    if isinstance(plays, PlayCreateSchema):
+        plays = [plays]
+    return {"accepted": service.record_plays(db, user, plays)}
+
+
+@history_router.get("/", response_model=HistorySchema)
+def get_history(
+    db: Session,
+    user: CurrentUser,
+    before: str | None = None,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the latest plays of the current user, newest first
+
+    Pass the returned `next` cursor as `before` to get the following page
+    """
+    plays, next_cursor = history.get_history(db, user, before=before, take=take)
+    return {"plays": plays, "next": next_cursor}
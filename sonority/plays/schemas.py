@@ -0,0 +1,47 @@
+from datetime import datetime
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+from sonority.albums.schemas import AlbumOutSchema
+
+
+class PlayCreateSchema(BaseModel):
+    """
+    Schema for a play reported by a client
+
+    played_at defaults to the time the play is received
+    """
+
+    album_id: UUID
+    track_id: UUID | None = None
+    played_at: datetime | None = None
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class PlaysAcceptedSchema(BaseModel):
+    """
+    Schema for the plays accepted for writing
+    """
+
+    accepted: int
+
+
+class HistoryEntrySchema(BaseModel):
+    """
+    Schema for a play in the listening history
+    """
+
+    album: AlbumOutSchema
+    track_id: UUID | None
+    played_at: datetime
+
+
+class HistorySchema(BaseModel):
+    """
+    Schema for a page of the listening history, newest first
+    """
+
+    plays: list[HistoryEntrySchema]
+    next: str | None
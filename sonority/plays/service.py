@@ -0,0 +1,151 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from sonority.albums.exceptions import AlbumDoesNotExist
+from sonority.albums.models import Album
+from sonority.auth.models import User
+from sonority.plays import history
+from sonority.plays.buffer import play_buffer
+from sonority.plays.jobs import schedule_rollup
+from sonority.plays.models import Play, PlayTotal
+from sonority.plays.schemas import PlayCreateSchema
+
+
+def _played_at(schema: PlayCreateSchema, now: datetime):
+    """
+    The time of a play as naive UTC, never later than now
+    """
+    played_at = schema.played_at
+    if played_at is None:
+        return now
+    if played_at.tzinfo is not None:
+        played_at = played_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return min(played_at, now)
+
+
+def record_plays(db: Session, user: User, schemas: list[PlayCreateSchema]):
+    """
+    Accept plays of released albums for writing
+
+    Raise AlbumDoesNotExist if any album is not released, and PlayBufferFull
+    if the plays cannot be accepted right now
+    """
+    album_ids = {schema.album_id for schema in schemas}
+    released = db.execute(
+        select(Album.id).where(Album.id.in_(album_ids), Album.released == True)  # noqa
+    ).scalars()
+    if album_ids - set(released):
+        raise AlbumDoesNotExist("Album does not exist")
+
+    now = datetime.utcnow()
+    play_buffer.add(
+        [
+            {
+                "user_id": user.id,
+                "album_id": schema.album_id,
+                "track_id": schema.track_id,
+                "played_at": _played_at(schema, now),
+            }
+            for schema in schemas
+        ]
+    )
+    return len(schemas)
+
+
+def _insert_plays(db: Session, plays: list[dict]):
+    """
+    Insert plays in one bulk insert, and add them to the listening history
+    """
+    play_ids = db.execute(
+        insert(Play).returning(Play.id, sort_by_parameter_order=True), plays
+    ).scalars()
+    history.add_to_history(
+        db, [{**play, "play_id": play_id} for play, play_id in zip(plays, play_ids)]
+    )
+
+
+def _drop_deleted(db: Session, plays: list[dict]):
+    """
+    Leave out the plays of albums and users deleted since they were accepted
+    """
+    album_ids = {play["album_id"] for play in plays}
+    user_ids = {play["user_id"] for play in plays}
+    albums = set(db.execute(select(Album.id).where(Album.id.in_(album_ids))).scalars())
+    users = set(db.execute(select(User.id).where(User.id.in_(user_ids))).scalars())
+    return [
+        play
+        for play in plays
+        if play["album_id"] in albums and play["user_id"] in users
+    ]
+
+
+def _insert_each(db: Session, plays: list[dict]):
+    """
+    Insert plays one at a time, committing each
+
+    Returns the plays that could not be inserted
+    """
+    rejected = []
+    for play in plays:
+        try:
+            _insert_plays(db, [play])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            rejected.append(play)
+    return rejected
+
+
+def write_plays(db: Session, plays: list[dict]):
+    """
+    Write plays, commit, and schedule their rollup
+
+    Plays of albums or users deleted since they were accepted are dropped.
+    If the bulk insert fails, the plays are written one at a time. Returns
+    the number of plays written, and the plays that could still not be
+    """
+    rejected = []
+    try:
+        _insert_plays(db, plays)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        plays = _drop_deleted(db, plays)
+        rejected = _insert_each(db, plays)
+
+    schedule_rollup(db)
+    return len(plays) - len(rejected), rejected
+
+
+def get_play_counts(db: Session, kind: str, subject_ids: list[UUID]):
+    """
+    Get the play counts of all time of tracks, albums or artists, in one query
+
+    Returns a dict of ID to play count, as of the last rollup
+    """
+    counts = {subject_id: 0 for subject_id in subject_ids}
+    if not subject_ids:
+        return counts
+
+    rows = db.execute(
+        select(PlayTotal.subject_id, PlayTotal.play_count).where(
+            PlayTotal.kind == kind, PlayTotal.subject_id.in_(subject_ids)
+        )
+    ).all()
+    counts.update(rows)
+    return counts
+
+
+def annotate_play_counts(db: Session, kind: str, subjects: list):
+    """
+    Set play_count on each of a list of tracks, albums or artists, in one query
+    """
+    counts = get_play_counts(db, kind, [subject.id for subject in subjects])
+    for subject in subjects:
+        subject.play_count = counts[subject.id]
+
+    return subjects
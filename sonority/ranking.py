@@ -0,0 +1,165 @@
+"""
+This file implements ranking keys, for lists users put in any order.
+
+A rank key is a string of base 36 digits read as a fraction between 0 and 1:
+"i" is 0.5 and "0i" is 0.5 / 36. Items sort by their keys as plain strings,
+so putting an item between two others only takes a key between theirs, and
+no other item has to move. Keys never end in "0", so there is always room
+for one more between any two.
+
+Digits and lowercase letters sort in the same order under every collation,
+so the database orders keys as they are compared here.
+
+Inserting at the end or the start steps the last digit of the neighbouring
+key, and keys only grow once there is no room left at their length.
+Inserting between two items bisects them, and keys grow a digit for every
+few inserts at the same spot. spread_keys gives evenly spaced short keys, to
+rebalance a list whose keys grew too long.
+"""
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+
+# the key of the first item of an empty list
+FIRST_KEY = "i"
+
+
+def _encode(value: int, width: int):
+    """
+    value as width digits
+    """
+    digits = []
+    for _ in range(width):
+        value, digit = divmod(value, BASE)
+        digits.append(DIGITS[digit])
+    return "".join(reversed(digits))
+
+
+def _midpoint(low: str, high: str | None):
+    """
+    A key between low and high, low being "" for 0 and high None for 1
+    """
+    if high is not None:
+        # keep the digits low and high have in common
+        n = 0
+        while n < len(high) and (low[n] if n < len(low) else "0") == high[n]:
+            n += 1
+        if n > 0:
+            return high[:n] + _midpoint(low[n:], high[n:])
+
+    low_digit = DIGITS.index(low[0]) if low else 0
+    high_digit = DIGITS.index(high[0]) if high is not None else BASE
+    if high_digit - low_digit > 1:
+        return DIGITS[(low_digit + high_digit) // 2]
+    # the first digits are adjacent, so the key is found in the digits after
+    if high is not None and len(high) > 1:
+        return high[0]
+    return DIGITS[low_digit] + _midpoint(low[1:], None)
+
+
+def _steps(key: str, direction: int, count: int):
+    """
+    The count nearest keys after key, or before it with a direction of -1,
+    nearest first
+
+    The keys are as long as key if they fit, and otherwise a digit longer
+    than needed to fit them, to leave room for the keys added after them
+    """
+    width = len(key)
+    while True:
+        value = int(key.ljust(width, "0"), BASE)
+        room = BASE**width - 1 - value if direction > 0 else value - 1
+        # values ending in 0 are left out
+        if room - room // BASE - 1 >= count:
+            break
+        width += 1
+    if width > len(key):
+        width += 1
+        value = int(key.ljust(width, "0"), BASE)
+
+    keys = []
+    while len(keys) < count:
+        value += direction
+        if value % BASE:
+            keys.append(_encode(value, width))
+    return keys
+
+
+def check_key(key: str):
+    """
+    Check that key is a rank key
+
+    Raise ValueError if it is not
+    """
+    if not key or key.endswith("0") or key.strip(DIGITS):
+        raise ValueError(f"Invalid rank key: {key!r}")
+
+
+def key_between(before: str | None, after: str | None):
+    """
+    A key between before and after
+
+    With before None the key is before after, with after None it is after
+    before, and with both None it is the first key of a list
+    """
+    for key in (before, after):
+        if key is not None:
+            check_key(key)
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"{before!r} is not before {after!r}")
+
+    if before is None and after is None:
+        return FIRST_KEY
+    if after is None:
+        return _steps(before, 1, 1)[0]
+    if before is None:
+        return _steps(after, -1, 1)[0]
+    return _midpoint(before, after)
+
+
+def keys_between(before: str | None, after: str | None, count: int):
+    """
+    count keys in order between before and after, as key_between
+
+    Keys between two others are spread by bisection, so they grow with the
+    logarithm of count rather than with count
+    """
+    if count == 0:
+        return []
+    if before is None and after is None:
+        return [FIRST_KEY, *keys_between(FIRST_KEY, None, count - 1)]
+    if after is None:
+        check_key(before)
+        return _steps(before, 1, count)
+    if before is None:
+        check_key(after)
+        return _steps(after, -1, count)[::-1]
+
+    middle = count // 2
+    key = key_between(before, after)
+    return [
+        *keys_between(before, key, middle),
+        key,
+        *keys_between(key, after, count - middle - 1),
+    ]
+
+
+def spread_keys(count: int):
+    """
+    count evenly spaced keys of the same length, in order
+
+    The keys take the first half of the key space, leaving the second half
+    to items added at the end, and leave room for BASE - 1 keys of the same
+    length between any two
+    """
+    width = 1
+    while BASE**width < 2 * (count + 1) * BASE:
+        width += 1
+    step = BASE**width // (2 * (count + 1))
+
+    keys = []
+    for i in range(1, count + 1):
+        value = i * step
+        if value % BASE == 0:
+            value += 1
+        keys.append(_encode(value, width))
+    return keys
@@ -0,0 +1,13 @@
+"""
+Count the co-follows of every two artists again and refresh all similar
+artists, for recovery:
+
+    python -m sonority.recommendations
+
+The refreshes are enqueued, for the workers to run.
+"""
+from sonority.database import get_sessionmaker
+from sonority.recommendations.service import rebuild_similar_artists
+
+with get_sessionmaker()() as db:
+    print(f"enqueued {rebuild_similar_artists(db)} jobs")
@@ -0,0 +1,33 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.jobs import handler
+from sonority.recommendations import service
+
+
+@handler("recommendations.rebuild", every=settings.RECOMMENDATIONS_REBUILD_INTERVAL)
+def rebuild_recommendations(db: Session, payload: dict):
+    """
+    Enqueue the jobs building the neighbors of every liked album
+    """
+    service.rebuild_recommendations(db)
+
+
+@handler("recommendations.build")
+def build_neighbors(db: Session, payload: dict):
+    """
+    Compute the neighbors of a chunk of albums or artists
+    """
+    subject_ids = [UUID(subject_id) for subject_id in payload["subject_ids"]]
+    service.build_neighbors(db, payload["kind"], subject_ids)
+
+
+@handler("recommendations.refresh_similar_artists")
+def refresh_similar_artists(db: Session, payload: dict):
+    """
+    Compute the similar artists of a chunk of artists from the co-follows
+    """
+    artist_ids = [UUID(artist_id) for artist_id in payload["subject_ids"]]
+    service.refresh_similar_artists(db, artist_ids)
@@ -0,0 +1,39 @@
+from uuid import UUID
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Neighbor(Base):
+    """
+    Model for an album or artist ranked among the most similar to another
+
+    Neighbors are computed in the background from follows and likes, see
+    service.build_neighbors, so reading them is a range of the primary key
+    """
+
+    __tablename__ = "recommendation_neighbors"
+
+    # album or artist
+    kind: Mapped[str] = mapped_column(primary_key=True)
+    subject_id: Mapped[UUID] = mapped_column(primary_key=True)
+    rank: Mapped[int] = mapped_column(primary_key=True)
+    neighbor_id: Mapped[UUID] = mapped_column(nullable=False)
+    score: Mapped[float] = mapped_column(nullable=False)
+
+
+class CoFollow(Base):
+    """
+    Model for the number of users following both of two artists
+
+    Kept both ways round, with the follower count of an artist as its count
+    with itself. Updated as artists are followed and unfollowed, see
+    service.record_follow
+    """
+
+    __tablename__ = "co_follows"
+
+    artist_id: Mapped[UUID] = mapped_column(primary_key=True)
+    other_id: Mapped[UUID] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(nullable=False)
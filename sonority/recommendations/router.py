@@ -0,0 +1,57 @@
+from fastapi import APIRouter
+
+from sonority.albums.dependencies import AlbumById
+from sonority.albums.schemas import AlbumOutSchema
+from sonority.artists.dependencies import ArtistById
+from sonority.artists.schemas import GetArtistSchema
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session, Take, TAKE_DEFAULT
+from sonority.recommendations import service
+from sonority.recommendations.schemas import RecommendationsSchema
+
+
+router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+
+
+@router.get("/", response_model=RecommendationsSchema)
+def get_recommendations(db: Session, user: CurrentUser, take: Take = TAKE_DEFAULT):
+    """
+    Get the albums and artists the current user might like, from the albums
+    they like and the artists they follow
+
+    Album recommendations are rebuilt daily, and artist recommendations
+    shortly after each follow
+    """
+    albums, artists = service.get_recommendations(db, user, take=take)
+    return {"albums": albums, "artists": artists}
+
+
+@router.get("/albums/{album_id}", response_model=list[AlbumOutSchema])
+def get_similar_albums(
+    db: Session,
+    album: AlbumById,
+    _: CurrentUser,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the albums the fans of an album also like
+    """
+    return service.get_similar_albums(db, album.id, take=take)
+
+
+@router.get("/artists/{artist_id}", response_model=list[GetArtistSchema])
+def get_similar_artists(
+    db: Session,
+    artist: ArtistById,
+    user: CurrentUser,
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Get the artists the fans of an artist also follow, with whether the
+    current user follows each
+    """
+    rows = service.get_similar_artists(db, artist.id, user, take=take)
+    return [
+        {"artist": artist, "is_following": is_following}
+        for artist, is_following in rows
+    ]
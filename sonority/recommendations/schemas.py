@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+from sonority.albums.schemas import AlbumOutSchema
+from sonority.artists.schemas import ArtistOutSchema
+
+
+class RecommendationsSchema(BaseModel):
+    """
+    Schema for the albums and artists recommended to a user, best first
+    """
+
+    albums: list[AlbumOutSchema]
+    artists: list[ArtistOutSchema]
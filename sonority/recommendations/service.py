@@ -0,0 +1,389 @@
+"""
+This file implements recommendations from follows and likes.
+
+Follows and likes are implicit feedback: an artist is the set of users
+following it, and an album the set of users liking it. Two artists, or two
+albums, are as similar as the cosine of their sets of users, so the more
+fans they share the closer they are. The RECOMMENDATIONS_NEIGHBORS most
+similar to each are kept in recommendation_neighbors, which recommendations
+are read from.
+
+Similar albums are rebuilt every RECOMMENDATIONS_REBUILD_INTERVAL seconds,
+by jobs of RECOMMENDATIONS_CHUNK_SIZE albums each so that workers build
+them in parallel, see jobs.py. Similar artists are kept up to date instead:
+the number of users following each two artists is counted as artists are
+followed and unfollowed, and the similar artists of those involved are
+refreshed from the counts in the background, at most once every
+RECOMMENDATIONS_REFRESH_INTERVAL seconds for each artist.
+rebuild_similar_artists counts them all again, for recovery.
+"""
+import heapq
+import math
+from collections import Counter, defaultdict
+from uuid import UUID
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import aliased, Session
+
+from sonority import settings
+from sonority.albums import service as albums_service
+from sonority.albums.models import Likes
+from sonority.artists import service as artists_service
+from sonority.artists.models import Follow
+from sonority.auth.models import User
+from sonority.jobs import coalesce_many, enqueue
+from sonority.recommendations.models import CoFollow, Neighbor
+
+
+def _feedback(kind: str):
+    """
+    The subject and user columns of the likes of albums or follows of artists
+    """
+    if kind == "album":
+        return Likes.album_id, Likes.user_id
+    return Follow.artist_id, Follow.follower_id
+
+
+def cosine_neighbors(
+    users_by_subject: dict[UUID, set[UUID]],
+    subjects_by_user: dict[UUID, list[UUID]],
+    user_counts: dict[UUID, int],
+    k: int,
+):
+    """
+    The k most similar subjects to each of users_by_subject, best first
+
+    subjects_by_user has every subject of each of those users, and
+    user_counts the number of users of each of those subjects. Returns
+    (neighbor_id, score) pairs by subject
+    """
+    neighbors = {}
+    for subject_id, users in users_by_subject.items():
+        shared = Counter()
+        for user_id in users:
+            shared.update(subjects_by_user[user_id])
+        del shared[subject_id]
+
+        scores = (
+            (other_id, count / math.sqrt(len(users) * user_counts[other_id]))
+            for other_id, count in shared.items()
+        )
+        neighbors[subject_id] = heapq.nlargest(k, scores, key=lambda pair: pair[1])
+    return neighbors
+
+
+def _load_chunk(db: Session, kind: str, subject_ids: list[UUID]):
+    """
+    The feedback needed by cosine_neighbors for subject_ids, and no more
+    """
+    subject, user = _feedback(kind)
+    users = select(user).where(subject.in_(subject_ids))
+    wanted = set(subject_ids)
+
+    users_by_subject, subjects_by_user = defaultdict(set), defaultdict(list)
+    for subject_id, user_id in db.execute(select(subject, user).where(user.in_(users))):
+        subjects_by_user[user_id].append(subject_id)
+        if subject_id in wanted:
+            users_by_subject[subject_id].add(user_id)
+
+    related = select(subject).where(user.in_(users))
+    user_counts = db.execute(
+        select(subject, func.count(user))
+        .where(subject.in_(related))
+        .group_by(subject)
+    ).all()
+    return users_by_subject, subjects_by_user, dict(user_counts)
+
+
+def _store_neighbors(
+    db: Session,
+    kind: str,
+    subject_ids: list[UUID],
+    neighbors: dict[UUID, list[tuple[UUID, float]]],
+):
+    """
+    Replace the neighbors of subject_ids with neighbors, and commit
+
+    Returns the number of neighbors stored
+    """
+    rows = [
+        {
+            "kind": kind,
+            "subject_id": subject_id,
+            "rank": rank,
+            "neighbor_id": neighbor_id,
+            "score": score,
+        }
+        for subject_id, ranked in neighbors.items()
+        for rank, (neighbor_id, score) in enumerate(ranked, 1)
+    ]
+
+    db.execute(
+        delete(Neighbor).where(
+            Neighbor.kind == kind, Neighbor.subject_id.in_(subject_ids)
+        )
+    )
+    if rows:
+        db.execute(insert(Neighbor), rows)
+    db.commit()
+    return len(rows)
+
+
+def _enqueue_chunks(db: Session, name: str, subject_ids: list[UUID], **payload):
+    """
+    Enqueue a job called name for each chunk of subject_ids, without
+    committing
+
+    Returns the number of jobs enqueued
+    """
+    size = settings.RECOMMENDATIONS_CHUNK_SIZE
+    for start in range(0, len(subject_ids), size):
+        chunk = subject_ids[start : start + size]
+        enqueue(db, name, {**payload, "subject_ids": [str(id) for id in chunk]})
+    return math.ceil(len(subject_ids) / size)
+
+
+def build_neighbors(db: Session, kind: str, subject_ids: list[UUID]):
+    """
+    Compute the neighbors of some albums or artists again from their likes
+    or follows, and commit
+
+    Returns the number of neighbors stored
+    """
+    neighbors = cosine_neighbors(
+        *_load_chunk(db, kind, subject_ids), settings.RECOMMENDATIONS_NEIGHBORS
+    )
+    return _store_neighbors(db, kind, subject_ids, neighbors)
+
+
+def rebuild_recommendations(db: Session):
+    """
+    Enqueue a job building the neighbors of each chunk of the albums with
+    likes, drop the neighbors of the others, and commit
+
+    Returns the number of jobs enqueued
+    """
+    albums = select(Likes.album_id).distinct()
+    db.execute(
+        delete(Neighbor).where(
+            Neighbor.kind == "album", Neighbor.subject_id.not_in(albums)
+        )
+    )
+
+    album_ids = db.execute(albums.order_by(Likes.album_id)).scalars().all()
+    jobs = _enqueue_chunks(db, "recommendations.build", album_ids, kind="album")
+    db.commit()
+    return jobs
+
+
+def _upsert_co_follows(db: Session):
+    """
+    An INSERT into co_follows that adds to the counts already there
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(CoFollow)
+    return statement.on_conflict_do_update(
+        index_elements=["artist_id", "other_id"],
+        set_={"count": CoFollow.count + statement.excluded.count},
+    )
+
+
+def record_follow(db: Session, artist_id: UUID, follower_id: UUID, delta: int):
+    """
+    Count a follow, or with a delta of -1 take it back, towards the artists
+    followed together with artist_id, and enqueue refreshing their similar
+    artists, without committing
+
+    Called once the follow is added or deleted
+    """
+    other_ids = (
+        db.execute(
+            select(Follow.artist_id).where(
+                Follow.follower_id == follower_id, Follow.artist_id != artist_id
+            )
+        )
+        .scalars()
+        .all()
+    )
+    rows = [{"artist_id": artist_id, "other_id": artist_id, "count": delta}]
+    for other_id in other_ids:
+        rows.append({"artist_id": artist_id, "other_id": other_id, "count": delta})
+        rows.append({"artist_id": other_id, "other_id": artist_id, "count": delta})
+    # in the order of the primary key, so concurrent follows do not deadlock
+    rows.sort(key=lambda row: (row["artist_id"], row["other_id"]))
+
+    db.execute(_upsert_co_follows(db), rows)
+    if delta < 0:
+        keys = [(row["artist_id"], row["other_id"]) for row in rows]
+        db.execute(
+            delete(CoFollow).where(
+                CoFollow.count <= 0,
+                tuple_(CoFollow.artist_id, CoFollow.other_id).in_(keys),
+            )
+        )
+    coalesce_many(
+        db,
+        "recommendations.refresh_similar_artists",
+        {
+            str(refreshed_id): {"subject_ids": [str(refreshed_id)]}
+            for refreshed_id in [artist_id, *other_ids]
+        },
+        interval=settings.RECOMMENDATIONS_REFRESH_INTERVAL,
+    )
+
+
+def _similar_artists(db: Session, artist_id: UUID, k: int):
+    """
+    The k artists most followed together with an artist, best first, as
+    (neighbor_id, score) pairs scored like cosine_neighbors
+    """
+    follower_count = db.execute(
+        select(CoFollow.count).where(
+            CoFollow.artist_id == artist_id, CoFollow.other_id == artist_id
+        )
+    ).scalar_one_or_none()
+    if not follower_count:
+        return []
+
+    other = aliased(CoFollow)
+    rows = db.execute(
+        select(CoFollow.other_id, CoFollow.count, other.count)
+        .join(
+            other,
+            (other.artist_id == CoFollow.other_id)
+            & (other.other_id == CoFollow.other_id),
+        )
+        .where(
+            CoFollow.artist_id == artist_id,
+            CoFollow.other_id != artist_id,
+            other.count > 0,
+        )
+        # the square of the score, times the follower count of the artist
+        .order_by(
+            (CoFollow.count * CoFollow.count * 1.0 / other.count).desc(),
+            CoFollow.other_id,
+        )
+        .limit(k)
+    ).all()
+    return [
+        (other_id, count / math.sqrt(follower_count * other_count))
+        for other_id, count, other_count in rows
+    ]
+
+
+def refresh_similar_artists(db: Session, artist_ids: list[UUID]):
+    """
+    Compute the similar artists of some artists again from the co-follow
+    counts, and commit
+
+    Returns the number of similar artists stored
+    """
+    k = settings.RECOMMENDATIONS_NEIGHBORS
+    neighbors = {
+        artist_id: _similar_artists(db, artist_id, k) for artist_id in artist_ids
+    }
+    return _store_neighbors(db, "artist", artist_ids, neighbors)
+
+
+def rebuild_similar_artists(db: Session):
+    """
+    Count the co-follows again from the follows, enqueue refreshing the
+    similar artists of every followed artist, and commit
+
+    Concurrent follows by one user may miss each other, so the counts can
+    drift. Returns the number of jobs enqueued
+    """
+    mine, theirs = aliased(Follow), aliased(Follow)
+    db.execute(delete(CoFollow))
+    db.execute(
+        insert(CoFollow).from_select(
+            ["artist_id", "other_id", "count"],
+            select(mine.artist_id, theirs.artist_id, func.count())
+            .join(theirs, theirs.follower_id == mine.follower_id)
+            .group_by(mine.artist_id, theirs.artist_id),
+        )
+    )
+    db.execute(
+        delete(Neighbor).where(
+            Neighbor.kind == "artist",
+            Neighbor.subject_id.not_in(select(CoFollow.artist_id)),
+        )
+    )
+
+    artists = select(Follow.artist_id).distinct().order_by(Follow.artist_id)
+    artist_ids = db.execute(artists).scalars().all()
+    jobs = _enqueue_chunks(db, "recommendations.refresh_similar_artists", artist_ids)
+    db.commit()
+    return jobs
+
+
+def _get_neighbor_ids(db: Session, kind: str, subject_id: UUID, take: int):
+    return (
+        db.execute(
+            select(Neighbor.neighbor_id)
+            .where(Neighbor.kind == kind, Neighbor.subject_id == subject_id)
+            .order_by(Neighbor.rank)
+            .limit(take)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def _recommend_ids(db: Session, kind: str, user_id: UUID, take: int):
+    """
+    The albums or artists most similar to those a user likes or follows,
+    leaving those out
+    """
+    subject, user = _feedback(kind)
+    mine = select(subject).where(user == user_id)
+    score = func.sum(Neighbor.score)
+    return (
+        db.execute(
+            select(Neighbor.neighbor_id)
+            .where(
+                Neighbor.kind == kind,
+                Neighbor.subject_id.in_(mine),
+                Neighbor.neighbor_id.not_in(mine),
+            )
+            .group_by(Neighbor.neighbor_id)
+            .order_by(score.desc(), Neighbor.neighbor_id)
+            .limit(take)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def get_similar_albums(db: Session, album_id: UUID, *, take: int):
+    """
+    Get the released albums the fans of an album also like, best first
+    """
+    album_ids = _get_neighbor_ids(db, "album", album_id, take)
+    return albums_service.get_albums_by_ids(db, album_ids)
+
+
+def get_similar_artists(db: Session, artist_id: UUID, user: User, *, take: int):
+    """
+    Get the artists the fans of an artist also follow, best first
+
+    Returns (artist, is_following) pairs, with whether user follows each
+    """
+    artist_ids = _get_neighbor_ids(db, "artist", artist_id, take)
+    return artists_service.get_artists_by_ids(db, artist_ids, user)
+
+
+def get_recommendations(db: Session, user: User, *, take: int):
+    """
+    Get the released albums and the artists a user might like, best first,
+    from the albums they like and the artists they follow
+    """
+    album_ids = _recommend_ids(db, "album", user.id, take)
+    artist_ids = _recommend_ids(db, "artist", user.id, take)
+    albums = albums_service.get_albums_by_ids(db, album_ids)
+    artists = artists_service.get_artists_by_ids(db, artist_ids, user)
+    return albums, [artist for artist, _ in artists]
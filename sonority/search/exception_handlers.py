@@ -0,0 +1,16 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority.search.exceptions import InvalidSearchQuery
+
+
+async def invalid_search_query_exception_handler(request, exc: InvalidSearchQuery):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    InvalidSearchQuery: invalid_search_query_exception_handler,
+}
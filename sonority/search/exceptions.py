@@ -0,0 +1,6 @@
+class InvalidSearchQuery(Exception):
+    """
+    Exception raised when a search query has no words to search for
+    """
+
+    pass
@@ -0,0 +1,118 @@
+"""
+This file defines the search index over artists and albums.
+
+On Postgres, the index is a set of GIN indexes on the artists and albums
+tables: full-text over their documents and trigram over their names. On
+SQLite, it is a pair of FTS5 tables kept in sync with the artists and
+albums tables by triggers. Neither fits a declarative model, so the index
+is created along with the tables by the listeners below.
+"""
+from sqlalchemy import Column, event, MetaData, String, Table, Uuid
+
+from sonority.database import Base
+
+# must match the indexed expressions exactly for Postgres to use the indexes
+ARTIST_DOCUMENT = (
+    "to_tsvector('simple', artists.name || ' ' || coalesce(artists.description, ''))"
+)
+ALBUM_DOCUMENT = "to_tsvector('simple', albums.name)"
+
+SEARCH_INDEXES = (
+    "ix_artists_search",
+    "ix_artists_name_trgm",
+    "ix_albums_search",
+    "ix_albums_name_trgm",
+)
+SEARCH_TABLES = ("artists_fts", "albums_fts")
+
+POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_artists_search ON artists"
+    f" USING gin ({ARTIST_DOCUMENT})",
+    "CREATE INDEX IF NOT EXISTS ix_artists_name_trgm ON artists"
+    " USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_albums_search ON albums"
+    f" USING gin ({ALBUM_DOCUMENT}) WHERE released",
+    "CREATE INDEX IF NOT EXISTS ix_albums_name_trgm ON albums"
+    " USING gin (name gin_trgm_ops) WHERE released",
+]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE artists_fts USING fts5("
+    "artist_id UNINDEXED, name, description,"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER artists_fts_insert AFTER INSERT ON artists BEGIN"
+    " INSERT INTO artists_fts (artist_id, name, description)"
+    " VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER artists_fts_update AFTER UPDATE OF name, description"
+    " ON artists BEGIN"
+    " DELETE FROM artists_fts WHERE artist_id = old.id;"
+    " INSERT INTO artists_fts (artist_id, name, description)"
+    " VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER artists_fts_delete AFTER DELETE ON artists BEGIN"
+    " DELETE FROM artists_fts WHERE artist_id = old.id; END",
+    "CREATE VIRTUAL TABLE albums_fts USING fts5("
+    "album_id UNINDEXED, name,"
+    " tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    # only released albums can be found
+    "CREATE TRIGGER albums_fts_insert AFTER INSERT ON albums"
+    " WHEN new.released BEGIN"
+    " INSERT INTO albums_fts (album_id, name) VALUES (new.id, new.name); END",
+    "CREATE TRIGGER albums_fts_update AFTER UPDATE OF name, released"
+    " ON albums BEGIN"
+    " DELETE FROM albums_fts WHERE album_id = old.id;"
+    " INSERT INTO albums_fts (album_id, name)"
+    " SELECT new.id, new.name WHERE new.released; END",
+    "CREATE TRIGGER albums_fts_delete AFTER DELETE ON albums BEGIN"
+    " DELETE FROM albums_fts WHERE album_id = old.id; END",
+    "INSERT INTO artists_fts (artist_id, name, description)"
+    " SELECT id, name, description FROM artists",
+    "INSERT INTO albums_fts (album_id, name)"
+    " SELECT id, name FROM albums WHERE released",
+]
+
+# the FTS5 tables, for querying only; they are not part of Base.metadata
+fts_metadata = MetaData()
+
+artists_fts = Table(
+    "artists_fts",
+    fts_metadata,
+    Column("artist_id", Uuid),
+    Column("name", String),
+    Column("description", String),
+)
+
+albums_fts = Table(
+    "albums_fts",
+    fts_metadata,
+    Column("album_id", Uuid),
+    Column("name", String),
+)
+
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """
+    Create the search index once the tables exist
+    """
+    if connection.dialect.name == "postgresql":
+        for statement in POSTGRES_DDL:
+            connection.exec_driver_sql(statement)
+
+    elif connection.dialect.name == "sqlite":
+        exists = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'artists_fts'"
+        ).first()
+        if not exists:
+            for statement in SQLITE_DDL:
+                connection.exec_driver_sql(statement)
+
+
+@event.listens_for(Base.metadata, "before_drop")
+def drop_search_index(target, connection, **kw):
+    """
+    Drop the FTS5 tables, as dropping the tables only drops their triggers
+    """
+    if connection.dialect.name == "sqlite":
+        for table in SEARCH_TABLES:
+            connection.exec_driver_sql(f"DROP TABLE IF EXISTS {table}")
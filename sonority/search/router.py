@@ -0,0 +1,46 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Query
+
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session, Take, TAKE_DEFAULT
+from sonority.search import service
+from sonority.autocomplete import MAX_COMPLETIONS
+from sonority.search.schemas import CompletionSchema, SearchSchema
+
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+# the longest search query accepted
+MAX_QUERY_LENGTH = 100
+
+
+@router.get("/", response_model=SearchSchema)
+def search(
+    db: Session,
+    _: CurrentUser,
+    q: Annotated[str, Query(min_length=1, max_length=MAX_QUERY_LENGTH)],
+    take: Take = TAKE_DEFAULT,
+):
+    """
+    Search artists and released albums
+
+    The last word of the query matches as a prefix
+    """
+    artists, albums = service.search(db, q, take=take)
+    return {"artists": artists, "albums": albums}
+
+
+@router.get("/autocomplete", response_model=list[CompletionSchema])
+def autocomplete(
+    db: Session,
+    _: CurrentUser,
+    q: Annotated[str, Query(max_length=MAX_QUERY_LENGTH)],
+    take: Annotated[int, Query(ge=1, le=MAX_COMPLETIONS, alias="limit")] = 5,
+):
+    """
+    Complete a prefix into the most popular artist and album names
+
+    Names are matched from the start of any of their words
+    """
+    return service.autocomplete(db, q, take=take)
@@ -0,0 +1,28 @@
+from typing import Literal
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+from sonority.albums.schemas import AlbumOutSchema
+from sonority.artists.schemas import ArtistOutSchema
+
+
+class SearchSchema(BaseModel):
+    """
+    Schema for the results of a search, best first
+    """
+
+    artists: list[ArtistOutSchema]
+    albums: list[AlbumOutSchema]
+
+
+class CompletionSchema(BaseModel):
+    """
+    Schema for an artist or album name completing a prefix
+    """
+
+    kind: Literal["artist", "album"]
+    id: UUID
+    name: str
+
+    model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,240 @@
+import re
+import threading
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.models import Album, Likes
+from sonority.artists.models import Artist, Follow
+from sonority.autocomplete import autocomplete_index, Completion
+from sonority.plays import service as plays_service
+from sonority.search.exceptions import InvalidSearchQuery
+from sonority.search.models import (
+    ALBUM_DOCUMENT,
+    albums_fts,
+    ARTIST_DOCUMENT,
+    artists_fts,
+)
+
+WORD = re.compile(r"\w+")
+# words past this are ignored
+MAX_TERMS = 8
+
+
+def parse_query(query: str):
+    """
+    Split a search query into lowercase words
+
+    Raise InvalidSearchQuery if there are none
+    """
+    terms = WORD.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        raise InvalidSearchQuery("Search query has no words")
+    return terms
+
+
+def _fts5_query(terms: list[str]):
+    """
+    An FTS5 query matching every term, the last one as a prefix
+    """
+    phrases = [f'"{term}"' for term in terms]
+    return " ".join(phrases) + "*"
+
+
+def _tsquery(terms: list[str]):
+    """
+    A tsquery matching every term, the last one as a prefix
+    """
+    return " & ".join(terms[:-1] + [f"{terms[-1]}:*"])
+
+
+def _text_match(terms: list[str], column, document: str):
+    """
+    The condition and rank of a Postgres full-text or trigram match
+    """
+    tsquery = func.to_tsquery(literal_column("'simple'"), _tsquery(terms))
+    text = " ".join(terms)
+    document = literal_column(document)
+    condition = document.op("@@")(tsquery) | column.op("%")(text)
+    rank = func.ts_rank(document, tsquery) + func.similarity(column, text)
+    return condition, rank
+
+
+def _artist_candidates(db: Session, terms: list[str]):
+    """
+    The ids and text ranks of the artists that best match the terms
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        condition, rank = _text_match(terms, Artist.name, ARTIST_DOCUMENT)
+        query = select(Artist.id.label("id"), rank.label("rank")).where(condition)
+    else:
+        # bm25 is lower for better matches; names weigh more than descriptions
+        rank = -func.bm25(literal_column("artists_fts"), 0.0, 4.0, 1.0)
+        match = literal_column("artists_fts").op("MATCH")(_fts5_query(terms))
+        query = select(artists_fts.c.artist_id.label("id"), rank.label("rank"))
+        query = query.where(match)
+    return query.order_by(rank.desc()).limit(settings.SEARCH_CANDIDATES).subquery()
+
+
+def _album_candidates(db: Session, terms: list[str]):
+    """
+    The ids and text ranks of the released albums that best match the terms
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        condition, rank = _text_match(terms, Album.name, ALBUM_DOCUMENT)
+        query = select(Album.id.label("id"), rank.label("rank")).where(
+            condition, Album.released == True  # noqa
+        )
+    else:
+        rank = -func.bm25(literal_column("albums_fts"))
+        match = literal_column("albums_fts").op("MATCH")(_fts5_query(terms))
+        query = select(albums_fts.c.album_id.label("id"), rank.label("rank"))
+        query = query.where(match)
+    return query.order_by(rank.desc()).limit(settings.SEARCH_CANDIDATES).subquery()
+
+
+def _follower_count(artist_id):
+    return (
+        select(func.count(Follow.follower_id))
+        .where(Follow.artist_id == artist_id)
+        .scalar_subquery()
+    )
+
+
+def _score(ranked):
+    """
+    The text rank of a candidate, boosted by the followers of its artist
+
+    The boost grows with the follower count, up to doubling the rank
+    """
+    followers = ranked.c.followers * 1.0
+    boost = 1 + followers / (followers + settings.SEARCH_FOLLOWER_BOOST)
+    return ranked.c.rank * boost
+
+
+def search_artists(db: Session, terms: list[str], *, take: int):
+    """
+    Get the artists that best match the terms, best first
+
+    Only the SEARCH_CANDIDATES best text matches are ranked by popularity
+    """
+    candidates = _artist_candidates(db, terms)
+    ranked = select(
+        candidates.c.id,
+        candidates.c.rank,
+        _follower_count(candidates.c.id).label("followers"),
+    ).subquery()
+    rows = db.execute(
+        select(Artist, ranked.c.followers)
+        .join(ranked, ranked.c.id == Artist.id)
+        .order_by(_score(ranked).desc(), Artist.id)
+        .limit(take)
+    ).all()
+
+    artists = []
+    for artist, follower_count in rows:
+        artist.follower_count = follower_count
+        artists.append(artist)
+    return plays_service.annotate_play_counts(db, "artist", artists)
+
+
+def search_albums(db: Session, terms: list[str], *, take: int):
+    """
+    Get the released albums that best match the terms, best first
+
+    Only the SEARCH_CANDIDATES best text matches are ranked by the
+    popularity of their artists
+    """
+    candidates = _album_candidates(db, terms)
+    ranked = (
+        select(
+            candidates.c.id,
+            candidates.c.rank,
+            _follower_count(Album.artist_id).label("followers"),
+        )
+        .join(Album, Album.id == candidates.c.id)
+        .subquery()
+    )
+    albums = (
+        db.execute(
+            select(Album)
+            .join(ranked, ranked.c.id == Album.id)
+            .order_by(_score(ranked).desc(), Album.id)
+            .limit(take)
+        )
+        .scalars()
+        .all()
+    )
+    return plays_service.annotate_play_counts(db, "album", albums)
+
+
+def search(db: Session, query: str, *, take: int):
+    """
+    Search artist names and descriptions, and released album names
+
+    The last word of the query matches as a prefix, for searching as the
+    user types. Returns up to take artists and take albums
+    """
+    terms = parse_query(query)
+    return search_artists(db, terms, take=take), search_albums(db, terms, take=take)
+
+
+_build_lock = threading.Lock()
+
+
+def _load_completions(db: Session, limit: int):
+    """
+    The most followed artists and most liked released albums, up to limit each
+    """
+    followers = func.count(Follow.follower_id)
+    artists = db.execute(
+        select(Artist.id, Artist.name, followers)
+        .join(Follow, isouter=True)
+        .group_by(Artist.id)
+        .order_by(followers.desc())
+        .limit(limit)
+    )
+    for id, name, score in artists:
+        yield Completion("artist", id, name, score)
+
+    likes = func.count(Likes.user_id)
+    albums = db.execute(
+        select(Album.id, Album.name, likes)
+        .join(Likes, isouter=True)
+        .where(Album.released == True)  # noqa
+        .group_by(Album.id)
+        .order_by(likes.desc())
+        .limit(limit)
+    )
+    for id, name, score in albums:
+        yield Completion("album", id, name, score)
+
+
+def build_autocomplete_index(db: Session):
+    """
+    Build the autocomplete index if it is missing or too old
+
+    While one request rebuilds a stale index, the others use it as it is
+    """
+    if not autocomplete_index.is_stale(settings.AUTOCOMPLETE_MAX_AGE):
+        return
+
+    blocking = autocomplete_index.built_at is None
+    if not _build_lock.acquire(blocking=blocking):
+        return
+    try:
+        if autocomplete_index.is_stale(settings.AUTOCOMPLETE_MAX_AGE):
+            limit = autocomplete_index.max_entries
+            autocomplete_index.build(_load_completions(db, limit))
+    finally:
+        _build_lock.release()
+
+
+def autocomplete(db: Session, prefix: str, *, take: int):
+    """
+    Get the most popular artist and released album names with a word
+    starting with prefix
+    """
+    build_autocomplete_index(db)
+    return autocomplete_index.complete(prefix, take)
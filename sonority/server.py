@@ -1,20 +1,60 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse
+from starlette.concurrency import run_in_threadpool
 
-from sonority import albums, artists, auth
+from sonority import (
+    albums,
+    artists,
+    auth,
+    charts,
+    feed,
+    playlists,
+    plays,
+    recommendations,
+    search,
+    tracks,
+)
+from sonority.plays.buffer import play_buffer
+from sonority.singleflight import flights
 
 
 exception_handlers = {
     **albums.exception_handlers,
     **artists.exception_handlers,
     **auth.exception_handlers,
+    **charts.exception_handlers,
+    **feed.exception_handlers,
+    **playlists.exception_handlers,
+    **plays.exception_handlers,
+    **search.exception_handlers,
+    **tracks.exception_handlers,
 }
 
-app = FastAPI(exception_handlers=exception_handlers)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(play_buffer.start)
+    yield
+    # write the plays accepted before shutting down
+    await run_in_threadpool(play_buffer.stop)
+
+
+app = FastAPI(exception_handlers=exception_handlers, lifespan=lifespan)
 
 app.include_router(albums.router)
 app.include_router(artists.router)
 app.include_router(auth.router)
+app.include_router(charts.router)
+app.include_router(feed.router)
+app.include_router(playlists.router)
+app.include_router(plays.router)
+app.include_router(plays.history_router)
+app.include_router(recommendations.router)
+app.include_router(search.router)
+app.include_router(tracks.router)
+app.include_router(tracks.tracklist_router)
 
 
 @app.get("/")
@@ -25,3 +65,8 @@ async def root():
 @app.get("/ping")
 async def ping():
     return {"sonority": "pong!"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {"singleflight": {name: flight.stats() for name, flight in flights.items()}}
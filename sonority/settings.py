@@ -1,4 +1,5 @@
 import os
+import tempfile
 from pathlib import Path
 
 import dotenv
@@ -6,9 +7,106 @@ import dotenv
 dotenv.load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# per process; unset means the SQLAlchemy defaults
+DATABASE_POOL_SIZE = os.getenv("DATABASE_POOL_SIZE")
+DATABASE_MAX_OVERFLOW = os.getenv("DATABASE_MAX_OVERFLOW")
+# across all worker processes
+DATABASE_CONNECTION_BUDGET = int(os.getenv("DATABASE_CONNECTION_BUDGET", 20))
+
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 HASH_ALGORITHM = os.getenv("HASH_ALGORITHM")
 ACCESS_TOKEN_EXPIRE_IN = int(os.getenv("ACCESS_TOKEN_EXPIRE_IN"))  # minutes
 
 TRACKS_DIR = Path(os.getenv("TRACKS_DIR"))
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "lru")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 10_000))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", 300))  # seconds
+
+# releases of artists with more followers are read on demand, not fanned out
+FEED_FANOUT_THRESHOLD = int(os.getenv("FEED_FANOUT_THRESHOLD", 10_000))
+FEED_FANOUT_BATCH_SIZE = int(os.getenv("FEED_FANOUT_BATCH_SIZE", 1_000))
+
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", 4))
+JOBS_POLL_INTERVAL = float(os.getenv("JOBS_POLL_INTERVAL", 1))  # seconds
+# seconds a claimed job is hidden from other workers
+JOBS_VISIBILITY_TIMEOUT = float(os.getenv("JOBS_VISIBILITY_TIMEOUT", 300))
+JOBS_MAX_ATTEMPTS = int(os.getenv("JOBS_MAX_ATTEMPTS", 5))
+# seconds before the first retry, doubling on every attempt up to the max
+JOBS_RETRY_BACKOFF = float(os.getenv("JOBS_RETRY_BACKOFF", 10))
+JOBS_RETRY_BACKOFF_MAX = float(os.getenv("JOBS_RETRY_BACKOFF_MAX", 3600))
+# seconds finished jobs and their idempotency keys are kept, longer than the
+# interval of any periodic job
+JOBS_RETENTION = float(os.getenv("JOBS_RETENTION", 7 * 24 * 60 * 60))
+JOBS_PURGE_INTERVAL = float(os.getenv("JOBS_PURGE_INTERVAL", 3600))  # seconds
+
+# the best text matches of a search, re-ranked by popularity
+SEARCH_CANDIDATES = int(os.getenv("SEARCH_CANDIDATES", 200))
+# followers that make an artist rank 1.5 times higher, up to twice as high
+SEARCH_FOLLOWER_BOOST = int(os.getenv("SEARCH_FOLLOWER_BOOST", 1_000))
+
+# names held by the in-process autocomplete index, most popular first
+AUTOCOMPLETE_MAX_ENTRIES = int(os.getenv("AUTOCOMPLETE_MAX_ENTRIES", 200_000))
+# seconds before the index is rebuilt, picking up other processes' changes
+AUTOCOMPLETE_MAX_AGE = float(os.getenv("AUTOCOMPLETE_MAX_AGE", 600))
+
+# plays held in memory before new ones are refused
+PLAYS_BUFFER_MAX = int(os.getenv("PLAYS_BUFFER_MAX", 100_000))
+# pending plays that trigger a write, and the most written at once
+PLAYS_FLUSH_SIZE = int(os.getenv("PLAYS_FLUSH_SIZE", 1_000))
+PLAYS_FLUSH_INTERVAL = float(os.getenv("PLAYS_FLUSH_INTERVAL", 1))  # seconds
+# seconds clients are asked to wait when plays are refused
+PLAYS_RETRY_AFTER = int(os.getenv("PLAYS_RETRY_AFTER", 1))
+# plays that could not be written at shutdown, written on the next start, and
+# plays the database rejected, kept for inspection
+PLAYS_SPOOL_DIR = Path(
+    os.getenv("PLAYS_SPOOL_DIR", Path(tempfile.gettempdir()) / "sonority-plays")
+)
+# seconds between rollups of new plays into play counts
+PLAYS_ROLLUP_INTERVAL = float(os.getenv("PLAYS_ROLLUP_INTERVAL", 60))
+# seconds before a play is rolled up, longer than any write of plays takes to
+# commit, so plays committed out of order are not skipped
+PLAYS_ROLLUP_LAG = float(os.getenv("PLAYS_ROLLUP_LAG", 10))
+# the most plays rolled up in one transaction
+PLAYS_ROLLUP_BATCH_SIZE = int(os.getenv("PLAYS_ROLLUP_BATCH_SIZE", 10_000))
+
+# the windows charts are computed over, as minutes (m), hours (h) or days (d)
+CHARTS_WINDOWS = os.getenv("CHARTS_WINDOWS", "1h,24h,7d").split(",")
+# seconds of activity counted together
+CHARTS_BUCKET_SIZE = int(os.getenv("CHARTS_BUCKET_SIZE", 300))
+# albums and artists ranked in each chart
+CHARTS_SIZE = int(os.getenv("CHARTS_SIZE", 100))
+CHARTS_REFRESH_INTERVAL = float(os.getenv("CHARTS_REFRESH_INTERVAL", 60))  # seconds
+# how much a like, a follow and a play count towards trending
+CHARTS_LIKE_WEIGHT = float(os.getenv("CHARTS_LIKE_WEIGHT", 5))
+CHARTS_FOLLOW_WEIGHT = float(os.getenv("CHARTS_FOLLOW_WEIGHT", 10))
+CHARTS_PLAY_WEIGHT = float(os.getenv("CHARTS_PLAY_WEIGHT", 1))
+
+# similar albums and artists kept for each album and artist
+RECOMMENDATIONS_NEIGHBORS = int(os.getenv("RECOMMENDATIONS_NEIGHBORS", 50))
+# albums or artists whose neighbors are computed by one job
+RECOMMENDATIONS_CHUNK_SIZE = int(os.getenv("RECOMMENDATIONS_CHUNK_SIZE", 500))
+# seconds over which the refreshes of an artist's similar artists are batched
+RECOMMENDATIONS_REFRESH_INTERVAL = float(
+    os.getenv("RECOMMENDATIONS_REFRESH_INTERVAL", 60)
+)
+# seconds between rebuilds of the neighbors from follows and likes
+RECOMMENDATIONS_REBUILD_INTERVAL = float(
+    os.getenv("RECOMMENDATIONS_REBUILD_INTERVAL", 24 * 60 * 60)
+)
+
+# days plays are kept in the listening history
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", 90))
+# days of history per partition on Postgres, not to be changed once created
+HISTORY_PARTITION_DAYS = int(os.getenv("HISTORY_PARTITION_DAYS", 7))
+# partitions created ahead of the current one
+HISTORY_PARTITIONS_AHEAD = int(os.getenv("HISTORY_PARTITIONS_AHEAD", 4))
+# seconds between creating and dropping partitions, or deleting old plays
+HISTORY_MAINTENANCE_INTERVAL = float(os.getenv("HISTORY_MAINTENANCE_INTERVAL", 3600))
+
+# the longest rank key of a playlist item before the playlist is rebalanced
+PLAYLISTS_MAX_KEY_LENGTH = int(os.getenv("PLAYLISTS_MAX_KEY_LENGTH", 16))
+# seconds between rebalancing the playlists whose keys grew too long
+PLAYLISTS_REBALANCE_INTERVAL = float(os.getenv("PLAYLISTS_REBALANCE_INTERVAL", 3600))
@@ -0,0 +1,166 @@
+"""
+This file implements request coalescing ("single-flight") for reads.
+
+Concurrent calls with the same key are collapsed into one: the first caller
+runs the query and every caller that arrives while it is in flight waits for
+its result instead of issuing an identical query.
+
+ORM objects belong to the session that loaded them, so waiting callers never
+receive the leader's objects. They receive a snapshot of the loaded columns
+taken when the query finished, merged into their own session.
+"""
+import threading
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+
+class _Call:
+    """
+    A call in flight
+    """
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: BaseException | None = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """
+        Call fn, unless a call with the same key is already in flight
+
+        :param key: Identifies calls that are interchangeable.
+        :param fn: The call to make.
+        :return: The result and whether it was shared from another call.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self) -> dict[str, int]:
+        """
+        Return the number of calls, executions and coalesced calls so far
+        """
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+        }
+
+
+flights: dict[str, SingleFlight] = {}
+
+
+def get_flight(name: str) -> SingleFlight:
+    """
+    Get the SingleFlight registered under name, creating it if needed
+    """
+    return flights.setdefault(name, SingleFlight(name))
+
+
+def _snapshot_one(obj):
+    """
+    Capture the loaded columns and plain attributes of an ORM object
+    """
+    state = inspect(obj)
+    columns = {
+        key: state.dict[key]
+        for key in state.mapper.column_attrs.keys()
+        if key in state.dict
+    }
+    extras = {
+        key: value
+        for key, value in vars(obj).items()
+        if not key.startswith("_") and key not in state.mapper.attrs
+    }
+    return type(obj), columns, extras
+
+
+def _restore_one(db: Session, snapshot):
+    """
+    Rebuild an ORM object from a snapshot, in the session db
+    """
+    cls, columns, extras = snapshot
+    obj = cls(**columns)
+    make_transient_to_detached(obj)
+    obj = db.merge(obj, load=False)
+    for key, value in extras.items():
+        setattr(obj, key, value)
+    return obj
+
+
+def _snapshot(result):
+    if result is None:
+        return None
+    if isinstance(result, (list, tuple)):
+        return [_snapshot_one(obj) for obj in result]
+    return _snapshot_one(result)
+
+
+def _restore(db: Session, snapshot):
+    if snapshot is None:
+        return None
+    if isinstance(snapshot, list):
+        return [_restore_one(db, item) for item in snapshot]
+    return _restore_one(db, snapshot)
+
+
+def coalesce(flight: SingleFlight, key: Hashable, db: Session, query: Callable):
+    """
+    Run query in db, or share the result of an identical query in flight
+
+    :param flight: The SingleFlight to coalesce calls in.
+    :param key: Identifies identical queries.
+    :param db: The caller's session, which shared results are merged into.
+    :param query: Loads an ORM object, a list of ORM objects or None.
+    :return: The result of query, bound to db.
+    """
+
+    def run():
+        result = query()
+        return result, _snapshot(result)
+
+    (result, snapshot), shared = flight.do(key, run)
+    if not shared:
+        return result
+
+    return _restore(db, snapshot)
@@ -0,0 +1,47 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from sonority.tracks.exceptions import (
+    InvalidTracklist,
+    TrackDoesNotExist,
+    TrackFileDoesNotExist,
+    TrackFileInUse,
+)
+
+
+async def track_does_not_exist_exception_handler(request, exc: TrackDoesNotExist):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def track_file_does_not_exist_exception_handler(
+    request, exc: TrackFileDoesNotExist
+):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def track_file_in_use_exception_handler(request, exc: TrackFileInUse):
+    return JSONResponse(
+        status_code=status.HTTP_409_CONFLICT,
+        content={"detail": exc.args[0]},
+    )
+
+
+async def invalid_tracklist_exception_handler(request, exc: InvalidTracklist):
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": exc.args[0]},
+    )
+
+
+exception_handlers = {
+    TrackDoesNotExist: track_does_not_exist_exception_handler,
+    TrackFileDoesNotExist: track_file_does_not_exist_exception_handler,
+    TrackFileInUse: track_file_in_use_exception_handler,
+    InvalidTracklist: invalid_tracklist_exception_handler,
+}
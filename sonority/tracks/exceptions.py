@@ -0,0 +1,31 @@
+class TrackDoesNotExist(Exception):
+    """
+    Exception raised when a track does not exist
+    """
+
+    pass
+
+
+class TrackFileDoesNotExist(Exception):
+    """
+    Exception raised when a track is added with a file that was not uploaded
+    """
+
+    pass
+
+
+class TrackFileInUse(Exception):
+    """
+    Exception raised when a file is already the file of a track
+    """
+
+    pass
+
+
+class InvalidTracklist(Exception):
+    """
+    Exception raised when a tracklist does not list each track of its album
+    once
+    """
+
+    pass
@@ -0,0 +1,34 @@
+"""
+This file implements the processing of uploaded files, done by the jobs worker.
+"""
+from pathlib import Path
+from uuid import UUID
+
+from sqlalchemy.orm import Session
+
+from sonority.jobs import enqueue, handler
+from sonority.tracks.upload import get_file, process_file
+
+
+def schedule_processing(db: Session, file_id: UUID, parent_dir: Path):
+    """
+    Enqueue the processing of an uploaded file, without committing
+    """
+    return enqueue(
+        db,
+        "tracks.process_upload",
+        {"file_id": file_id.hex, "parent_dir": str(parent_dir)},
+        idempotency_key=f"tracks.process_upload:{file_id.hex}",
+    )
+
+
+@handler("tracks.process_upload")
+def process_upload(db: Session, payload: dict):
+    """
+    Compute and save the metadata of an uploaded file
+    """
+    file_id, parent_dir = UUID(payload["file_id"]), Path(payload["parent_dir"])
+    # the file was deleted before it could be processed
+    if not get_file(file_id, parent_dir).exists():
+        return
+    process_file(file_id, parent_dir)
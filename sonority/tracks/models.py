@@ -0,0 +1,33 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from sonority.database import Base
+
+
+class Track(Base):
+    """
+    Model for a track of an album
+
+    Tracks are numbered from 1 in the order of the tracklist, and the unique
+    constraint is the tracklist in that order
+    """
+
+    __tablename__ = "tracks"
+    __table_args__ = (
+        UniqueConstraint("album_id", "number", name="uq_track_album_id_number"),
+    )
+
+    id: Mapped[UUID] = mapped_column(primary_key=True, default=uuid4)
+    album_id: Mapped[UUID] = mapped_column(
+        ForeignKey("albums.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(nullable=False)
+    number: Mapped[int] = mapped_column(nullable=False)
+    # the uploaded file, see upload.py
+    file_id: Mapped[UUID] = mapped_column(nullable=False, unique=True)
+    created_at: Mapped[datetime] = mapped_column(
+        nullable=False, default=datetime.utcnow
+    )
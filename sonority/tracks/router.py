@@ -0,0 +1,95 @@
+from typing import Annotated
+from uuid import UUID
+
+from fastapi import APIRouter, Body, status, UploadFile
+
+from sonority import settings
+from sonority.albums.dependencies import AlbumById, OwnedAlbumById
+from sonority.artists.dependencies import CurrentArtist
+from sonority.auth.dependencies import CurrentUser
+from sonority.dependencies import Session
+from sonority.tracks import service, upload
+from sonority.tracks.jobs import schedule_processing
+from sonority.tracks.schemas import (
+    TrackCreateSchema,
+    TracklistOrderSchema,
+    TrackSchema,
+    TrackUploadedSchema,
+)
+
+
+router = APIRouter(prefix="/tracks", tags=["tracks"])
+
+tracklist_router = APIRouter(prefix="/albums", tags=["tracks"])
+
+# the most tracks that can be added to an album at once
+MAX_TRACKS = 100
+
+TrackBatch = Annotated[
+    list[TrackCreateSchema], Body(min_length=1, max_length=MAX_TRACKS)
+]
+
+
+@router.post(
+    "/upload", response_model=TrackUploadedSchema, status_code=status.HTTP_201_CREATED
+)
+def upload_track(db: Session, _: CurrentArtist, file: UploadFile):
+    """
+    Upload the file of a track, to add to an album by its file_id
+    """
+    file_id = upload.upload_file(file.file.read(), settings.TRACKS_DIR)
+    schedule_processing(db, file_id, settings.TRACKS_DIR)
+    db.commit()
+    return {"file_id": file_id}
+
+
+@tracklist_router.get("/{album_id}/tracks", response_model=list[TrackSchema])
+def get_tracks(db: Session, album: AlbumById, _: CurrentUser):
+    """
+    Get the tracks of a released album, in order
+    """
+    return service.get_tracks(db, album)
+
+
+@tracklist_router.get("/drafts/{album_id}/tracks", response_model=list[TrackSchema])
+def get_draft_tracks(db: Session, album: OwnedAlbumById):
+    """
+    Get the tracks of an album of the current artist, in order
+    """
+    return service.get_tracks(db, album)
+
+
+@tracklist_router.post(
+    "/{album_id}/tracks",
+    response_model=list[TrackSchema],
+    status_code=status.HTTP_201_CREATED,
+)
+def add_tracks(db: Session, album: OwnedAlbumById, tracks: TrackBatch):
+    """
+    Add tracks at the end of an unreleased album, in order
+
+    Returns the tracklist
+    """
+    return service.add_tracks(db, album, tracks)
+
+
+@tracklist_router.put("/{album_id}/tracks", response_model=list[TrackSchema])
+def reorder_tracks(
+    db: Session, album: OwnedAlbumById, order_schema: TracklistOrderSchema
+):
+    """
+    Put the tracks of an unreleased album in a new order, listing each once
+
+    Returns the tracklist
+    """
+    return service.reorder_tracks(db, album, order_schema.track_ids)
+
+
+@tracklist_router.delete(
+    "/{album_id}/tracks/{track_id}", status_code=status.HTTP_204_NO_CONTENT
+)
+def remove_track(db: Session, album: OwnedAlbumById, track_id: UUID):
+    """
+    Remove a track from an unreleased album
+    """
+    service.remove_track(db, album, service.get_track(db, album, track_id))
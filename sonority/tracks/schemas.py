@@ -0,0 +1,44 @@
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+
+
+class TrackCreateSchema(BaseModel):
+    """
+    Schema for adding a track to an album, from an uploaded file
+    """
+
+    name: str
+    file_id: UUID
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class TrackSchema(TrackCreateSchema):
+    """
+    Schema for a track returned by the API
+    """
+
+    id: UUID
+    album_id: UUID
+    number: int
+
+    model_config = ConfigDict(from_attributes=True, **TrackCreateSchema.model_config)
+
+
+class TracklistOrderSchema(BaseModel):
+    """
+    Schema for the new order of the tracks of an album
+    """
+
+    track_ids: list[UUID]
+
+    model_config = ConfigDict(extra="forbid")
+
+
+class TrackUploadedSchema(BaseModel):
+    """
+    Schema for an uploaded track file
+    """
+
+    file_id: UUID
@@ -0,0 +1,174 @@
+"""
+This file implements the tracklists of albums.
+
+Tracks are numbered from 1 in the order of their album's tracklist. Albums
+are short, so unlike playlists a tracklist is numbered again as a whole when
+it changes. Tracklists only change while an album is a draft, with the album
+locked, and Album.track_count is kept in the same transaction, so album
+listings never count tracks.
+"""
+from uuid import UUID
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums import service as albums_service
+from sonority.albums.models import Album
+from sonority.tracks import upload
+from sonority.tracks.exceptions import (
+    InvalidTracklist,
+    TrackDoesNotExist,
+    TrackFileDoesNotExist,
+    TrackFileInUse,
+)
+from sonority.tracks.models import Track
+from sonority.tracks.schemas import TrackCreateSchema
+
+
+def get_tracks(db: Session, album: Album):
+    """
+    Get the tracks of an album, in order
+    """
+    return (
+        db.execute(
+            select(Track).where(Track.album_id == album.id).order_by(Track.number)
+        )
+        .scalars()
+        .all()
+    )
+
+
+def get_track(db: Session, album: Album, track_id: UUID):
+    """
+    Get a track of an album by ID
+
+    Raise TrackDoesNotExist if the album has no such track
+    """
+    track = db.execute(
+        select(Track).where(Track.id == track_id, Track.album_id == album.id)
+    ).scalar_one_or_none()
+    if not track:
+        raise TrackDoesNotExist("Track does not exist")
+
+    return track
+
+
+def _lock_album(db: Session, album: Album):
+    """
+    Lock an album until the transaction ends, serializing tracklist changes
+    and its release
+    """
+    db.refresh(album, with_for_update=True)
+
+
+def _number(db: Session, album: Album, track_ids: list[UUID]):
+    """
+    Number the tracks of an album in the order of track_ids, without
+    committing
+    """
+    # numbers are unique in an album, so the tracks are moved out of the way
+    db.execute(
+        update(Track).where(Track.album_id == album.id).values(number=-Track.number)
+    )
+    if track_ids:
+        db.execute(
+            update(Track),
+            [
+                {"id": track_id, "number": number}
+                for number, track_id in enumerate(track_ids, 1)
+            ],
+        )
+
+
+def _check_files(db: Session, file_ids: list[UUID]):
+    """
+    Check that each of file_ids was uploaded and is not the file of a track
+
+    Raise TrackFileDoesNotExist or TrackFileInUse if not
+    """
+    for file_id in file_ids:
+        if not upload.get_file(file_id, settings.TRACKS_DIR).exists():
+            raise TrackFileDoesNotExist("Track file does not exist")
+
+    in_use = db.execute(select(Track.id).where(Track.file_id.in_(file_ids))).first()
+    if in_use or len(set(file_ids)) < len(file_ids):
+        raise TrackFileInUse("Track file is already in use")
+
+
+def add_tracks(db: Session, album: Album, track_schemas: list[TrackCreateSchema]):
+    """
+    Add tracks at the end of the tracklist of a draft album, in order, and
+    commit
+
+    Returns the tracklist
+    """
+    _check_files(db, [schema.file_id for schema in track_schemas])
+    _lock_album(db, album)
+    albums_service.check_album_modifiable(album)
+    db.add_all(
+        Track(**schema.model_dump(), album_id=album.id, number=number)
+        for number, schema in enumerate(track_schemas, album.track_count + 1)
+    )
+    album.track_count += len(track_schemas)
+    db.commit()
+    return get_tracks(db, album)
+
+
+def reorder_tracks(db: Session, album: Album, track_ids: list[UUID]):
+    """
+    Put the tracks of a draft album in the order of track_ids, and commit
+
+    Raise InvalidTracklist if track_ids does not list each track once.
+    Returns the tracklist
+    """
+    _lock_album(db, album)
+    albums_service.check_album_modifiable(album)
+    current = {track.id for track in get_tracks(db, album)}
+    if len(track_ids) != len(current) or set(track_ids) != current:
+        raise InvalidTracklist("Tracklist must list each track of the album once")
+
+    _number(db, album, track_ids)
+    db.commit()
+    return get_tracks(db, album)
+
+
+def remove_track(db: Session, album: Album, track: Track):
+    """
+    Remove a track from a draft album and delete its file, and commit
+
+    The tracks after it move up
+    """
+    _lock_album(db, album)
+    albums_service.check_album_modifiable(album)
+    file_id = track.file_id
+    db.delete(track)
+    db.flush()
+    _number(db, album, [other.id for other in get_tracks(db, album)])
+    album.track_count -= 1
+    db.commit()
+    delete_files([file_id])
+
+
+def delete_tracks(db: Session, album: Album):
+    """
+    Delete the tracks of an album being deleted, without committing
+
+    Returns the IDs of their files, to delete once committed
+    """
+    file_ids = (
+        db.execute(select(Track.file_id).where(Track.album_id == album.id))
+        .scalars()
+        .all()
+    )
+    db.execute(delete(Track).where(Track.album_id == album.id))
+    return file_ids
+
+
+def delete_files(file_ids: list[UUID]):
+    """
+    Delete the uploaded files of tracks that were deleted
+    """
+    for file_id in file_ids:
+        if upload.get_file(file_id, settings.TRACKS_DIR).exists():
+            upload.delete_file(file_id, settings.TRACKS_DIR)
@@ -3,6 +3,8 @@ This file implements a file upload functionality.
 
 Currently, it simply saves the file to the local filesystem.
 """
+import hashlib
+import json
 from pathlib import Path
 from uuid import UUID, uuid4
 
@@ -41,3 +43,51 @@ def delete_file(file_id: UUID, parent_dir: Path) -> None:
     :param parent_dir: The directory in which the file is saved.
     """
     get_file(file_id, parent_dir).unlink()
+    get_metadata_file(file_id, parent_dir).unlink(missing_ok=True)
+
+
+def get_metadata_file(file_id: UUID, parent_dir: Path) -> Path:
+    """
+    Get the path to the metadata of the file on the local filesystem.
+
+    :param file_id: The UUID of the file.
+    :param parent_dir: The directory in which the file is saved.
+    :return: The metadata file, which exists once the file is processed.
+    """
+    return parent_dir / f"{file_id.hex}.json"
+
+
+def process_file(file_id: UUID, parent_dir: Path) -> dict:
+    """
+    Compute the metadata of an uploaded file and save it next to the file.
+
+    Processing a file again overwrites its metadata.
+
+    :param file_id: The UUID of the file.
+    :param parent_dir: The directory in which the file is saved.
+    :return: The metadata of the file.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with get_file(file_id, parent_dir).open("rb") as file:
+        while chunk := file.read(1 << 20):
+            digest.update(chunk)
+            size += len(chunk)
+
+    metadata = {"size": size, "sha256": digest.hexdigest()}
+    get_metadata_file(file_id, parent_dir).write_text(json.dumps(metadata))
+    return metadata
+
+
+def get_metadata(file_id: UUID, parent_dir: Path) -> dict | None:
+    """
+    Get the metadata of a file, if it was processed.
+
+    :param file_id: The UUID of the file.
+    :param parent_dir: The directory in which the file is saved.
+    :return: The metadata of the file, or None.
+    """
+    metadata_file = get_metadata_file(file_id, parent_dir)
+    if not metadata_file.exists():
+        return None
+    return json.loads(metadata_file.read_text())
@@ -1,7 +1,12 @@
+from uuid import UUID, uuid4
+
 from fastapi.testclient import TestClient
 import pytest
 
+from sonority.albums.models import Album
+from sonority.albums.service import like_album
 from tests import utils
+from tests.database import Session
 from tests.utils import (
     DEFAULT_ALBUM_CREATE_INFO,
     DEFAULT_RELEASED_ALBUM_INFO,
@@ -283,3 +288,221 @@ def test_get_all_albums_by_artist(artist_client: TestClient):
         {**DEFAULT_RELEASED_ALBUM_INFO, "id": id1, "name": response.json()[0]["name"]},
         {**DEFAULT_RELEASED_ALBUM_INFO, "id": id3, "name": response.json()[1]["name"]},
     ]
+
+
+def test_get_album_etag(client_local: TestClient):
+    """
+    Test that getting an album returns an ETag and a Cache-Control policy
+    """
+    album_id = new_album_id(client_local)
+    client_local.post(f"/albums/{album_id}/release")
+    response = client_local.get(f"/albums/{album_id}")
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('W/"')
+    assert response.headers["cache-control"] == "private, max-age=60"
+
+
+def test_get_album_not_modified(client_local: TestClient):
+    """
+    Test getting an album with a matching If-None-Match header
+    """
+    album_id = new_album_id(client_local)
+    client_local.post(f"/albums/{album_id}/release")
+    etag = client_local.get(f"/albums/{album_id}").headers["etag"]
+
+    response = client_local.get(f"/albums/{album_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client_local.get(
+        f"/albums/{album_id}", headers={"If-None-Match": 'W/"stale", ' + etag}
+    )
+    assert response.status_code == 304
+
+
+def test_get_album_etag_mismatch(client_local: TestClient):
+    """
+    Test getting an album with a stale If-None-Match header
+    """
+    album_id = new_album_id(client_local)
+    client_local.post(f"/albums/{album_id}/release")
+    response = client_local.get(
+        f"/albums/{album_id}", headers={"If-None-Match": 'W/"stale"'}
+    )
+    assert response.status_code == 200
+    assert response.json()["id"] == album_id
+
+
+def test_get_unreleased_album_not_modified(client_local: TestClient):
+    """
+    Test that a wildcard If-None-Match does not reveal unreleased albums
+    """
+    album_id = new_album_id(client_local)
+    response = client_local.get(f"/albums/{album_id}", headers={"If-None-Match": "*"})
+    assert response.status_code == 404
+
+
+def test_get_albums_by_artist_not_modified(artist_client: TestClient):
+    """
+    Test that the ETag of an artist's albums changes with new releases
+    """
+    id1 = new_album_id(artist_client)
+    id2 = new_album_id(artist_client)
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    artist_client.post(f"/albums/{id1}/release")
+
+    response = artist_client.get(f"/albums/by/{artist_id}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+
+    response = artist_client.get(
+        f"/albums/by/{artist_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = artist_client.get(
+        f"/albums/by/{artist_id}?limit=1", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+    artist_client.post(f"/albums/{id2}/release")
+    response = artist_client.get(
+        f"/albums/by/{artist_id}", headers={"If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+
+def test_get_album_deleted_after_cached(client_local: TestClient):
+    """
+    Test that deleting a cached released album invalidates it
+    """
+    album_id = new_album_id(client_local)
+    client_local.post(f"/albums/{album_id}/release")
+    assert client_local.get(f"/albums/{album_id}").status_code == 200
+
+    client_local.delete(f"/albums/{album_id}")
+    response = client_local.get(f"/albums/{album_id}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Album does not exist"}
+
+
+def test_get_albums_by_artist_deleted_after_cached(artist_client: TestClient):
+    """
+    Test that deleting a released album invalidates its artist's cached albums
+    """
+    album_id = new_album_id(artist_client)
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+    assert len(artist_client.get(f"/albums/by/{artist_id}").json()) == 1
+
+    artist_client.delete(f"/albums/{album_id}")
+    assert artist_client.get(f"/albums/by/{artist_id}").json() == []
+
+
+def test_get_albums_by_artist_not_found(client: TestClient):
+    """
+    Test getting the albums of an artist that does not exist
+    """
+    response = client.get("/albums/by/00000000-0000-0000-0000-000000000000")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Artist not found"}
+
+
+def test_get_albums_by_ids(client_local: TestClient):
+    """
+    Test getting released albums by ID
+    """
+    album_ids = [new_album_id(client_local) for _ in range(3)]
+    for album_id in album_ids[:2]:
+        client_local.post(f"/albums/{album_id}/release")
+    unknown_id = "00000000-0000-0000-0000-000000000000"
+
+    ids = [album_ids[1], unknown_id, album_ids[2], album_ids[0]]
+    response = client_local.get("/albums/", params={"ids": ids})
+    assert response.status_code == 200
+    assert [album["id"] for album in response.json()["albums"]] == [
+        album_ids[1],
+        album_ids[0],
+    ]
+    assert response.json()["albums"][0] == {
+        **DEFAULT_RELEASED_ALBUM_INFO,
+        "id": album_ids[1],
+        "name": response.json()["albums"][0]["name"],
+    }
+    assert response.json()["missing"] == [unknown_id, album_ids[2]]
+
+
+def test_get_albums_by_ids_too_many(client: TestClient):
+    """
+    Test getting more albums by ID than allowed at once
+    """
+    ids = [str(uuid4()) for _ in range(101)]
+    response = client.get("/albums/", params={"ids": ids})
+    assert response.status_code == 422
+
+
+def test_get_albums_by_artist_with_likes(artist_client: TestClient, session: Session):
+    """
+    Test getting the albums of an artist with the current user's likes
+    """
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    album_ids = [new_album_id(artist_client) for _ in range(2)]
+    for album_id in album_ids:
+        artist_client.post(f"/albums/{album_id}/release")
+    liked = session.get(Album, UUID(album_ids[0]))
+    like_album(session, liked, UUID(artist_id))
+    like_album(session, liked, utils.create_randomized_test_user(session).id)
+
+    response = artist_client.get(f"/albums/by/{artist_id}")
+    assert all("is_liked" not in album for album in response.json())
+
+    response = artist_client.get(f"/albums/by/{artist_id}?with_likes=true")
+    assert response.status_code == 200
+    likes = {
+        album["id"]: (album["is_liked"], album["like_count"])
+        for album in response.json()
+    }
+    assert likes == {album_ids[0]: (True, 2), album_ids[1]: (False, 0)}
+
+
+def test_get_albums_by_artist_with_likes_etag(
+    artist_client: TestClient, session: Session
+):
+    """
+    Test that liking an album changes the ETag of a page with likes
+    """
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    album_id = new_album_id(artist_client)
+    artist_client.post(f"/albums/{album_id}/release")
+    url = f"/albums/by/{artist_id}?with_likes=true"
+    etag = artist_client.get(url).headers["ETag"]
+
+    like_album(session, session.get(Album, UUID(album_id)), UUID(artist_id))
+    response = artist_client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["is_liked"] is True
+
+
+def test_get_released_albums_with_likes_constant_queries(artist_client: TestClient):
+    """
+    Test that the like state of a page is fetched in a constant number of queries
+    """
+
+    def count_page_queries():
+        with utils.count_queries() as statements:
+            response = artist_client.get("/albums/mine?with_likes=true")
+        assert all("like_count" in album for album in response.json())
+        return len(statements)
+
+    album_id = new_album_id(artist_client)
+    artist_client.post(f"/albums/{album_id}/release")
+    queries = count_page_queries()
+
+    for _ in range(4):
+        album_id = new_album_id(artist_client)
+        artist_client.post(f"/albums/{album_id}/release")
+    assert len(artist_client.get("/albums/mine").json()) == 5
+    assert count_page_queries() == queries
@@ -1,3 +1,5 @@
+from uuid import uuid4
+
 import pytest
 from sqlalchemy.orm import Session
 
@@ -13,17 +15,21 @@ from sonority.albums.service import (
     delete_album,
     get_album_by_id,
     get_album_by_name,
+    get_albums_by_ids,
     get_all_albums,
+    get_like_states,
     get_liked_albums,
     get_released_albums,
     get_unreleased_albums,
     like_album,
     likes,
+    read_album_by_id,
     release_album,
     unlike_album,
     update_album,
 )
 from sonority.artists.models import Artist
+from sonority.singleflight import get_flight
 from tests.utils import (
     DEFAULT_ALBUM_CREATE_INFO,
     create_randomized_test_album,
@@ -163,6 +169,20 @@ def test_delete_album(session: Session, album: Album):
     assert get_album_by_id(session, album.id) is None
 
 
+def test_get_album_by_id_not_coalesced(session: Session, album: Album):
+    """
+    Test that only reads share the query for an album, so changes check the
+    album as their own transaction sees it
+    """
+    flight = get_flight("read_album_by_id")
+    calls = flight.stats()["calls"]
+    assert get_album_by_id(session, album.id) is album
+    assert flight.stats()["calls"] == calls
+
+    assert read_album_by_id(session, album.id) is album
+    assert flight.stats()["calls"] == calls + 1
+
+
 def test_release_album(session: Session, album: Album):
     """
     Test releasing an album
@@ -222,6 +242,19 @@ def test_get_released_albums(session: Session, album: Album, artist: Artist):
     assert set(albums) == {album, album3}
 
 
+def test_get_albums_by_ids(session: Session, album: Album, artist: Artist):
+    """
+    Test getting released albums by ID, in the order requested
+    """
+    album2 = create_randomized_test_album(session, artist)
+    album3 = create_randomized_test_album(session, artist)
+    release_album(session, album)
+    release_album(session, album3)
+
+    ids = [album3.id, uuid4(), album2.id, album.id, album3.id]
+    assert get_albums_by_ids(session, ids) == [album3, album]
+
+
 def test_get_unreleased_albums(session: Session, album: Album, artist: Artist):
     """
     Test getting unreleased albums
@@ -292,3 +325,22 @@ def test_get_liked_albums(session: Session):
 
     albums = get_liked_albums(session, user.id, skip=0, take=10)
     assert set(albums) == {album1, album2, album3}
+
+
+def test_get_like_states(session: Session, album: Album, artist: Artist):
+    """
+    Test getting the like state of several albums at once
+    """
+    user = create_randomized_test_user(session)
+    album2 = create_randomized_test_album(session, artist)
+    album3 = create_randomized_test_album(session, artist)
+    like_album(session, album, user.id)
+    like_album(session, album, create_randomized_test_user(session).id)
+    like_album(session, album2, create_randomized_test_user(session).id)
+
+    states = get_like_states(session, [album.id, album2.id, album3.id], user.id)
+    assert states == {
+        album.id: {"is_liked": True, "like_count": 2},
+        album2.id: {"is_liked": False, "like_count": 1},
+        album3.id: {"is_liked": False, "like_count": 0},
+    }
@@ -111,6 +111,37 @@ def test_get_artist_following(artist_client: TestClient):
     }
 
 
+def test_get_artist_not_modified(artist_client: TestClient):
+    """
+    Test getting an artist with a matching If-None-Match header
+    """
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    client = utils.create_randomized_test_client()
+    response = client.get(f"/artists?id={artist_id}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+
+    response = client.get(f"/artists?id={artist_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+def test_get_artist_etag_changes_on_follow(artist_client: TestClient):
+    """
+    Test that following an artist changes its ETag
+    """
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    client = utils.create_randomized_test_client()
+    etag = client.get(f"/artists?id={artist_id}").headers["etag"]
+
+    client.post(f"/artists/{artist_id}/follow")
+    response = client.get(f"/artists?id={artist_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["is_following"] is True
+    assert response.headers["etag"] != etag
+
+
 def test_get_artist_me(artist_client: TestClient):
     """
     Test getting the current user's artist profile
@@ -360,3 +391,52 @@ def test_get_followed_artists_not_found(client: TestClient):
     response = client.get("/artists/me/follows")
     assert response.status_code == 200
     assert response.json() == []
+
+
+def test_get_artists_by_ids(client: TestClient):
+    """
+    Test getting artists by ID with the current user's follow state
+    """
+    artist_ids = []
+    for _ in range(2):
+        artist_client = utils.create_randomized_test_artist_client()
+        artist_ids.append(artist_client.get("/artists/me").json()["id"])
+    client.post(f"/artists/{artist_ids[1]}/follow")
+    unknown_id = "00000000-0000-0000-0000-000000000000"
+
+    ids = [artist_ids[1], unknown_id, artist_ids[0]]
+    response = client.get("/artists/batch", params={"ids": ids})
+    assert response.status_code == 200
+    assert response.json() == {
+        "artists": [
+            {
+                "artist": {
+                    **DEFAULT_ARTIST_INFO,
+                    "id": artist_ids[1],
+                    "name": anything,
+                    "description": anything,
+                    "follower_count": 1,
+                },
+                "is_following": True,
+            },
+            {
+                "artist": {
+                    **DEFAULT_ARTIST_INFO,
+                    "id": artist_ids[0],
+                    "name": anything,
+                    "description": anything,
+                },
+                "is_following": False,
+            },
+        ],
+        "missing": [unknown_id],
+    }
+
+
+def test_get_artists_by_ids_too_many(client: TestClient):
+    """
+    Test getting more artists by ID than allowed at once
+    """
+    ids = [str(UUID(int=i)) for i in range(101)]
+    response = client.get("/artists/batch", params={"ids": ids})
+    assert response.status_code == 422
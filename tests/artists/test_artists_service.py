@@ -1,4 +1,4 @@
-from uuid import UUID
+from uuid import UUID, uuid4
 
 import pytest
 from sonority.artists.exceptions import (
@@ -15,6 +15,7 @@ from sonority.artists.service import (
     follows,
     get_artist_by_id,
     get_artist_by_name,
+    get_artists_by_ids,
     get_follows,
     unfollow_artist,
     update_artist,
@@ -112,6 +113,22 @@ def test_get_artist_by_name_not_found(session: Session):
     assert not db_artist
 
 
+def test_get_artists_by_ids(session: Session, artist: Artist):
+    """
+    Test getting artists by ID with the follow state of a user
+    """
+    user = create_randomized_test_user(session)
+    artist2 = create_randomized_test_artist(session)
+    follow_artist(session, artist2, user)
+    follow_artist(session, artist, create_randomized_test_user(session))
+
+    ids = [artist2.id, uuid4(), artist.id, artist2.id]
+    rows = get_artists_by_ids(session, ids, user)
+    assert rows == [(artist2, True), (artist, False)]
+    assert artist2.follower_count == 1
+    assert artist.follower_count == 1
+
+
 def test_update_artist(session: Session, artist: Artist):
     """
     Test updating an artist
@@ -0,0 +1,56 @@
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from sonority.charts.service import refresh_charts
+from sonority.plays.buffer import PlayBuffer
+from sonority.plays.rollup import roll_up_plays
+from tests import utils
+
+
+def test_get_chart(client: TestClient, session: Session, play_buffer: PlayBuffer):
+    """
+    Test getting the albums and artists trending over a window
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    album_id = utils.create_randomized_test_album_for_artist_client(artist_client)["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+    client.post(f"/artists/{artist_id}/follow")
+    client.post("/plays/", json={"album_id": album_id})
+    play_buffer.flush()
+    roll_up_plays(session)
+    refresh_charts(session)
+
+    response = client.get("/charts/24h")
+    assert response.status_code == 200
+    chart = response.json()
+    assert chart["window"] == "24h"
+    assert [album["id"] for album in chart["albums"]] == [album_id]
+    assert chart["albums"][0]["play_count"] == 1
+    assert [artist["id"] for artist in chart["artists"]] == [artist_id]
+    assert chart["artists"][0]["follower_count"] == 1
+
+
+def test_get_chart_unknown_window(client: TestClient):
+    """
+    Test getting a chart over a window that is not configured
+    """
+    response = client.get("/charts/2y")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Chart not found"}
+
+
+def test_get_chart_pagination(client: TestClient):
+    """
+    Test that chart pages are limited like other lists
+    """
+    response = client.get("/charts/24h", params={"limit": 51})
+    assert response.status_code == 422
+
+
+def test_get_chart_unauthenticated(raw_client: TestClient):
+    """
+    Test that charts are only shown to a user
+    """
+    response = raw_client.get("/charts/24h")
+    assert response.status_code == 401
@@ -0,0 +1,201 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.models import Album
+from sonority.albums.service import like_album, release_album, unlike_album
+from sonority.artists.models import Artist
+from sonority.artists.service import follow_artist, unfollow_artist
+from sonority.auth.models import User
+from sonority.charts.exceptions import ChartNotFound
+from sonority.charts.models import Activity
+from sonority.charts.service import (
+    activity,
+    bucket,
+    get_chart,
+    parse_window,
+    record_activity,
+    refresh_charts,
+)
+from sonority.plays.rollup import roll_up_plays
+from sonority.plays.service import write_plays
+from tests.utils import create_randomized_test_album, create_randomized_test_user
+
+
+def release(session: Session, artist: Artist | None = None):
+    """
+    Shortcut for releasing a new album
+    """
+    return release_album(session, create_randomized_test_album(session, artist))
+
+
+def likes_at(session: Session, album: Album, at: datetime, count: int = 1):
+    """
+    Shortcut for recording likes of an album at a time
+    """
+    record_activity(session, [activity("album", album.id, bucket(at), likes=count)])
+    session.commit()
+
+
+def get_activity(session: Session, subject_id):
+    """
+    Shortcut for the likes, follows and plays of an album or artist
+    """
+    return session.execute(
+        select(Activity.likes, Activity.follows, Activity.plays).where(
+            Activity.subject_id == subject_id
+        )
+    ).one()
+
+
+def test_parse_window():
+    """
+    Test parsing chart windows
+    """
+    assert parse_window("30m") == 30 * 60
+    assert parse_window("24h") == 24 * 60 * 60
+    assert parse_window("7d") == 7 * 24 * 60 * 60
+    for window in ["", "24", "h", "1w", "-1h"]:
+        with pytest.raises(ValueError):
+            parse_window(window)
+
+
+def test_like_counts_as_activity(session: Session, user: User, artist: Artist):
+    """
+    Test that likes count towards the album and its artist until taken back
+    """
+    album = release(session, artist)
+    like_album(session, album, user.id)
+    assert get_activity(session, album.id) == (1, 0, 0)
+    assert get_activity(session, artist.id) == (1, 0, 0)
+
+    unlike_album(session, album, user.id)
+    assert get_activity(session, album.id) == (0, 0, 0)
+
+
+def test_follow_counts_as_activity(session: Session, artist: Artist):
+    """
+    Test that follows count towards the artist until taken back
+    """
+    follower = create_randomized_test_user(session)
+    follow_artist(session, artist, follower)
+    assert get_activity(session, artist.id) == (0, 1, 0)
+
+    unfollow_artist(session, artist, follower)
+    assert get_activity(session, artist.id) == (0, 0, 0)
+
+
+def test_plays_count_as_activity(session: Session, user: User, artist: Artist):
+    """
+    Test that rolled up plays count towards the album and its artist
+    """
+    album = release(session, artist)
+    play = {
+        "user_id": user.id,
+        "album_id": album.id,
+        "track_id": None,
+        "played_at": datetime.utcnow(),
+    }
+    write_plays(session, [play] * 2)
+    roll_up_plays(session)
+    assert get_activity(session, album.id) == (0, 0, 2)
+    assert get_activity(session, artist.id) == (0, 0, 2)
+
+
+def test_refresh_charts(session: Session, user: User, artist: Artist):
+    """
+    Test that albums are ranked by their activity in each window
+    """
+    now = datetime.utcnow()
+    popular, recent, old = (release(session, artist) for _ in range(3))
+    likes_at(session, popular, now, 3)
+    likes_at(session, recent, now)
+    likes_at(session, old, now - timedelta(hours=12))
+    follow_artist(session, artist, create_randomized_test_user(session))
+    refresh_charts(session, now)
+
+    albums, artists = get_chart(session, "1h", user, skip=0, take=10)
+    assert albums == [popular, recent]
+    assert artists == [artist]
+    assert albums[0].play_count == 0
+    assert artists[0].follower_count == 1
+
+    albums, _ = get_chart(session, "24h", user, skip=0, take=10)
+    assert albums == [popular, recent, old]
+    albums, _ = get_chart(session, "24h", user, skip=1, take=1)
+    assert albums == [recent]
+
+
+def test_refresh_charts_decay(session: Session, user: User, artist: Artist):
+    """
+    Test that newer activity counts for more than older activity
+    """
+    now = datetime.utcnow()
+    newer, older = release(session, artist), release(session, artist)
+    likes_at(session, newer, now - timedelta(hours=1), 2)
+    likes_at(session, older, now - timedelta(hours=20), 3)
+    refresh_charts(session, now)
+
+    albums, _ = get_chart(session, "24h", user, skip=0, take=10)
+    assert albums == [newer, older]
+    albums, _ = get_chart(session, "7d", user, skip=0, take=10)
+    assert albums == [older, newer]
+
+
+def test_refresh_charts_drops_old_activity(
+    session: Session, user: User, artist: Artist
+):
+    """
+    Test that activity older than every window is dropped
+    """
+    now = datetime.utcnow()
+    album = release(session, artist)
+    likes_at(session, album, now - timedelta(days=8))
+    refresh_charts(session, now)
+
+    assert session.execute(select(Activity)).all() == []
+    assert get_chart(session, "7d", user, skip=0, take=10) == ([], [])
+
+
+def test_refresh_charts_windows(
+    session: Session, user: User, artist: Artist, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test that charts follow the configured windows
+    """
+    now = datetime.utcnow()
+    album = release(session, artist)
+    follow_artist(session, artist, create_randomized_test_user(session))
+    likes_at(session, album, now)
+    refresh_charts(session, now)
+
+    monkeypatch.setattr(settings, "CHARTS_WINDOWS", ["30m"])
+    refresh_charts(session, now)
+    assert get_chart(session, "30m", user, skip=0, take=10) == ([album], [artist])
+    with pytest.raises(ChartNotFound):
+        get_chart(session, "24h", user, skip=0, take=10)
+
+
+def test_chart_leaves_out_deleted_albums(session: Session, user: User, artist: Artist):
+    """
+    Test that albums deleted since the last refresh are left out of charts
+    """
+    now = datetime.utcnow()
+    album = release(session, artist)
+    likes_at(session, album, now)
+    refresh_charts(session, now)
+    session.delete(album)
+    session.commit()
+
+    assert get_chart(session, "24h", user, skip=0, take=10) == ([], [])
+
+
+def test_get_unknown_chart(session: Session, user: User):
+    """
+    Test getting a chart over a window that is not configured
+    """
+    with pytest.raises(ChartNotFound):
+        get_chart(session, "2y", user, skip=0, take=10)
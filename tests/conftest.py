@@ -1,7 +1,12 @@
 from fastapi.testclient import TestClient
 import pytest
 
-from tests.database import Session
+from tests.database import (
+    RolledBackTransaction,
+    Session,
+    create_test_database,
+    engine,
+)
 from tests import settings, utils
 
 
@@ -29,25 +34,92 @@ def make_test_db():
     """
     Create a clean database on each test run.
     """
-    from sqlalchemy_utils import create_database, database_exists, drop_database
+    from sqlalchemy_utils import drop_database
 
-    if database_exists(settings.TEST_DATABSE_URL):
-        drop_database(settings.TEST_DATABSE_URL)
-    create_database(settings.TEST_DATABSE_URL)
+    create_test_database()
     yield
     drop_database(settings.TEST_DATABSE_URL)
 
 
+@pytest.fixture(scope="session")
+def make_test_schema(make_test_db: None):
+    """
+    Create the database tables once per test run.
+    """
+    from sonority.database import drop_db, init_db
+
+    once = settings.TEST_DB_ISOLATION == "transaction"
+    if once:
+        init_db(_engine=engine)
+    yield
+    if once:
+        drop_db(_engine=engine)
+    engine.dispose()
+
+
 @pytest.fixture(scope="function", autouse=True)
-def make_test_tables(make_test_db: None):
+def make_test_tables(make_test_schema: None):
     """
-    Create clean database tables on each test run.
+    Give each test clean database tables.
+
+    By default each test runs in a transaction that is rolled back
+    afterwards; with TEST_DB_ISOLATION=tables, the tables are created and
+    dropped around each test instead.
     """
     from sonority.database import drop_db, init_db
 
-    init_db(url=settings.TEST_DATABSE_URL)
+    if settings.TEST_DB_ISOLATION == "transaction":
+        transaction = RolledBackTransaction()
+        yield
+        transaction.rollback()
+        return
+
+    init_db(_engine=engine)
     yield
-    drop_db(url=settings.TEST_DATABSE_URL)
+    drop_db(_engine=engine)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_response_cache():
+    """
+    Start each test with an empty response cache.
+    """
+    from sonority.cache import response_cache
+
+    response_cache.clear()
+
+
+@pytest.fixture(scope="function", autouse=True)
+def play_buffer(tmp_path):
+    """
+    Start each test with no plays pending, written to the test database.
+    """
+    from sonority.plays.buffer import play_buffer
+
+    play_buffer.clear()
+    play_buffer.session_factory = Session
+    play_buffer.spool_dir = tmp_path / "plays"
+    return play_buffer
+
+
+@pytest.fixture(scope="function", autouse=True)
+def roll_up_at_once(monkeypatch: pytest.MonkeyPatch):
+    """
+    Roll up plays as soon as they are written.
+    """
+    from sonority import settings as app_settings
+
+    monkeypatch.setattr(app_settings, "PLAYS_ROLLUP_LAG", 0)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def clear_autocomplete_index():
+    """
+    Start each test with an autocomplete index built from its own data.
+    """
+    from sonority.autocomplete import autocomplete_index
+
+    autocomplete_index.clear()
 
 
 @pytest.fixture(scope="function")
@@ -137,3 +209,13 @@ def clean_test_tracks_dir():
     yield
     if settings.TEST_TRACKS_DIR.exists():
         rmtree(settings.TEST_TRACKS_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def use_test_tracks_dir(monkeypatch: pytest.MonkeyPatch):
+    """
+    Store the files of tracks in the test tracks directory.
+    """
+    from sonority import settings as app_settings
+
+    monkeypatch.setattr(app_settings, "TRACKS_DIR", settings.TEST_TRACKS_DIR)
@@ -1,6 +1,17 @@
-from sqlalchemy import create_engine
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy_utils import create_database, database_exists, drop_database
 
+import sonority.server  # noqa: F401, registers every model and the search index
 from tests import settings
 
 
@@ -9,6 +20,130 @@ def get_new_test_db_session():
         yield session
 
 
-engine = create_engine(settings.TEST_DATABSE_URL)
+def _make_engine():
+    if not settings.TEST_DATABSE_URL.startswith("sqlite"):
+        return create_engine(settings.TEST_DATABSE_URL)
+
+    # the test client serves requests from another thread
+    engine = create_engine(
+        settings.TEST_DATABSE_URL, connect_args={"check_same_thread": False}
+    )
+
+    # pysqlite does not emit BEGIN itself when SAVEPOINTs are in use, so take
+    # over transaction handling for them to work
+    @event.listens_for(engine, "connect")
+    def do_connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def do_begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    return engine
+
+
+engine = _make_engine()
 
 Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+class RolledBackTransaction:
+    """
+    Runs a test inside a transaction that is rolled back at teardown
+
+    While it is active, every Session is bound to the same connection and
+    works in a savepoint of the outer transaction, so commits made by the
+    code under test are visible to the test but never reach the database.
+    """
+
+    def __init__(self):
+        self.connection = engine.connect()
+        self.transaction = self.connection.begin()
+        Session.configure(
+            bind=self.connection, join_transaction_mode="create_savepoint"
+        )
+
+    def rollback(self):
+        Session.configure(bind=engine, join_transaction_mode="conservative_savepoint")
+        self.transaction.rollback()
+        self.connection.close()
+
+
+def _recreate_database(url: str):
+    if database_exists(url):
+        drop_database(url)
+    create_database(url)
+
+
+@contextmanager
+def _template_lock():
+    """
+    Hold a lock on the template database, shared by every worker of a run
+    """
+    name = hashlib.sha1(settings.TEST_TEMPLATE_DATABASE_URL.encode()).hexdigest()
+    path = Path(tempfile.gettempdir()) / f"sonority-test-template-{name}"
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield Path(f"{path}.run")
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _ensure_template():
+    """
+    Create the template database with the schema, once per test run
+    """
+    from sonority.database import init_db
+
+    # the same for every worker of a run
+    run = os.getenv("PYTEST_XDIST_TESTRUNUID", "")
+    url = settings.TEST_TEMPLATE_DATABASE_URL
+    with _template_lock() as stamp:
+        if stamp.exists() and stamp.read_text() == run and database_exists(url):
+            return
+
+        _recreate_database(url)
+        template_engine = create_engine(url)
+        init_db(_engine=template_engine)
+        template_engine.dispose()
+        stamp.write_text(run)
+
+
+def _clone_template(url: str):
+    """
+    Create the database at url as a copy of the template database
+    """
+    template = make_url(settings.TEST_TEMPLATE_DATABASE_URL)
+    if template.get_backend_name() == "sqlite":
+        shutil.copyfile(template.database, make_url(url).database)
+        return
+
+    if database_exists(url):
+        drop_database(url)
+    server = create_engine(
+        template.set(database="postgres"), isolation_level="AUTOCOMMIT"
+    )
+    with server.connect() as connection:
+        connection.execute(
+            text(
+                f'CREATE DATABASE "{make_url(url).database}"'
+                f' TEMPLATE "{template.database}"'
+            )
+        )
+    server.dispose()
+
+
+def create_test_database():
+    """
+    Create an empty test database
+
+    Under pytest-xdist every worker gets its own database, cloned from a
+    template database that already has the schema.
+    """
+    if not settings.TEST_WORKER:
+        _recreate_database(settings.TEST_DATABSE_URL)
+        return
+
+    _ensure_template()
+    _clone_template(settings.TEST_DATABSE_URL)
@@ -0,0 +1,75 @@
+from fastapi.testclient import TestClient
+
+from tests import utils
+from tests.utils import anything, DEFAULT_RELEASED_ALBUM_INFO
+
+
+def release_album(artist_client: TestClient):
+    """
+    Shortcut for releasing a new album and fanning it out, returning its ID
+    """
+    album_id = utils.create_randomized_test_album_for_artist_client(artist_client)["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+    utils.run_jobs()
+    return album_id
+
+
+def test_get_feed(client: TestClient):
+    """
+    Test that releases of followed artists show up in the feed
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    client.post(f"/artists/{artist_id}/follow")
+    album_id = release_album(artist_client)
+
+    response = client.get("/feed/")
+    assert response.status_code == 200
+    assert response.json() == {
+        "albums": [
+            {
+                **DEFAULT_RELEASED_ALBUM_INFO,
+                "id": album_id,
+                "name": anything,
+                "artist_id": artist_id,
+            }
+        ],
+        "next": None,
+    }
+
+
+def test_get_feed_pages(client: TestClient):
+    """
+    Test reading the feed page by page
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    client.post(f"/artists/{artist_id}/follow")
+    album_ids = [release_album(artist_client) for _ in range(3)][::-1]
+
+    page1 = client.get("/feed/?limit=2").json()
+    page2 = client.get("/feed/", params={"limit": 2, "before": page1["next"]}).json()
+    assert [album["id"] for album in page1["albums"] + page2["albums"]] == album_ids
+    assert page2["next"] is None
+
+
+def test_get_feed_invalid_cursor(client: TestClient):
+    """
+    Test reading the feed from a malformed cursor
+    """
+    response = client.get("/feed/?before=yesterday")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid feed cursor"}
+
+
+def test_get_feed_after_unfollow(client: TestClient):
+    """
+    Test that unfollowing an artist removes its releases from the feed
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    artist_id = artist_client.get("/artists/me").json()["id"]
+    client.post(f"/artists/{artist_id}/follow")
+    release_album(artist_client)
+
+    client.post(f"/artists/{artist_id}/unfollow")
+    assert client.get("/feed/").json() == {"albums": [], "next": None}
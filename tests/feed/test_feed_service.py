@@ -0,0 +1,152 @@
+import pytest
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.service import release_album
+from sonority.artists.models import Artist
+from sonority.artists.service import follow_artist
+from sonority.feed.exceptions import InvalidFeedCursor
+from sonority.feed.service import (
+    fan_out_release,
+    get_feed,
+    is_pulled,
+    remove_artist_from_feed,
+)
+from tests.utils import (
+    create_randomized_test_album,
+    create_randomized_test_artist,
+    create_randomized_test_user,
+)
+
+
+def release(session: Session, artist: Artist):
+    """
+    Shortcut for releasing a new album and fanning it out
+    """
+    album = release_album(session, create_randomized_test_album(session, artist))
+    fan_out_release(session, album.id)
+    return album
+
+
+def test_fan_out_release(session: Session, artist: Artist):
+    """
+    Test that a release is written to the feed of every follower
+    """
+    followers = [create_randomized_test_user(session) for _ in range(3)]
+    for follower in followers:
+        follow_artist(session, artist, follower)
+    album = release_album(session, create_randomized_test_album(session, artist))
+
+    assert fan_out_release(session, album.id) == 3
+    for follower in followers:
+        assert get_feed(session, follower, before=None, take=10) == ([album], None)
+
+
+def test_fan_out_release_batches(
+    session: Session, artist: Artist, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test fanning out to more followers than fit in a batch
+    """
+    monkeypatch.setattr(settings, "FEED_FANOUT_BATCH_SIZE", 2)
+    for _ in range(5):
+        follow_artist(session, artist, create_randomized_test_user(session))
+    album = release_album(session, create_randomized_test_album(session, artist))
+
+    assert fan_out_release(session, album.id) == 5
+
+
+def test_fan_out_release_twice(session: Session, artist: Artist):
+    """
+    Test that fanning out a release again leaves feeds unchanged
+    """
+    user = create_randomized_test_user(session)
+    follow_artist(session, artist, user)
+    album = release(session, artist)
+
+    fan_out_release(session, album.id)
+    assert get_feed(session, user, before=None, take=10) == ([album], None)
+
+
+def test_fan_out_unreleased_album(session: Session, artist: Artist):
+    """
+    Test that unreleased albums are not fanned out
+    """
+    follow_artist(session, artist, create_randomized_test_user(session))
+    album = create_randomized_test_album(session, artist)
+    assert fan_out_release(session, album.id) == 0
+
+
+def test_get_feed_newest_first(session: Session):
+    """
+    Test that a feed merges the releases of followed artists, newest first
+    """
+    user = create_randomized_test_user(session)
+    artist1 = create_randomized_test_artist(session)
+    artist2 = create_randomized_test_artist(session)
+    follow_artist(session, artist1, user)
+    follow_artist(session, artist2, user)
+    album1 = release(session, artist1)
+    album2 = release(session, artist2)
+    album3 = release(session, artist1)
+    release(session, create_randomized_test_artist(session))
+
+    albums, _ = get_feed(session, user, before=None, take=10)
+    assert albums == [album3, album2, album1]
+
+
+def test_get_feed_pages(session: Session, artist: Artist):
+    """
+    Test reading a feed page by page
+    """
+    user = create_randomized_test_user(session)
+    follow_artist(session, artist, user)
+    albums = [release(session, artist) for _ in range(5)][::-1]
+
+    page1, cursor = get_feed(session, user, before=None, take=2)
+    page2, cursor = get_feed(session, user, before=cursor, take=2)
+    page3, cursor = get_feed(session, user, before=cursor, take=2)
+    assert page1 + page2 + page3 == albums
+    assert cursor is None
+
+
+def test_get_feed_invalid_cursor(session: Session, user):
+    """
+    Test reading a feed from a malformed cursor
+    """
+    with pytest.raises(InvalidFeedCursor):
+        get_feed(session, user, before="yesterday", take=10)
+
+
+def test_get_feed_pulled_artist(
+    session: Session, artist: Artist, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test that releases of artists above the threshold are read on demand
+    """
+    user = create_randomized_test_user(session)
+    follow_artist(session, artist, user)
+    fanned_out = release(session, artist)
+
+    monkeypatch.setattr(settings, "FEED_FANOUT_THRESHOLD", 0)
+    album = release_album(session, create_randomized_test_album(session, artist))
+    assert fan_out_release(session, album.id) == 0
+    assert is_pulled(session, artist.id)
+
+    albums, _ = get_feed(session, user, before=None, take=10)
+    assert albums == [album, fanned_out]
+
+
+def test_remove_artist_from_feed(session: Session, artist: Artist):
+    """
+    Test removing the releases of an artist from a feed
+    """
+    user = create_randomized_test_user(session)
+    other_artist = create_randomized_test_artist(session)
+    follow_artist(session, artist, user)
+    follow_artist(session, other_artist, user)
+    release(session, artist)
+    album = release(session, other_artist)
+
+    remove_artist_from_feed(session, user, artist.id)
+    assert get_feed(session, user, before=None, take=10) == ([album], None)
@@ -0,0 +1,165 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+
+from tests import utils
+
+
+def new_playlist(client: TestClient, tracks: int = 0):
+    """
+    Shortcut for creating a playlist with some tracks, returning its ID and
+    the track IDs
+    """
+    playlist_id = client.post("/playlists/new", json={"name": "Mix"}).json()["id"]
+    track_ids = [str(uuid4()) for _ in range(tracks)]
+    if track_ids:
+        client.post(f"/playlists/{playlist_id}/items", json={"track_ids": track_ids})
+    return playlist_id, track_ids
+
+
+def get_items(client: TestClient, playlist_id: str):
+    """
+    Shortcut for the items of a playlist, in order
+    """
+    return client.get(f"/playlists/{playlist_id}/items").json()
+
+
+def test_new_playlist(client: TestClient):
+    """
+    Test creating a playlist
+    """
+    response = client.post("/playlists/new", json={"name": "Mix"})
+    assert response.status_code == 201
+    playlist = response.json()
+    assert playlist["name"] == "Mix"
+    assert playlist["track_count"] == 0
+
+    mine = client.get("/playlists/mine").json()
+    assert [row["id"] for row in mine] == [playlist["id"]]
+
+
+def test_get_playlist(client: TestClient):
+    """
+    Test getting a playlist of another user
+    """
+    playlist_id, _ = new_playlist(client, 2)
+    other = utils.create_randomized_test_client()
+
+    response = other.get(f"/playlists/{playlist_id}")
+    assert response.status_code == 200
+    assert response.json()["track_count"] == 2
+    assert len(get_items(other, playlist_id)) == 2
+
+
+def test_get_playlist_not_found(client: TestClient):
+    """
+    Test getting a playlist that does not exist
+    """
+    response = client.get(f"/playlists/{uuid4()}")
+    assert response.status_code == 404
+
+
+def test_update_playlist(client: TestClient):
+    """
+    Test renaming a playlist
+    """
+    playlist_id, _ = new_playlist(client)
+    response = client.patch(f"/playlists/{playlist_id}", json={"name": "Focus"})
+    assert response.status_code == 200
+    assert response.json()["name"] == "Focus"
+
+
+def test_edit_playlist_not_owned(client: TestClient):
+    """
+    Test that only the owner of a playlist can edit it
+    """
+    playlist_id, _ = new_playlist(client)
+    other = utils.create_randomized_test_client()
+
+    response = other.patch(f"/playlists/{playlist_id}", json={"name": "Mine"})
+    assert response.status_code == 403
+    response = other.post(
+        f"/playlists/{playlist_id}/items", json={"track_ids": [str(uuid4())]}
+    )
+    assert response.status_code == 403
+
+
+def test_delete_playlist(client: TestClient):
+    """
+    Test deleting a playlist
+    """
+    playlist_id, _ = new_playlist(client, 2)
+    response = client.delete(f"/playlists/{playlist_id}")
+    assert response.status_code == 204
+    assert client.get(f"/playlists/{playlist_id}").status_code == 404
+
+
+def test_add_tracks(client: TestClient):
+    """
+    Test adding tracks at the end and right before an item
+    """
+    playlist_id, tracks = new_playlist(client, 2)
+    first = get_items(client, playlist_id)[0]["id"]
+    added = [str(uuid4())]
+    response = client.post(
+        f"/playlists/{playlist_id}/items", json={"track_ids": added, "before": first}
+    )
+    assert response.status_code == 201
+    assert [item["track_id"] for item in response.json()] == added
+
+    items = get_items(client, playlist_id)
+    assert [item["track_id"] for item in items] == added + tracks
+    assert client.get(f"/playlists/{playlist_id}").json()["track_count"] == 3
+
+
+def test_add_tracks_invalid_position(client: TestClient):
+    """
+    Test adding tracks next to an item that is not in the playlist, or both
+    after and before an item
+    """
+    playlist_id, _ = new_playlist(client, 1)
+    item_id = get_items(client, playlist_id)[0]["id"]
+    track_ids = [str(uuid4())]
+
+    response = client.post(
+        f"/playlists/{playlist_id}/items",
+        json={"track_ids": track_ids, "after": str(uuid4())},
+    )
+    assert response.status_code == 404
+    response = client.post(
+        f"/playlists/{playlist_id}/items",
+        json={"track_ids": track_ids, "after": item_id, "before": item_id},
+    )
+    assert response.status_code == 400
+    response = client.post(f"/playlists/{playlist_id}/items", json={"track_ids": []})
+    assert response.status_code == 422
+
+
+def test_move_item(client: TestClient):
+    """
+    Test moving an item right after another
+    """
+    playlist_id, (a, b, c) = new_playlist(client, 3)
+    first, second, _ = (item["id"] for item in get_items(client, playlist_id))
+
+    response = client.patch(
+        f"/playlists/{playlist_id}/items/{first}", json={"after": second}
+    )
+    assert response.status_code == 200
+    assert response.json()["track_id"] == a
+    items = get_items(client, playlist_id)
+    assert [item["track_id"] for item in items] == [b, a, c]
+
+
+def test_remove_item(client: TestClient):
+    """
+    Test removing an item, then removing it again
+    """
+    playlist_id, (a, b) = new_playlist(client, 2)
+    item_id = get_items(client, playlist_id)[0]["id"]
+
+    response = client.delete(f"/playlists/{playlist_id}/items/{item_id}")
+    assert response.status_code == 204
+    assert [item["track_id"] for item in get_items(client, playlist_id)] == [b]
+    response = client.delete(f"/playlists/{playlist_id}/items/{item_id}")
+    assert response.status_code == 404
@@ -0,0 +1,245 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.auth.models import User
+from sonority.playlists.exceptions import (
+    InvalidPlaylistPosition,
+    PlaylistItemDoesNotExist,
+    PlaylistNotOwned,
+)
+from sonority.playlists.models import Playlist, PlaylistItem
+from sonority.playlists.schemas import (
+    PlaylistCreateSchema,
+    PlaylistPositionSchema,
+    PlaylistTracksAddSchema,
+    PlaylistUpdateSchema,
+)
+from sonority.playlists.service import (
+    add_tracks,
+    check_playlist_owner,
+    create_playlist,
+    delete_playlist,
+    get_items,
+    get_playlists,
+    move_item,
+    rebalance_playlist,
+    rebalance_playlists,
+    remove_item,
+    update_playlist,
+)
+from tests.utils import count_queries, create_randomized_test_user
+
+
+def new_playlist(session: Session, user: User, tracks: int = 0):
+    """
+    Shortcut for creating a playlist with some tracks, returning it and the
+    track IDs
+    """
+    playlist = create_playlist(session, PlaylistCreateSchema(name="Mix"), user)
+    track_ids = [uuid4() for _ in range(tracks)]
+    if track_ids:
+        add_tracks(session, playlist, PlaylistTracksAddSchema(track_ids=track_ids))
+    return playlist, track_ids
+
+
+def track_ids(session: Session, playlist: Playlist):
+    """
+    Shortcut for the tracks of a playlist, in order
+    """
+    items = get_items(session, playlist, skip=0, take=50)
+    return [item.track_id for item in items]
+
+
+def item_ids(session: Session, playlist: Playlist):
+    """
+    Shortcut for the items of a playlist, in order
+    """
+    return [item.id for item in get_items(session, playlist, skip=0, take=50)]
+
+
+def test_create_playlist(session: Session, user: User):
+    """
+    Test creating a playlist
+    """
+    playlist, _ = new_playlist(session, user)
+    assert playlist.name == "Mix"
+    assert playlist.owner_id == user.id
+    assert playlist.track_count == 0
+    assert get_playlists(session, user, skip=0, take=10) == [playlist]
+
+
+def test_update_playlist(session: Session, user: User):
+    """
+    Test renaming a playlist
+    """
+    playlist, _ = new_playlist(session, user)
+    update_playlist(session, playlist, PlaylistUpdateSchema(name="Focus"))
+    assert session.get(Playlist, playlist.id).name == "Focus"
+
+
+def test_check_playlist_owner(session: Session, user: User):
+    """
+    Test that playlists only belong to their owner
+    """
+    playlist, _ = new_playlist(session, user)
+    check_playlist_owner(playlist, user)
+    with pytest.raises(PlaylistNotOwned):
+        check_playlist_owner(playlist, create_randomized_test_user(session))
+
+
+def test_add_tracks(session: Session, user: User):
+    """
+    Test that tracks are added at the end by default, in order
+    """
+    playlist, first = new_playlist(session, user, 3)
+    more = [uuid4(), uuid4()]
+    items = add_tracks(session, playlist, PlaylistTracksAddSchema(track_ids=more))
+
+    assert [item["track_id"] for item in items] == more
+    assert track_ids(session, playlist) == first + more
+    assert playlist.track_count == 5
+
+
+def test_add_tracks_at_position(session: Session, user: User):
+    """
+    Test adding tracks right after and right before an item
+    """
+    playlist, tracks = new_playlist(session, user, 2)
+    first, second = item_ids(session, playlist)
+    after, before = [uuid4(), uuid4()], [uuid4()]
+    add_tracks(
+        session, playlist, PlaylistTracksAddSchema(track_ids=after, after=first)
+    )
+    add_tracks(
+        session, playlist, PlaylistTracksAddSchema(track_ids=before, before=first)
+    )
+
+    assert track_ids(session, playlist) == before + tracks[:1] + after + tracks[1:]
+
+
+def test_add_tracks_invalid_position(session: Session, user: User):
+    """
+    Test adding tracks next to an item of another playlist, or both after
+    and before an item
+    """
+    playlist, _ = new_playlist(session, user, 1)
+    other, _ = new_playlist(session, user, 1)
+    (item_id,) = item_ids(session, other)
+    with pytest.raises(PlaylistItemDoesNotExist):
+        add_tracks(
+            session,
+            playlist,
+            PlaylistTracksAddSchema(track_ids=[uuid4()], after=item_id),
+        )
+    (item_id,) = item_ids(session, playlist)
+    with pytest.raises(InvalidPlaylistPosition):
+        add_tracks(
+            session,
+            playlist,
+            PlaylistTracksAddSchema(track_ids=[uuid4()], after=item_id, before=item_id),
+        )
+
+
+def test_move_item(session: Session, user: User):
+    """
+    Test moving an item after, before, and to the end
+    """
+    playlist, (a, b, c) = new_playlist(session, user, 3)
+    items = get_items(session, playlist, skip=0, take=10)
+
+    move_item(session, playlist, items[0], PlaylistPositionSchema(after=items[1].id))
+    assert track_ids(session, playlist) == [b, a, c]
+    move_item(session, playlist, items[2], PlaylistPositionSchema(before=items[1].id))
+    assert track_ids(session, playlist) == [c, b, a]
+    move_item(session, playlist, items[2], PlaylistPositionSchema())
+    assert track_ids(session, playlist) == [b, a, c]
+    move_item(session, playlist, items[2], PlaylistPositionSchema(after=items[2].id))
+    assert track_ids(session, playlist) == [b, a, c]
+
+
+def test_edits_write_one_item(session: Session, user: User):
+    """
+    Test that moving or removing an item in a long playlist only writes it
+    """
+    playlist, _ = new_playlist(session, user, 500)
+    items = get_items(session, playlist, skip=200, take=2)
+
+    with count_queries() as queries:
+        move_item(session, playlist, items[0], PlaylistPositionSchema())
+        remove_item(session, playlist, items[1])
+    writes = [query for query in queries if query.split()[0] in ("UPDATE", "DELETE")]
+    assert len(writes) == 4  # the item and the track count, twice
+    assert playlist.track_count == 499
+
+
+def test_remove_item(session: Session, user: User):
+    """
+    Test removing an item
+    """
+    playlist, tracks = new_playlist(session, user, 3)
+    items = get_items(session, playlist, skip=0, take=10)
+    remove_item(session, playlist, items[1])
+
+    assert track_ids(session, playlist) == [tracks[0], tracks[2]]
+    assert playlist.track_count == 2
+
+
+def test_delete_playlist(session: Session, user: User):
+    """
+    Test that deleting a playlist deletes its items
+    """
+    playlist, _ = new_playlist(session, user, 3)
+    delete_playlist(session, playlist)
+
+    assert session.execute(select(Playlist)).all() == []
+    assert session.execute(select(PlaylistItem)).all() == []
+
+
+def test_long_keys_mark_for_rebalance(
+    session: Session, user: User, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test that inserting at the same spot until keys grow too long marks the
+    playlist, and that rebalancing keeps the order with short keys
+    """
+    monkeypatch.setattr(settings, "PLAYLISTS_MAX_KEY_LENGTH", 4)
+    playlist, tracks = new_playlist(session, user, 2)
+    first = item_ids(session, playlist)[0]
+    inserted = []
+    while not playlist.needs_rebalance:
+        inserted.insert(0, uuid4())
+        add_tracks(
+            session,
+            playlist,
+            PlaylistTracksAddSchema(track_ids=inserted[:1], after=first),
+        )
+    order = track_ids(session, playlist)
+    assert order == tracks[:1] + inserted + tracks[1:]
+
+    assert rebalance_playlists(session) == 1
+    session.expire_all()
+    assert track_ids(session, playlist) == order
+    assert not playlist.needs_rebalance
+    ranks = session.execute(select(PlaylistItem.rank)).scalars()
+    assert max(map(len, ranks)) <= 3
+    assert rebalance_playlists(session) == 0
+
+
+def test_rebalance_keeps_items(session: Session, user: User):
+    """
+    Test that rebalancing keeps the items, their IDs and the playlist as it
+    was
+    """
+    playlist, _ = new_playlist(session, user, 40)
+    before = item_ids(session, playlist)
+    updated_at = playlist.updated_at
+
+    assert rebalance_playlist(session, playlist) == 40
+    session.expire_all()
+    assert item_ids(session, playlist) == before
+    assert playlist.updated_at == updated_at
+    assert playlist.track_count == 40
@@ -0,0 +1,136 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from sonority.plays.buffer import PlayBuffer
+from sonority.plays.models import Play
+from sonority.plays.rollup import roll_up_plays
+from tests import utils
+from tests.database import Session
+
+
+def released_album_id():
+    """
+    Shortcut for releasing a new album, returning its ID
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    album_id = utils.create_randomized_test_album_for_artist_client(artist_client)["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+    return album_id
+
+
+def test_record_play(client: TestClient, session: Session, play_buffer: PlayBuffer):
+    """
+    Test reporting a single play
+    """
+    response = client.post("/plays/", json={"album_id": released_album_id()})
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 1}
+
+    play_buffer.flush()
+    assert session.execute(select(func.count(Play.id))).scalar_one() == 1
+
+
+def test_record_plays_batch(client: TestClient, play_buffer: PlayBuffer):
+    """
+    Test reporting a batch of plays
+    """
+    album_id = released_album_id()
+    plays = [
+        {"album_id": album_id, "played_at": "2026-01-01T12:00:00Z"},
+        {"album_id": album_id, "track_id": str(uuid4())},
+    ]
+    response = client.post("/plays/", json=plays)
+    assert response.status_code == 202
+    assert response.json() == {"accepted": 2}
+    assert len(play_buffer) == 2
+
+
+def test_record_plays_empty_batch(client: TestClient):
+    """
+    Test that an empty batch is rejected
+    """
+    response = client.post("/plays/", json=[])
+    assert response.status_code == 422
+
+
+def test_record_plays_unknown_album(client: TestClient, play_buffer: PlayBuffer):
+    """
+    Test that a batch with a play of an unknown album is rejected as a whole
+    """
+    plays = [{"album_id": released_album_id()}, {"album_id": str(uuid4())}]
+    response = client.post("/plays/", json=plays)
+    assert response.status_code == 404
+    assert len(play_buffer) == 0
+
+
+def test_record_plays_backpressure(
+    client: TestClient, play_buffer: PlayBuffer, monkeypatch
+):
+    """
+    Test that plays are refused with a 503 when too many are pending
+    """
+    monkeypatch.setattr(play_buffer, "max_size", 1)
+    album_id = released_album_id()
+    response = client.post("/plays/", json=[{"album_id": album_id}] * 2)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_record_plays_unauthenticated(raw_client: TestClient):
+    """
+    Test that plays are only accepted from a user
+    """
+    response = raw_client.post("/plays/", json={"album_id": str(uuid4())})
+    assert response.status_code == 401
+
+
+def test_play_counts(client: TestClient, session: Session, play_buffer: PlayBuffer):
+    """
+    Test that albums and artists show the plays rolled up so far
+    """
+    album_id = released_album_id()
+    client.post("/plays/", json=[{"album_id": album_id}] * 3)
+    play_buffer.flush()
+    roll_up_plays(session)
+
+    album = client.get(f"/albums/{album_id}").json()
+    assert album["play_count"] == 3
+    artist = client.get("/artists/", params={"id": album["artist_id"]}).json()
+    assert artist["artist"]["play_count"] == 3
+
+
+def test_get_history(client: TestClient, play_buffer: PlayBuffer):
+    """
+    Test reading the latest plays of the current user page by page
+    """
+    now = datetime.utcnow()
+    album_ids = [released_album_id() for _ in range(3)]
+    plays = [
+        {"album_id": album_id, "played_at": (now - timedelta(minutes=i)).isoformat()}
+        for i, album_id in enumerate(album_ids)
+    ]
+    client.post("/plays/", json=plays)
+    play_buffer.flush()
+
+    response = client.get("/users/me/history", params={"limit": 2})
+    assert response.status_code == 200
+    page1 = response.json()
+    assert page1["next"] is not None
+    page2 = client.get(
+        "/users/me/history", params={"limit": 2, "before": page1["next"]}
+    ).json()
+    history = [play["album"]["id"] for play in page1["plays"] + page2["plays"]]
+    assert history == album_ids
+    assert page2["next"] is None
+
+
+def test_get_history_invalid_cursor(client: TestClient):
+    """
+    Test reading the history from a malformed cursor
+    """
+    response = client.get("/users/me/history", params={"before": "yesterday"})
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid history cursor"}
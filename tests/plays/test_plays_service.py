@@ -0,0 +1,506 @@
+import json
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from sonority import settings
+from sonority.albums.exceptions import AlbumDoesNotExist
+from sonority.albums.models import Album
+from sonority.albums.service import release_album
+from sonority.auth.models import User
+from sonority.jobs.models import Job
+from sonority.plays import history
+from sonority.plays.buffer import PlayBuffer
+from sonority.plays.exceptions import InvalidHistoryCursor, PlayBufferFull
+from sonority.plays.history import get_history, maintain_history, partition_start
+from sonority.plays.jobs import roll_up
+from sonority.plays.models import (
+    create_history_partitions,
+    HistoryEntry,
+    Play,
+    PlayCount,
+)
+from sonority.plays.rollup import roll_up_plays
+from sonority.plays.schemas import PlayCreateSchema
+from sonority.plays.service import get_play_counts, record_plays, write_plays
+from tests.database import Session
+from tests.utils import create_randomized_test_user
+
+
+@pytest.fixture(scope="function")
+def released_album(session: Session, album: Album):
+    """
+    Return a released album
+    """
+    return release_album(session, album)
+
+
+def count_plays(session: Session):
+    """
+    Shortcut for the number of plays written
+    """
+    return session.execute(select(func.count(Play.id))).scalar_one()
+
+
+def end_transaction(session: Session):
+    """
+    Shortcut for letting the buffer write, which SQLite only allows once the
+    test session is done reading
+    """
+    session.commit()
+
+
+def broken_session():
+    raise ConnectionError("database is down")
+
+
+def make_play(
+    user: User, album: Album, *, track_id=None, played_at: datetime | None = None
+) -> dict:
+    """
+    Shortcut for a play as held by the buffer
+    """
+    return {
+        "user_id": user.id,
+        "album_id": album.id,
+        "track_id": track_id,
+        "played_at": played_at or datetime.utcnow(),
+    }
+
+
+def test_record_plays(
+    session: Session, user: User, released_album: Album, play_buffer: PlayBuffer
+):
+    """
+    Test that recorded plays are written once the buffer is flushed
+    """
+    schemas = [PlayCreateSchema(album_id=released_album.id) for _ in range(3)]
+    assert record_plays(session, user, schemas) == 3
+    assert len(play_buffer) == 3
+    assert count_plays(session) == 0
+
+    end_transaction(session)
+    assert play_buffer.flush() == 3
+    assert len(play_buffer) == 0
+    assert count_plays(session) == 3
+
+
+def test_record_plays_of_unreleased_album(session: Session, user: User, album: Album):
+    """
+    Test that only plays of released albums are accepted
+    """
+    with pytest.raises(AlbumDoesNotExist):
+        record_plays(session, user, [PlayCreateSchema(album_id=album.id)])
+
+
+def test_record_plays_time(
+    session: Session, user: User, released_album: Album, play_buffer: PlayBuffer
+):
+    """
+    Test that play times are stored as UTC, and never in the future
+    """
+    at = datetime(2026, 1, 1, 12, tzinfo=timezone(timedelta(hours=2)))
+    schemas = [
+        PlayCreateSchema(album_id=released_album.id, played_at=at),
+        PlayCreateSchema(
+            album_id=released_album.id, played_at=datetime.utcnow() + timedelta(days=1)
+        ),
+    ]
+    record_plays(session, user, schemas)
+    end_transaction(session)
+    play_buffer.flush()
+
+    times = session.execute(select(Play.played_at).order_by(Play.id)).scalars().all()
+    assert times[0] == datetime(2026, 1, 1, 10)
+    assert times[1] <= datetime.utcnow()
+
+
+def test_buffer_full(user: User, released_album: Album, tmp_path):
+    """
+    Test that plays are refused when the buffer is full
+    """
+    buffer = PlayBuffer(max_size=2, flush_size=10, flush_interval=1, spool_dir=tmp_path)
+    buffer.add([make_play(user, released_album)] * 2)
+    with pytest.raises(PlayBufferFull):
+        buffer.add([make_play(user, released_album)])
+    assert len(buffer) == 2
+
+
+def test_flush_in_batches(
+    session: Session,
+    user: User,
+    released_album: Album,
+    play_buffer: PlayBuffer,
+    monkeypatch,
+):
+    """
+    Test that pending plays are written flush_size at a time
+    """
+    monkeypatch.setattr(play_buffer, "flush_size", 2)
+    play_buffer.add([make_play(user, released_album)] * 5)
+    end_transaction(session)
+    assert play_buffer.flush() == 5
+    assert count_plays(session) == 5
+
+
+def test_failed_flush_keeps_plays(
+    user: User, released_album: Album, play_buffer: PlayBuffer
+):
+    """
+    Test that plays that fail to be written stay pending
+    """
+    play_buffer.session_factory = broken_session
+    play_buffer.add([make_play(user, released_album)] * 2)
+    with pytest.raises(ConnectionError):
+        play_buffer.flush()
+    assert len(play_buffer) == 2
+
+
+def test_stop_spills_and_start_recovers(
+    session: Session, user: User, released_album: Album, play_buffer: PlayBuffer
+):
+    """
+    Test that plays that cannot be written at shutdown are written at startup
+    """
+    play_buffer.session_factory = broken_session
+    play_buffer.add([make_play(user, released_album)] * 3)
+    play_buffer.stop()
+    assert len(play_buffer) == 0
+    assert len(list(play_buffer.spool_dir.glob("plays-*.jsonl"))) == 1
+
+    play_buffer.session_factory = Session
+    end_transaction(session)
+    play_buffer.start()
+    play_buffer.stop()
+    assert count_plays(session) == 3
+    assert list(play_buffer.spool_dir.iterdir()) == []
+
+
+def test_background_flush(
+    session: Session, user: User, released_album: Album, play_buffer: PlayBuffer
+):
+    """
+    Test that plays are written in the background and at shutdown
+    """
+    play = make_play(user, released_album)
+    end_transaction(session)
+    play_buffer.start()
+    play_buffer.add([play])
+    play_buffer.stop()
+    assert count_plays(session) == 1
+
+
+def reject_track(monkeypatch, track_id):
+    """
+    Shortcut for making the database reject the plays of a track
+    """
+    add_to_history = history.add_to_history
+
+    def add(db, plays):
+        if any(play["track_id"] == track_id for play in plays):
+            raise IntegrityError("INSERT", {}, Exception("no partition"))
+        add_to_history(db, plays)
+
+    monkeypatch.setattr(history, "add_to_history", add)
+
+
+def test_flush_moves_rejected_plays_aside(
+    session: Session,
+    user: User,
+    released_album: Album,
+    play_buffer: PlayBuffer,
+    monkeypatch,
+):
+    """
+    Test that plays the database rejects one at a time are moved to a
+    dead-letter file, and do not hold up the others
+    """
+    rejected = uuid4()
+    reject_track(monkeypatch, rejected)
+    deleted_user = create_randomized_test_user(session)
+    session.delete(deleted_user)
+    plays = [
+        make_play(user, released_album),
+        make_play(user, released_album, track_id=rejected),
+        make_play(deleted_user, released_album),
+        make_play(user, released_album),
+    ]
+    play_buffer.add(plays)
+    end_transaction(session)
+
+    assert play_buffer.flush() == 2
+    assert len(play_buffer) == 0
+    assert count_plays(session) == 2
+    (path,) = play_buffer.spool_dir.glob("rejected-*.jsonl")
+    (line,) = path.read_text().splitlines()
+    assert json.loads(line)["track_id"] == str(rejected)
+
+    # the rejected play is not written again
+    play_buffer.add([make_play(user, released_album)])
+    end_transaction(session)
+    assert play_buffer.flush() == 1
+    assert play_buffer.recover() == 0
+    assert count_plays(session) == 3
+
+
+def test_recover_nothing(play_buffer: PlayBuffer):
+    """
+    Test recovering when nothing was spilled
+    """
+    assert play_buffer.recover() == 0
+    assert play_buffer.spill() is None
+
+
+def test_write_plays_schedules_rollup(
+    session: Session, user: User, released_album: Album
+):
+    """
+    Test that writing plays schedules a single rollup for the interval
+    """
+    write_plays(session, [make_play(user, released_album)])
+    write_plays(session, [make_play(user, released_album)])
+
+    (job,) = session.execute(select(Job).where(Job.name == "plays.roll_up")).scalars()
+    assert job.run_at > datetime.utcnow()
+
+
+def test_roll_up_plays(session: Session, user: User, released_album: Album):
+    """
+    Test that plays are counted by hour and day for their track, album and artist
+    """
+    track_id = uuid4()
+    at = datetime(2026, 1, 1, 10, 30)
+    write_plays(
+        session,
+        [
+            make_play(user, released_album, track_id=track_id, played_at=at),
+            make_play(user, released_album, played_at=at + timedelta(minutes=10)),
+            make_play(user, released_album, played_at=at + timedelta(hours=1)),
+        ],
+    )
+    assert roll_up_plays(session) == 3
+
+    counts = session.execute(
+        select(
+            PlayCount.kind,
+            PlayCount.granularity,
+            PlayCount.starts_at,
+            PlayCount.play_count,
+        ).where(PlayCount.subject_id.in_([released_album.id, track_id]))
+    ).all()
+    assert sorted(counts) == [
+        ("album", "day", datetime(2026, 1, 1), 3),
+        ("album", "hour", datetime(2026, 1, 1, 10), 2),
+        ("album", "hour", datetime(2026, 1, 1, 11), 1),
+        ("track", "day", datetime(2026, 1, 1), 1),
+        ("track", "hour", datetime(2026, 1, 1, 10), 1),
+    ]
+    assert get_play_counts(session, "album", [released_album.id]) == {
+        released_album.id: 3
+    }
+    assert get_play_counts(session, "artist", [released_album.artist_id]) == {
+        released_album.artist_id: 3
+    }
+    assert get_play_counts(session, "track", [track_id]) == {track_id: 1}
+
+
+def test_roll_up_plays_incrementally(
+    session: Session, user: User, released_album: Album
+):
+    """
+    Test that each play is rolled up once, from the watermark
+    """
+    write_plays(session, [make_play(user, released_album)] * 2)
+    assert roll_up_plays(session) == 2
+    assert roll_up_plays(session) == 0
+
+    write_plays(session, [make_play(user, released_album)] * 3)
+    assert roll_up_plays(session, batch_size=2) == 2
+    assert roll_up_plays(session, batch_size=2) == 1
+    assert roll_up_plays(session) == 0
+    assert get_play_counts(session, "album", [released_album.id]) == {
+        released_album.id: 5
+    }
+
+
+def test_roll_up_plays_lag(
+    session: Session, user: User, released_album: Album, monkeypatch
+):
+    """
+    Test that plays are only rolled up once every play before them must be
+    committed, so plays committed out of order are counted
+    """
+    monkeypatch.setattr(settings, "PLAYS_ROLLUP_LAG", 60)
+    write_plays(session, [make_play(user, released_album)] * 3)
+    first, second, third = session.execute(select(Play.id).order_by(Play.id)).scalars()
+    session.execute(
+        update(Play)
+        .where(Play.id.in_([first, third]))
+        .values(written_at=datetime.utcnow() - timedelta(seconds=61))
+    )
+    session.commit()
+
+    # the second play could still be followed by an uncommitted one
+    assert roll_up_plays(session) == 1
+    assert roll_up_plays(session) == 0
+    session.execute(
+        update(Play)
+        .where(Play.id == second)
+        .values(written_at=datetime.utcnow() - timedelta(seconds=61))
+    )
+    session.commit()
+    assert roll_up_plays(session) == 2
+
+
+def test_roll_up_job_reschedules(
+    session: Session, user: User, released_album: Album, monkeypatch
+):
+    """
+    Test that the rollup job schedules another for plays written too recently
+    """
+    monkeypatch.setattr(settings, "PLAYS_ROLLUP_LAG", 60)
+    write_plays(session, [make_play(user, released_album)])
+    # as if the job scheduled by write_plays were running
+    session.execute(delete(Job))
+    session.commit()
+
+    roll_up(session, {})
+    job = session.execute(select(Job)).scalar_one()
+    assert job.name == "plays.roll_up"
+    assert job.run_at > datetime.utcnow()
+
+
+def test_roll_up_job(session: Session, user: User, released_album: Album):
+    """
+    Test that the rollup job rolls up every new play
+    """
+    write_plays(session, [make_play(user, released_album)] * 3)
+    roll_up(session, {})
+    assert get_play_counts(session, "album", [released_album.id]) == {
+        released_album.id: 3
+    }
+
+
+def test_get_play_counts_without_plays(session: Session):
+    """
+    Test that subjects never rolled up have no plays
+    """
+    subject_id = uuid4()
+    assert get_play_counts(session, "album", [subject_id]) == {subject_id: 0}
+    assert get_play_counts(session, "album", []) == {}
+
+
+def history_play_ids(session: Session):
+    """
+    Shortcut for the ids of the plays in the listening history
+    """
+    return session.execute(select(HistoryEntry.play_id)).scalars().all()
+
+
+def test_write_plays_adds_to_history(
+    session: Session, user: User, released_album: Album, monkeypatch
+):
+    """
+    Test that written plays are added to the history, unless too old
+    """
+    monkeypatch.setattr(settings, "HISTORY_RETENTION_DAYS", 30)
+    played_at = datetime.utcnow() - timedelta(days=40)
+    old = make_play(user, released_album, played_at=played_at)
+    write_plays(session, [make_play(user, released_album), old])
+
+    play_ids = session.execute(select(Play.id).order_by(Play.id)).scalars().all()
+    assert history_play_ids(session) == play_ids[:1]
+
+
+def test_get_history(session: Session, user: User, released_album: Album):
+    """
+    Test reading the history of a user page by page, newest first
+    """
+    now = datetime.utcnow()
+    played_at = [now - timedelta(minutes=minutes) for minutes in [5, 1, 3]]
+    other = create_randomized_test_user(session)
+    write_plays(
+        session,
+        [make_play(user, released_album, played_at=at) for at in played_at]
+        + [make_play(other, released_album)],
+    )
+
+    page1, cursor = get_history(session, user, before=None, take=2)
+    page2, last = get_history(session, user, before=cursor, take=2)
+    assert [play["played_at"] for play in page1 + page2] == sorted(played_at)[::-1]
+    assert page1[0]["album"] == released_album
+    assert last is None
+
+
+def test_get_history_invalid_cursor(session: Session, user: User):
+    """
+    Test reading the history from a malformed cursor
+    """
+    with pytest.raises(InvalidHistoryCursor):
+        get_history(session, user, before="yesterday", take=10)
+
+
+def test_maintain_history(
+    session: Session, user: User, released_album: Album, monkeypatch
+):
+    """
+    Test that plays past the retention are dropped from the history
+    """
+    now = datetime.utcnow()
+    write_plays(
+        session, [make_play(user, released_album, played_at=now - timedelta(days=5))]
+    )
+    monkeypatch.setattr(settings, "HISTORY_RETENTION_DAYS", 7)
+    maintain_history(session, now)
+    assert len(history_play_ids(session)) == 1
+
+    maintain_history(session, now + timedelta(days=3))
+    assert history_play_ids(session) == []
+    assert count_plays(session) == 1
+
+
+def test_partition_start(monkeypatch):
+    """
+    Test that partitions start every HISTORY_PARTITION_DAYS from the epoch
+    """
+    monkeypatch.setattr(settings, "HISTORY_PARTITION_DAYS", 7)
+    start = partition_start(datetime(2026, 10, 19, 12, 30))
+    assert start == datetime(2026, 10, 15)
+    assert partition_start(start) == start
+    assert partition_start(start - timedelta(microseconds=1)) == datetime(2026, 10, 8)
+
+
+class PostgresConnection:
+    """
+    Records the statements a listener runs on a Postgres connection
+    """
+
+    dialect = SimpleNamespace(name="postgresql")
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, statement):
+        self.statements.append(str(statement))
+
+
+def test_history_partitions_created_with_table():
+    """
+    Test that creating the history on Postgres creates its partitions, up to
+    those ahead of the current one
+    """
+    connection = PostgresConnection()
+    create_history_partitions(HistoryEntry.__table__, connection)
+
+    ahead = partition_start(datetime.utcnow()) + timedelta(
+        days=settings.HISTORY_PARTITION_DAYS * settings.HISTORY_PARTITIONS_AHEAD
+    )
+    assert all(
+        "PARTITION OF listening_history" in statement
+        for statement in connection.statements
+    )
+    assert f"listening_history_p{ahead:%Y%m%d}" in connection.statements[-1]
@@ -0,0 +1,112 @@
+from datetime import datetime
+from uuid import UUID, uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from sonority.albums.models import Album
+from sonority.albums.service import like_album
+from sonority.jobs.models import Job
+from sonority.recommendations.service import rebuild_recommendations
+from tests import utils
+
+
+def release_album(artist_client: TestClient):
+    """
+    Shortcut for releasing a new album, returning its ID
+    """
+    album_id = utils.create_randomized_test_album_for_artist_client(artist_client)["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+    return album_id
+
+
+def like(session: Session, album_id: str, client: TestClient):
+    """
+    Shortcut for liking an album as the user of a client
+    """
+    user_id = UUID(client.get("/users/me").json()["id"])
+    like_album(session, session.get(Album, UUID(album_id)), user_id)
+
+
+def rebuild(session: Session):
+    """
+    Shortcut for rebuilding the recommendations, running the jobs it enqueues
+    along with those waiting for the end of their interval
+    """
+    rebuild_recommendations(session)
+    session.execute(
+        update(Job).where(Job.status == "queued").values(run_at=datetime.utcnow())
+    )
+    session.commit()
+    utils.run_jobs()
+
+
+def test_get_similar_artists(client: TestClient, session: Session):
+    """
+    Test getting the artists the fans of an artist also follow
+    """
+    artist_ids = []
+    for _ in range(2):
+        artist_client = utils.create_randomized_test_artist_client()
+        artist_ids.append(artist_client.get("/artists/me").json()["id"])
+        client.post(f"/artists/{artist_ids[-1]}/follow")
+    rebuild(session)
+
+    response = client.get(f"/recommendations/artists/{artist_ids[0]}")
+    assert response.status_code == 200
+    similar = response.json()
+    assert [row["artist"]["id"] for row in similar] == [artist_ids[1]]
+    assert similar[0]["is_following"] is True
+
+
+def test_get_similar_artists_not_found(client: TestClient):
+    """
+    Test getting the artists similar to one that does not exist
+    """
+    response = client.get(f"/recommendations/artists/{uuid4()}")
+    assert response.status_code == 404
+
+
+def test_get_similar_albums(client: TestClient, session: Session):
+    """
+    Test getting the albums the fans of an album also like
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    album_ids = [release_album(artist_client) for _ in range(2)]
+    for album_id in album_ids:
+        like(session, album_id, client)
+    rebuild(session)
+
+    response = client.get(f"/recommendations/albums/{album_ids[0]}")
+    assert response.status_code == 200
+    assert [album["id"] for album in response.json()] == [album_ids[1]]
+
+
+def test_get_similar_albums_unauthenticated(raw_client: TestClient):
+    """
+    Test that similar albums are only shown to a user
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    album_id = release_album(artist_client)
+
+    response = raw_client.get(f"/recommendations/albums/{album_id}")
+    assert response.status_code == 401
+
+def test_get_recommendations(client: TestClient, session: Session):
+    """
+    Test getting the albums and artists the current user might like
+    """
+    artist_client = utils.create_randomized_test_artist_client()
+    liked, recommended = release_album(artist_client), release_album(artist_client)
+    fan = utils.create_randomized_test_client()
+    like(session, liked, fan)
+    like(session, recommended, fan)
+    like(session, liked, client)
+    rebuild(session)
+
+    response = client.get("/recommendations/")
+    assert response.status_code == 200
+    recommendations = response.json()
+    assert [album["id"] for album in recommendations["albums"]] == [recommended]
+    assert recommendations["artists"] == []
@@ -0,0 +1,316 @@
+import math
+from datetime import datetime
+
+import pytest
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.models import Album
+from sonority.albums.service import like_album, release_album, unlike_album
+from sonority.artists.models import Artist
+from sonority.artists.service import follow_artist, unfollow_artist
+from sonority.auth.models import User
+from sonority.jobs.models import Job
+from sonority.recommendations.models import CoFollow, Neighbor
+from sonority.recommendations.service import (
+    build_neighbors,
+    cosine_neighbors,
+    get_recommendations,
+    get_similar_albums,
+    get_similar_artists,
+    rebuild_recommendations,
+    rebuild_similar_artists,
+)
+from tests.utils import (
+    create_randomized_test_album,
+    create_randomized_test_artist,
+    create_randomized_test_user,
+    run_jobs,
+)
+
+
+def release(session: Session, artist: Artist):
+    """
+    Shortcut for releasing a new album
+    """
+    return release_album(session, create_randomized_test_album(session, artist))
+
+
+def like(session: Session, albums: list[Album], users: list[User]):
+    """
+    Shortcut for having each of users like each of albums
+    """
+    for album in albums:
+        for user in users:
+            like_album(session, album, user.id)
+
+
+def follow(session: Session, artists: list[Artist], users: list[User]):
+    """
+    Shortcut for having each of users follow each of artists
+    """
+    for artist in artists:
+        for user in users:
+            follow_artist(session, artist, user)
+
+
+def end_transaction(session: Session):
+    """
+    Shortcut for letting the jobs write, which SQLite only allows once the
+    test session is done reading
+    """
+    session.commit()
+
+
+def run_refreshes(session: Session):
+    """
+    Shortcut for running the jobs enqueued so far as if their interval had
+    ended, including the refreshes of similar artists waiting for it
+    """
+    session.execute(
+        update(Job).where(Job.status == "queued").values(run_at=datetime.utcnow())
+    )
+    end_transaction(session)
+    run_jobs()
+    # later follows fall in the next interval
+    session.execute(delete(Job).where(Job.status == "done"))
+    session.commit()
+
+
+def get_co_follows(session: Session):
+    """
+    Shortcut for the co-follow counts by pair of artists
+    """
+    rows = session.execute(
+        select(CoFollow.artist_id, CoFollow.other_id, CoFollow.count)
+    ).all()
+    return {(artist_id, other_id): count for artist_id, other_id, count in rows}
+
+
+def get_neighbors(session: Session):
+    """
+    Shortcut for the neighbors of every subject, in order
+    """
+    rows = session.execute(
+        select(Neighbor.subject_id, Neighbor.neighbor_id, Neighbor.score).order_by(
+            Neighbor.subject_id, Neighbor.rank
+        )
+    ).all()
+    return [(subject, other, pytest.approx(score)) for subject, other, score in rows]
+
+
+def test_cosine_neighbors():
+    """
+    Test that subjects are ranked by the cosine of their sets of users
+    """
+    users_by_subject = {"a": {1, 2}, "d": {3}}
+    subjects_by_user = {1: ["a", "b"], 2: ["a", "b", "c"], 3: ["d"]}
+    user_counts = {"a": 2, "b": 2, "c": 4, "d": 1}
+
+    neighbors = cosine_neighbors(users_by_subject, subjects_by_user, user_counts, 5)
+    assert neighbors == {
+        "a": [("b", 1.0), ("c", 1 / math.sqrt(8))],
+        "d": [],
+    }
+    neighbors = cosine_neighbors(users_by_subject, subjects_by_user, user_counts, 1)
+    assert neighbors["a"] == [("b", 1.0)]
+
+
+def test_build_neighbors(session: Session):
+    """
+    Test that artists followed by the same users are neighbors
+    """
+    a, b, c = (create_randomized_test_artist(session) for _ in range(3))
+    fans = [create_randomized_test_user(session) for _ in range(2)]
+    follow(session, [a, b], fans)
+    follow(session, [c], fans[:1])
+
+    assert build_neighbors(session, "artist", [a.id]) == 2
+    rows = session.execute(
+        select(Neighbor.rank, Neighbor.neighbor_id, Neighbor.score).where(
+            Neighbor.subject_id == a.id
+        )
+    ).all()
+    assert rows == [(1, b.id, pytest.approx(1.0)), (2, c.id, pytest.approx(0.5**0.5))]
+
+
+def test_build_neighbors_replaces_old(session: Session):
+    """
+    Test that building neighbors again drops those no longer similar
+    """
+    a, b = (create_randomized_test_artist(session) for _ in range(2))
+    fan = create_randomized_test_user(session)
+    follow(session, [a, b], [fan])
+    build_neighbors(session, "artist", [a.id])
+
+    unfollow_artist(session, b, fan)
+    assert build_neighbors(session, "artist", [a.id]) == 0
+    assert session.execute(select(Neighbor)).all() == []
+
+
+def test_rebuild_recommendations(
+    session: Session, artist: Artist, monkeypatch: pytest.MonkeyPatch
+):
+    """
+    Test that rebuilding enqueues a job per chunk, which build the neighbors
+    """
+    monkeypatch.setattr(settings, "RECOMMENDATIONS_CHUNK_SIZE", 2)
+    albums = [release(session, artist) for _ in range(3)]
+    like(session, albums, [create_randomized_test_user(session)])
+
+    assert rebuild_recommendations(session) == 2
+    end_transaction(session)
+    run_jobs()
+    for album in albums:
+        similar = get_similar_albums(session, album.id, take=10)
+        assert set(similar) == set(albums) - {album}
+
+
+def test_rebuild_drops_neighbors_without_feedback(session: Session, artist: Artist):
+    """
+    Test that rebuilding drops the neighbors of albums with no likes
+    """
+    a, b = release(session, artist), release(session, artist)
+    fan = create_randomized_test_user(session)
+    like(session, [a, b], [fan])
+    build_neighbors(session, "album", [a.id, b.id])
+
+    unlike_album(session, a, fan.id)
+    rebuild_recommendations(session)
+    subject_ids = session.execute(select(Neighbor.subject_id)).scalars().all()
+    assert subject_ids == [b.id]
+
+
+def test_follow_counts_co_follows(session: Session, user: User):
+    """
+    Test that following counts towards the artists followed together, and
+    unfollowing takes it back
+    """
+    a, b = (create_randomized_test_artist(session) for _ in range(2))
+    follow(session, [a, b], [user])
+    assert get_co_follows(session) == {
+        (a.id, a.id): 1,
+        (a.id, b.id): 1,
+        (b.id, a.id): 1,
+        (b.id, b.id): 1,
+    }
+
+    unfollow_artist(session, a, user)
+    assert get_co_follows(session) == {(b.id, b.id): 1}
+
+
+def test_follow_refreshes_similar_artists(session: Session, user: User):
+    """
+    Test that similar artists follow the follows of their fans
+    """
+    a, b, c = (create_randomized_test_artist(session) for _ in range(3))
+    fans = [create_randomized_test_user(session) for _ in range(2)]
+    follow(session, [a, b], fans)
+    follow(session, [c], fans[:1])
+    run_refreshes(session)
+
+    similar = get_similar_artists(session, a.id, user, take=10)
+    assert [artist for artist, _ in similar] == [b, c]
+    scores = session.execute(
+        select(Neighbor.score).where(Neighbor.subject_id == a.id)
+    ).scalars()
+    assert list(scores) == [pytest.approx(1.0), pytest.approx(0.5**0.5)]
+
+    unfollow_artist(session, b, fans[0])
+    unfollow_artist(session, b, fans[1])
+    run_refreshes(session)
+    session.expire_all()
+    similar = get_similar_artists(session, a.id, user, take=10)
+    assert [artist for artist, _ in similar] == [c]
+    assert get_similar_artists(session, b.id, user, take=10) == []
+
+
+def test_follows_coalesce_refreshes(session: Session, user: User):
+    """
+    Test that the similar artists of an artist are refreshed once for the
+    follows of an interval
+    """
+    a, b = (create_randomized_test_artist(session) for _ in range(2))
+    fans = [create_randomized_test_user(session) for _ in range(3)]
+    follow(session, [a], fans)
+    follow(session, [b], fans[:1])
+
+    payloads = session.execute(
+        select(Job.payload).where(Job.name == "recommendations.refresh_similar_artists")
+    ).scalars()
+    assert sorted(payload["subject_ids"][0] for payload in payloads) == sorted(
+        [str(a.id), str(b.id)]
+    )
+    run_refreshes(session)
+    similar = get_similar_artists(session, a.id, user, take=10)
+    assert [artist for artist, _ in similar] == [b]
+
+
+def test_incremental_similar_artists_match_batch(session: Session, user: User):
+    """
+    Test that the incremental similar artists are those found by comparing
+    every artist's followers
+    """
+    artists = [create_randomized_test_artist(session) for _ in range(4)]
+    fans = [create_randomized_test_user(session) for _ in range(4)]
+    for i, fan in enumerate(fans):
+        follow(session, artists[: i + 1], [fan])
+    unfollow_artist(session, artists[0], fans[3])
+    run_refreshes(session)
+    incremental = get_neighbors(session)
+
+    build_neighbors(session, "artist", [artist.id for artist in artists])
+    assert incremental == get_neighbors(session)
+
+
+def test_rebuild_similar_artists(session: Session, user: User):
+    """
+    Test that rebuilding recovers co-follow counts that drifted
+    """
+    a, b = (create_randomized_test_artist(session) for _ in range(2))
+    follow(session, [a, b], [user])
+    run_refreshes(session)
+    co_follows = get_co_follows(session)
+    session.execute(delete(CoFollow).where(CoFollow.artist_id == a.id))
+    session.execute(update(CoFollow).values(count=5))
+    session.commit()
+
+    assert rebuild_similar_artists(session) == 1
+    assert get_co_follows(session) == co_follows
+    run_refreshes(session)
+    session.expire_all()
+    similar = get_similar_artists(session, a.id, user, take=10)
+    assert [artist for artist, _ in similar] == [b]
+
+
+def test_get_similar_albums(session: Session, artist: Artist):
+    """
+    Test getting the released albums liked by the fans of an album
+    """
+    a, b = release(session, artist), release(session, artist)
+    like(session, [a, b], [create_randomized_test_user(session)])
+    build_neighbors(session, "album", [a.id])
+
+    assert get_similar_albums(session, a.id, take=10) == [b]
+    assert get_similar_albums(session, b.id, take=10) == []
+
+
+def test_get_recommendations(session: Session, user: User):
+    """
+    Test that users are recommended what fans of their artists also follow,
+    leaving out what they already follow
+    """
+    mine, shared, popular, other = (
+        create_randomized_test_artist(session) for _ in range(4)
+    )
+    fans = [create_randomized_test_user(session) for _ in range(3)]
+    follow(session, [mine], [user] + fans)
+    follow(session, [popular], fans)
+    follow(session, [shared], [user, fans[0]])
+    follow(session, [other], [create_randomized_test_user(session)])
+    build_neighbors(session, "artist", [mine.id, shared.id])
+
+    albums, artists = get_recommendations(session, user, take=10)
+    assert albums == []
+    assert artists == [popular]
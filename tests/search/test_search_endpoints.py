@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+
+from tests.utils import (
+    DEFAULT_ALBUM_CREATE_INFO,
+    DEFAULT_ARTIST_INFO,
+    DEFAULT_RELEASED_ALBUM_INFO,
+)
+
+
+def test_search(artist_client: TestClient):
+    """
+    Test searching artists and albums
+    """
+    response = artist_client.post("/albums/new", json=DEFAULT_ALBUM_CREATE_INFO)
+    album_id = response.json()["id"]
+    artist_client.post(f"/albums/{album_id}/release")
+
+    response = artist_client.get("/search/", params={"q": "test"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "artists": [DEFAULT_ARTIST_INFO],
+        "albums": [{**DEFAULT_RELEASED_ALBUM_INFO, "id": album_id}],
+    }
+
+
+def test_search_no_results(client: TestClient):
+    """
+    Test a search that matches nothing
+    """
+    response = client.get("/search/", params={"q": "nothing"})
+    assert response.status_code == 200
+    assert response.json() == {"artists": [], "albums": []}
+
+
+def test_search_without_words(client: TestClient):
+    """
+    Test that a query without words is rejected
+    """
+    response = client.get("/search/", params={"q": "?!"})
+    assert response.status_code == 400
+
+
+def test_search_without_query(client: TestClient):
+    """
+    Test that the query is required
+    """
+    response = client.get("/search/")
+    assert response.status_code == 422
+
+
+def test_autocomplete(artist_client: TestClient):
+    """
+    Test completing a prefix into names
+    """
+    artist_id = artist_client.get("/artists/me").json()["id"]
+
+    response = artist_client.get("/search/autocomplete", params={"q": "test a"})
+    assert response.status_code == 200
+    assert response.json() == [
+        {"kind": "artist", "id": artist_id, "name": DEFAULT_ARTIST_INFO["name"]}
+    ]
+
+
+def test_autocomplete_limit(client: TestClient):
+    """
+    Test that the number of completions is bounded
+    """
+    response = client.get("/search/autocomplete", params={"q": "a", "limit": 50})
+    assert response.status_code == 422
+
+
+def test_search_unauthenticated(raw_client: TestClient):
+    """
+    Test that searching requires a user
+    """
+    response = raw_client.get("/search/", params={"q": "test"})
+    assert response.status_code == 401
+
+    response = raw_client.get("/search/autocomplete", params={"q": "test"})
+    assert response.status_code == 401
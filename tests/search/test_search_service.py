@@ -0,0 +1,179 @@
+import pytest
+
+from sonority.albums.schemas import AlbumCreateSchema, AlbumUpdateSchema
+from sonority.albums.service import create_album, release_album, update_album
+from sonority.artists.schemas import ArtistCreateSchema, ArtistUpdateSchema
+from sonority.artists.service import (
+    create_artist,
+    delete_artist,
+    follow_artist,
+    update_artist,
+)
+from sonority.search.exceptions import InvalidSearchQuery
+from sonority.search.service import (
+    autocomplete,
+    parse_query,
+    search,
+    search_albums,
+    search_artists,
+)
+from tests.database import Session
+from tests.utils import create_randomized_test_user
+
+
+def make_artist(session: Session, name: str, description: str | None = None):
+    """
+    Shortcut for creating an artist with a given name
+    """
+    schema = ArtistCreateSchema(name=name, description=description)
+    return create_artist(session, schema, create_randomized_test_user(session))
+
+
+def make_album(session: Session, artist, name: str, released: bool = True):
+    """
+    Shortcut for creating an album with a given name
+    """
+    album = create_album(
+        session, AlbumCreateSchema(name=name, album_type="album"), artist
+    )
+    return release_album(session, album) if released else album
+
+
+def names(results):
+    """
+    Shortcut for the names of search results
+    """
+    return [result.name for result in results]
+
+
+def test_parse_query():
+    """
+    Test splitting a query into lowercase words
+    """
+    assert parse_query("  Radio-HEAD, ok?") == ["radio", "head", "ok"]
+
+
+def test_parse_query_without_words():
+    """
+    Test that a query without words is rejected
+    """
+    with pytest.raises(InvalidSearchQuery):
+        parse_query(" -*'\" ")
+
+
+def test_search_artists_by_prefix(session: Session):
+    """
+    Test that the last word of a query matches as a prefix
+    """
+    make_artist(session, "Radiohead")
+    make_artist(session, "Portishead")
+    assert names(search_artists(session, ["radioh"], take=10)) == ["Radiohead"]
+    assert names(search_artists(session, ["radiohead"], take=10)) == ["Radiohead"]
+    assert search_artists(session, ["adiohead"], take=10) == []
+
+
+def test_search_artists_by_description(session: Session):
+    """
+    Test finding an artist by the words of its description
+    """
+    make_artist(session, "Massive Attack", "trip hop collective from Bristol")
+    make_artist(session, "Tricky", "rapper")
+    assert names(search_artists(session, ["bristol"], take=10)) == ["Massive Attack"]
+
+
+def test_search_artists_ignores_diacritics(session: Session):
+    """
+    Test that accented names are found without the accents
+    """
+    make_artist(session, "Sigur Rós")
+    assert names(search_artists(session, ["sigur", "ros"], take=10)) == ["Sigur Rós"]
+
+
+def test_search_artists_follower_boost(session: Session):
+    """
+    Test that equally good matches are ranked by follower count
+    """
+    make_artist(session, "Echo One")
+    popular = make_artist(session, "Echo Two")
+    follow_artist(session, popular, create_randomized_test_user(session))
+
+    artists = search_artists(session, ["echo"], take=10)
+    assert names(artists) == ["Echo Two", "Echo One"]
+    assert [artist.follower_count for artist in artists] == [1, 0]
+
+
+def test_search_artists_after_update(session: Session):
+    """
+    Test that renamed and deleted artists are searched by their current state
+    """
+    artist = make_artist(session, "Old Name")
+    update_artist(session, artist, ArtistUpdateSchema(name="New Name"))
+    assert search_artists(session, ["old"], take=10) == []
+    assert names(search_artists(session, ["new"], take=10)) == ["New Name"]
+
+    delete_artist(session, artist)
+    assert search_artists(session, ["new"], take=10) == []
+
+
+def test_search_albums_released_only(session: Session):
+    """
+    Test that only released albums are found
+    """
+    artist = make_artist(session, "Radiohead")
+    make_album(session, artist, "OK Computer")
+    album = make_album(session, artist, "OK Go", released=False)
+    assert names(search_albums(session, ["ok"], take=10)) == ["OK Computer"]
+
+    update_album(session, album, AlbumUpdateSchema(name="OK Later"))
+    release_album(session, album)
+    assert set(names(search_albums(session, ["ok"], take=10))) == {
+        "OK Computer",
+        "OK Later",
+    }
+
+
+def test_search(session: Session):
+    """
+    Test searching artists and albums at once
+    """
+    artist = make_artist(session, "Kid Koala")
+    make_album(session, artist, "Kid A")
+    artists, albums = search(session, "KID", take=10)
+    assert names(artists) == ["Kid Koala"]
+    assert names(albums) == ["Kid A"]
+
+
+def test_autocomplete(session: Session):
+    """
+    Test completing artist and released album names by popularity
+    """
+    artist = make_artist(session, "Daft Punk")
+    make_album(session, artist, "Discovery")
+    make_album(session, artist, "Drafts", released=False)
+    make_artist(session, "Dido")
+    follow_artist(session, artist, create_randomized_test_user(session))
+
+    completions = autocomplete(session, "d", take=10)
+    assert [(c.kind, c.name) for c in completions] == [
+        ("artist", "Daft Punk"),
+        ("artist", "Dido"),
+        ("album", "Discovery"),
+    ]
+
+
+def test_autocomplete_kept_fresh(session: Session):
+    """
+    Test that the autocomplete index follows changes made through the services
+    """
+    artist = make_artist(session, "Air")
+    assert names(autocomplete(session, "ai", take=10)) == ["Air"]
+
+    make_artist(session, "Aimee Mann")
+    album = make_album(session, artist, "Moon Safari", released=False)
+    assert names(autocomplete(session, "moon", take=10)) == []
+    release_album(session, album)
+    assert names(autocomplete(session, "moon", take=10)) == ["Moon Safari"]
+
+    update_artist(session, artist, ArtistUpdateSchema(name="Heir"))
+    assert names(autocomplete(session, "ai", take=10)) == ["Aimee Mann"]
+    assert names(autocomplete(session, "he", take=10)) == ["Heir"]
@@ -2,9 +2,43 @@ import os
 from pathlib import Path
 
 import dotenv
+from sqlalchemy.engine import make_url
 
 dotenv.load_dotenv()
 
+
+def with_suffix(url: str, suffix: str) -> str:
+    """
+    Return url with suffix appended to the name of its database
+    """
+    url = make_url(url)
+    database = url.database
+    if url.get_backend_name() == "sqlite":
+        path = Path(database)
+        database = str(path.with_name(f"{path.stem}_{suffix}{path.suffix}"))
+    else:
+        database = f"{database}_{suffix}"
+    return url.set(database=database).render_as_string(hide_password=False)
+
+
+# set by pytest-xdist in each of its workers, e.g. "gw0"
+TEST_WORKER = os.getenv("PYTEST_XDIST_WORKER")
+
+# workers clone their database from this one, which has the schema
+TEST_TEMPLATE_DATABASE_URL = with_suffix(os.getenv("TEST_DATABSE_URL"), "template")
+
 TEST_DATABSE_URL = os.getenv("TEST_DATABSE_URL")
 
 TEST_TRACKS_DIR = Path(os.getenv("TEST_TRACKS_DIR"))
+
+if TEST_WORKER:
+    TEST_DATABSE_URL = with_suffix(TEST_DATABSE_URL, TEST_WORKER)
+    TEST_TRACKS_DIR = TEST_TRACKS_DIR / TEST_WORKER
+
+# the cold import of sonority.server must stay below this many times that of
+# fastapi, which it builds on, so the budget holds on slow or busy machines
+TEST_IMPORT_TIME_BUDGET = float(os.getenv("TEST_IMPORT_TIME_BUDGET", 3.0))
+
+# "transaction" rolls each test back in a transaction on a schema created
+# once per session, "tables" creates and drops the tables around each test
+TEST_DB_ISOLATION = os.getenv("TEST_DB_ISOLATION", "transaction")
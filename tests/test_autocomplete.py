@@ -0,0 +1,126 @@
+from uuid import uuid4
+
+from sonority.autocomplete import (
+    Completion,
+    index_keys,
+    normalize,
+    PrefixIndex,
+)
+
+
+def completion(name: str, score: int = 0, kind: str = "artist") -> Completion:
+    """
+    Shortcut for a completion with a new id
+    """
+    return Completion(kind, uuid4(), name, score)
+
+
+def names(completions):
+    """
+    Shortcut for the names of completions
+    """
+    return [completion.name for completion in completions]
+
+
+def test_normalize():
+    """
+    Test folding case, accents and punctuation
+    """
+    assert normalize("  Sigur Rós / ÁSGEIR_x ") == "sigur ros asgeir x"
+
+
+def test_index_keys():
+    """
+    Test that names are indexed from the start of each word
+    """
+    assert index_keys("OK Computer") == ["ok computer", "computer"]
+    assert index_keys("a b c d e f") == ["a b c d", "b c d", "c d", "d"]
+
+
+def test_complete():
+    """
+    Test completing prefixes of any word of a name
+    """
+    index = PrefixIndex(max_entries=100)
+    index.build([completion("Radiohead"), completion("OK Computer")])
+    assert names(index.complete("rad")) == ["Radiohead"]
+    assert names(index.complete("COMP")) == ["OK Computer"]
+    assert names(index.complete("ok comp")) == ["OK Computer"]
+    assert index.complete("head") == []
+    assert index.complete("  ") == []
+
+
+def test_complete_by_popularity():
+    """
+    Test that the most popular names come first, for cached prefixes and not
+    """
+    index = PrefixIndex(max_entries=100)
+    index.build(
+        [completion("Alpha", 1), completion("Alphabet", 10), completion("Alps", 5)]
+    )
+    assert names(index.complete("al")) == ["Alphabet", "Alps", "Alpha"]
+    assert names(index.complete("alph")) == ["Alphabet", "Alpha"]
+    assert names(index.complete("al", take=1)) == ["Alphabet"]
+
+
+def test_put_invalidates_cached_prefixes():
+    """
+    Test that added, renamed and removed names show up at once
+    """
+    index = PrefixIndex(max_entries=100)
+    index.build([completion("Blur", 1)])
+    assert names(index.complete("b")) == ["Blur"]
+
+    bjork = completion("Björk", 2)
+    index.put(bjork)
+    assert names(index.complete("b")) == ["Björk", "Blur"]
+
+    index.put(bjork._replace(name="Bjork Live"))
+    assert names(index.complete("bjork")) == ["Bjork Live"]
+    assert names(index.complete("live")) == ["Bjork Live"]
+
+    index.remove(bjork.id)
+    assert names(index.complete("b")) == ["Blur"]
+    assert len(index) == 1
+
+
+def test_add_score():
+    """
+    Test that a change of popularity reorders the completions of a prefix
+    """
+    index = PrefixIndex(max_entries=100)
+    first, second = completion("Moby", 2), completion("Muse", 1)
+    index.build([first, second])
+    assert names(index.complete("m")) == ["Moby", "Muse"]
+
+    index.add_score(second.id, 5)
+    assert names(index.complete("m")) == ["Muse", "Moby"]
+
+
+def test_max_entries():
+    """
+    Test that a full index keeps the most popular names
+    """
+    index = PrefixIndex(max_entries=2)
+    index.build([completion("One", 1), completion("Two", 2), completion("Six", 6)])
+    assert names(index.complete("o") + index.complete("t") + index.complete("s")) == [
+        "Two",
+        "Six",
+    ]
+
+    index.put(completion("Ten", 10))
+    assert len(index) == 2
+
+
+def test_clear():
+    """
+    Test that a cleared index is stale until built again
+    """
+    index = PrefixIndex(max_entries=100)
+    assert index.is_stale(max_age=60)
+    index.build([completion("Air")])
+    assert not index.is_stale(max_age=60)
+
+    index.clear()
+    assert index.is_stale(max_age=60)
+    assert index.complete("air") == []
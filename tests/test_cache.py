@@ -0,0 +1,131 @@
+import threading
+import time
+
+import pytest
+
+from sonority.cache import (
+    CachedResponse,
+    LocalKeyValueStore,
+    LRUCacheBackend,
+    make_key,
+    ResponseCache,
+    StoreCacheBackend,
+)
+
+
+@pytest.fixture(scope="function", params=["lru", "local"])
+def backend(request):
+    """
+    Return each cache backend in turn
+    """
+    if request.param == "lru":
+        return LRUCacheBackend(max_entries=100)
+    return StoreCacheBackend(LocalKeyValueStore())
+
+
+def entry(body) -> CachedResponse:
+    """
+    Shortcut for a cached response with a fixed ETag
+    """
+    return CachedResponse(etag='W/"test"', body=body)
+
+
+def test_backend_get_set(backend):
+    """
+    Test storing and retrieving an entry
+    """
+    assert backend.get("key") is None
+    backend.set("key", entry({"a": 1}), ttl=60)
+    assert backend.get("key") == entry({"a": 1})
+
+
+def test_backend_expiry(backend):
+    """
+    Test that entries expire after their ttl
+    """
+    backend.set("key", entry([1]), ttl=0.01)
+    time.sleep(0.02)
+    assert backend.get("key") is None
+
+
+def test_backend_delete_prefix(backend):
+    """
+    Test deleting all entries sharing a prefix
+    """
+    backend.set(make_key("albums/by", "a", 0, 20), entry([1]), ttl=60)
+    backend.set(make_key("albums/by", "a", 20, 20), entry([2]), ttl=60)
+    backend.set(make_key("albums/by", "ab", 0, 20), entry([3]), ttl=60)
+    backend.delete_prefix(make_key("albums/by", "a", ""))
+    assert backend.get(make_key("albums/by", "a", 0, 20)) is None
+    assert backend.get(make_key("albums/by", "a", 20, 20)) is None
+    assert backend.get(make_key("albums/by", "ab", 0, 20)) == entry([3])
+
+
+def test_lru_eviction():
+    """
+    Test that the least recently used entry is evicted first
+    """
+    backend = LRUCacheBackend(max_entries=2)
+    backend.set("a", entry(1), ttl=60)
+    backend.set("b", entry(2), ttl=60)
+    backend.get("a")
+    backend.set("c", entry(3), ttl=60)
+    assert backend.get("a") == entry(1)
+    assert backend.get("b") is None
+    assert backend.get("c") == entry(3)
+
+
+def test_get_or_compute_stampede(backend):
+    """
+    Test that concurrent misses on the same key compute the value once
+    """
+    cache = ResponseCache(backend, ttl=60)
+    calls = 0
+    start = threading.Barrier(8)
+
+    def compute():
+        nonlocal calls
+        calls += 1
+        time.sleep(0.05)
+        return entry("value")
+
+    def worker():
+        start.wait()
+        assert cache.get_or_compute("key", compute) == entry("value")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == 1
+
+
+def test_get_or_compute_error(backend):
+    """
+    Test that nothing is stored when computing the value fails
+    """
+    cache = ResponseCache(backend, ttl=60)
+
+    def compute():
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute("key", compute)
+
+    assert backend.get("key") is None
+
+
+def test_invalidate_while_computing(backend):
+    """
+    Test that a value computed across an invalidation is not stored
+    """
+    cache = ResponseCache(backend, ttl=60)
+
+    def compute():
+        cache.invalidate("key")
+        return entry("stale")
+
+    assert cache.get_or_compute("key", compute) == entry("stale")
+    assert backend.get("key") is None
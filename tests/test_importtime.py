@@ -0,0 +1,33 @@
+import subprocess
+import sys
+
+from sonority.importtime import measure_imports, total_import_time
+from tests import settings
+
+
+def test_import_is_lazy():
+    """
+    Test that importing the app neither loads crypto modules nor connects
+    """
+    code = (
+        "import sys, sonority.server, sonority.database as database;"
+        "print('jose' in sys.modules, 'passlib' in sys.modules,"
+        " database._engine is not None)"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.split() == ["False", "False", "False"]
+
+
+def test_import_time_budget():
+    """
+    Test that the cold import of the app stays within its time budget,
+    relative to the import of fastapi measured alongside it
+    """
+    measured = {"fastapi": [], "sonority.server": []}
+    for _ in range(3):
+        for module, times in measured.items():
+            times.append(total_import_time(measure_imports(module), module))
+    ratio = min(measured["sonority.server"]) / min(measured["fastapi"])
+    assert ratio < settings.TEST_IMPORT_TIME_BUDGET
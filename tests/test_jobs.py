@@ -0,0 +1,293 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from sonority import settings
+from sonority.albums.service import release_album
+from sonority.artists.models import Artist
+from sonority.jobs import coalesce, coalesce_many, enqueue, handler, schedule
+from sonority.jobs.models import Job
+from sonority.jobs.queue import backoff, claim, complete, fail, periodic, purge
+from sonority.jobs.worker import Worker
+from tests.database import Session as TestSession
+from tests.utils import create_randomized_test_album
+
+calls = []
+
+
+@handler("tests.record")
+def record(db: Session, payload: dict):
+    calls.append(payload)
+
+
+@handler("tests.tick", every=60)
+def tick(db: Session, payload: dict):
+    calls.append("tick")
+
+
+@handler("tests.explode")
+def explode(db: Session, payload: dict):
+    raise RuntimeError("boom")
+
+
+def make_due(session: Session, job: Job):
+    """
+    Shortcut for making a job claimable at once
+    """
+    session.execute(
+        update(Job)
+        .where(Job.id == job.id)
+        .values(run_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    session.commit()
+
+
+def test_enqueue(session: Session):
+    """
+    Test that an enqueued job is queued and due
+    """
+    job = enqueue(session, "tests.record", {"a": 1})
+    session.commit()
+    assert job.status == "queued"
+    assert job.attempts == 0
+    assert job.max_attempts == settings.JOBS_MAX_ATTEMPTS
+    assert job.run_at <= datetime.utcnow()
+
+
+def test_enqueue_idempotency_key(session: Session):
+    """
+    Test that enqueuing with the key of an existing job returns that job
+    """
+    first = enqueue(session, "tests.record", idempotency_key="key")
+    session.commit()
+    second = enqueue(session, "tests.record", idempotency_key="key")
+    session.commit()
+    assert second.id == first.id
+    assert session.execute(select(Job)).scalars().all() == [first]
+
+
+def test_enqueue_delay(session: Session):
+    """
+    Test that a delayed job is not claimed before it is due
+    """
+    enqueue(session, "tests.record", delay=60)
+    session.commit()
+    assert claim(session) == []
+
+
+def test_claim(session: Session):
+    """
+    Test that a claimed job is running and cannot be claimed again
+    """
+    job = enqueue(session, "tests.record")
+    session.commit()
+
+    (claimed,) = claim(session)
+    assert claimed.id == job.id
+    assert claimed.status == "running"
+    assert claimed.attempts == 1
+    assert claimed.claimed_by is not None
+    assert claim(session) == []
+
+
+def test_complete(session: Session):
+    """
+    Test completing a claimed job
+    """
+    enqueue(session, "tests.record")
+    session.commit()
+    (job,) = claim(session)
+
+    assert complete(session, job)
+    session.refresh(job)
+    assert job.status == "done"
+    assert claim(session) == []
+
+
+def test_fail_retries_with_backoff(session: Session):
+    """
+    Test that a failed job is queued again after a backoff
+    """
+    enqueue(session, "tests.record")
+    session.commit()
+    (job,) = claim(session)
+
+    assert fail(session, job, "error")
+    session.refresh(job)
+    assert job.status == "queued"
+    assert job.last_error == "error"
+    assert job.run_at > datetime.utcnow() + timedelta(seconds=backoff(1) - 5)
+    assert claim(session) == []
+
+
+def test_fail_after_max_attempts(session: Session):
+    """
+    Test that a job is failed for good once it is out of attempts
+    """
+    enqueue(session, "tests.record", max_attempts=2)
+    session.commit()
+    for _ in range(2):
+        (job,) = claim(session)
+        fail(session, job, "error")
+        make_due(session, job)
+
+    session.refresh(job)
+    assert job.status == "failed"
+    assert claim(session) == []
+
+
+def test_backoff():
+    """
+    Test that the backoff doubles up to its maximum
+    """
+    assert backoff(1) == settings.JOBS_RETRY_BACKOFF
+    assert backoff(2) == 2 * settings.JOBS_RETRY_BACKOFF
+    assert backoff(100) == settings.JOBS_RETRY_BACKOFF_MAX
+
+
+def test_visibility_timeout(session: Session):
+    """
+    Test that a job is claimed again once its visibility timeout passes
+    """
+    enqueue(session, "tests.record")
+    session.commit()
+    (job,) = claim(session)
+    stale = Job(id=job.id, claimed_by=job.claimed_by)
+    make_due(session, job)
+
+    (job,) = claim(session)
+    assert job.id == stale.id
+    assert job.attempts == 2
+
+    # the first worker no longer owns the job
+    assert not complete(session, stale)
+    assert complete(session, job)
+
+
+def test_visibility_timeout_out_of_attempts(session: Session):
+    """
+    Test that a job whose worker timed out on its last attempt is failed
+    """
+    enqueue(session, "tests.record", max_attempts=1)
+    session.commit()
+    (job,) = claim(session)
+    stale = Job(id=job.id, claimed_by=job.claimed_by)
+    make_due(session, job)
+
+    assert claim(session) == []
+    session.refresh(job)
+    assert job.status == "failed"
+    assert job.last_error == "Timed out on the last attempt"
+    # the worker that timed out no longer owns the job
+    assert not complete(session, stale)
+
+
+def test_purge(session: Session):
+    """
+    Test that finished jobs are deleted once past their retention
+    """
+    for name in ["tests.record", "tests.explode", "tests.tick"]:
+        enqueue(session, name, max_attempts=1)
+    session.commit()
+    assert Worker(TestSession).run_pending() == 3
+    enqueue(session, "tests.record", idempotency_key="key")
+    session.commit()
+
+    assert purge(session) == 0
+    later = datetime.utcnow() + timedelta(seconds=settings.JOBS_RETENTION + 1)
+    assert purge(session, later) == 3
+    (job,) = session.execute(select(Job)).scalars().all()
+    assert job.status == "queued"
+
+
+def test_schedule(session: Session):
+    """
+    Test that a job is scheduled once per interval, at its end
+    """
+    first = schedule(session, "tests.record", interval=60)
+    second = schedule(session, "tests.record", interval=60)
+    assert second.id == first.id
+    assert session.execute(select(Job)).scalars().all() == [first]
+    assert first.run_at <= datetime.utcnow() + timedelta(seconds=60)
+
+
+def test_coalesce(session: Session):
+    """
+    Test that a job is enqueued once per key and interval, at its end
+    """
+    coalesce(session, "tests.record", {"n": 1}, key="a", interval=60)
+    coalesce(session, "tests.record", {"n": 2}, key="a", interval=60)
+    coalesce(session, "tests.record", {"n": 3}, key="b", interval=60)
+    session.commit()
+
+    jobs = session.execute(select(Job).order_by(Job.id)).scalars().all()
+    assert [job.payload for job in jobs] == [{"n": 1}, {"n": 3}]
+    assert all(job.run_at <= datetime.utcnow() + timedelta(seconds=60) for job in jobs)
+
+
+def test_coalesce_many(session: Session):
+    """
+    Test that jobs are enqueued once per key and interval, many at a time
+    """
+    coalesce(session, "tests.record", {"n": 1}, key="a", interval=60)
+    coalesce_many(session, "tests.record", {"a": {"n": 2}, "b": {"n": 3}}, interval=60)
+    coalesce_many(session, "tests.record", {}, interval=60)
+    session.commit()
+
+    jobs = session.execute(select(Job).order_by(Job.id)).scalars().all()
+    assert [job.payload for job in jobs] == [{"n": 1}, {"n": 3}]
+    assert all(job.status == "queued" and job.attempts == 0 for job in jobs)
+
+def test_worker_runs_jobs(session: Session):
+    """
+    Test that the worker runs the handler of each due job
+    """
+    calls.clear()
+    enqueue(session, "tests.record", {"n": 1})
+    enqueue(session, "tests.record", {"n": 2})
+    session.commit()
+
+    assert Worker(TestSession).run_pending() == 2
+    assert calls == [{"n": 1}, {"n": 2}]
+    statuses = session.execute(select(Job.status)).scalars().all()
+    assert statuses == ["done", "done"]
+
+
+def test_worker_failing_job(session: Session):
+    """
+    Test that the worker records the error of a failing job
+    """
+    enqueue(session, "tests.explode")
+    enqueue(session, "tests.unknown")
+    session.commit()
+
+    assert Worker(TestSession).run_pending() == 2
+    jobs = session.execute(select(Job).order_by(Job.id)).scalars().all()
+    assert [job.status for job in jobs] == ["queued", "queued"]
+    assert "boom" in jobs[0].last_error
+    assert "No handler" in jobs[1].last_error
+
+
+def test_worker_schedules_periodic_jobs(session: Session):
+    """
+    Test that the worker queues the next run of each periodic job
+    """
+    assert periodic["tests.tick"] == 60
+    Worker(TestSession).schedule_periodic()
+    Worker(TestSession).schedule_periodic()
+
+    names = session.execute(select(Job.name)).scalars().all()
+    assert sorted(names) == sorted(periodic)
+
+
+def test_release_album_enqueues_fan_out(session: Session, artist: Artist):
+    """
+    Test that releasing an album enqueues its fan-out
+    """
+    album = create_randomized_test_album(session, artist)
+    release_album(session, album)
+
+    job = session.execute(select(Job)).scalar_one()
+    assert job.name == "feed.fan_out_release"
+    assert job.payload == {"album_id": str(album.id)}
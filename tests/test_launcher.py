@@ -0,0 +1,188 @@
+import os
+import re
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import urllib.request
+
+import pytest
+
+from sonority import cache
+from sonority.launcher import check_response_cache, LaunchConfig, parse_args, summary
+
+# runs the launcher with a response cache that passes for a shared one
+LAUNCH = """
+import sys
+
+from sonority import cache, launcher
+
+
+class SharedStore(cache.LocalKeyValueStore):
+    shared = True
+
+
+cache.response_cache.backend = cache.StoreCacheBackend(SharedStore())
+launcher.main(sys.argv[1:])
+"""
+
+STARTED = re.compile(r"Started server process \[(\d+)\]")
+FINISHED = re.compile(r"Finished server process \[(\d+)\]")
+
+
+class SharedStore(cache.LocalKeyValueStore):
+    """
+    A LocalKeyValueStore standing in for one shared between processes
+    """
+
+    shared = True
+
+
+class Launched:
+    """
+    A launcher running in a subprocess, with its output collected as it comes
+    """
+
+    def __init__(self, *args: str):
+        self.process = subprocess.Popen(
+            [sys.executable, "-c", LAUNCH, *args],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            # so the workers can be killed along with it
+            start_new_session=True,
+        )
+        self.lines = []
+        self._changed = threading.Condition()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self):
+        for line in self.process.stdout:
+            with self._changed:
+                self.lines.append(line)
+                self._changed.notify_all()
+
+    def wait_for(self, pattern: re.Pattern, count: int, timeout: float = 30):
+        """
+        Wait until count lines of the output match pattern, and return the
+        first group of every matching line so far
+        """
+
+        def found():
+            matches = (pattern.search(line) for line in self.lines)
+            return [int(match[1]) for match in matches if match]
+
+        with self._changed:
+            if not self._changed.wait_for(lambda: len(found()) >= count, timeout):
+                raise TimeoutError("".join(self.lines))
+            return found()
+
+    def signal(self, sig: int):
+        self.process.send_signal(sig)
+
+    def close(self):
+        if self.process.poll() is None:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        self.process.wait()
+
+
+def free_port():
+    """
+    Shortcut for a port nothing listens on
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def ping(port: int):
+    """
+    Shortcut for pinging the server on port
+    """
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/ping", timeout=10) as r:
+        return r.status
+
+
+def test_parse_args():
+    """
+    Test parsing the launcher's command line
+    """
+    config = parse_args(["--workers", "4", "--db-connection-budget", "40"])
+    assert config.workers == 4
+    assert config.connection_budget == 40
+    assert config.loop == "uvloop"
+    assert config.http == "httptools"
+
+
+def test_parse_args_no_workers():
+    """
+    Test that at least one worker is required
+    """
+    with pytest.raises(SystemExit):
+        parse_args(["--workers", "0"])
+
+
+def test_pool_size():
+    """
+    Test that the connection budget is split between workers
+    """
+    config = LaunchConfig(host="", port=0, workers=4, connection_budget=42)
+    assert config.pool_size == 10
+    assert "warning" not in summary(config)
+
+
+def test_pool_size_budget_too_small():
+    """
+    Test that every worker gets a connection even if it exceeds the budget
+    """
+    config = LaunchConfig(host="", port=0, workers=8, connection_budget=4)
+    assert config.pool_size == 1
+    assert "warning" in summary(config)
+
+
+def test_check_response_cache(monkeypatch: pytest.MonkeyPatch):
+    """
+    Test that several workers are only run with a shared response cache
+    """
+    config = LaunchConfig(host="", port=0, workers=2, connection_budget=20)
+
+    monkeypatch.setattr(cache.response_cache, "backend", cache.LRUCacheBackend(10))
+    with pytest.raises(SystemExit):
+        check_response_cache(config)
+    check_response_cache(LaunchConfig(host="", port=0, workers=1, connection_budget=20))
+
+    backend = cache.StoreCacheBackend(cache.LocalKeyValueStore())
+    monkeypatch.setattr(cache.response_cache, "backend", backend)
+    with pytest.raises(SystemExit):
+        check_response_cache(config)
+
+    backend = cache.StoreCacheBackend(SharedStore())
+    monkeypatch.setattr(cache.response_cache, "backend", backend)
+    check_response_cache(config)
+
+
+def test_launcher_reload_and_stop():
+    """
+    Test that SIGHUP replaces every worker while serving, and SIGTERM drains
+    them before the launcher exits
+    """
+    port = free_port()
+    launched = Launched(
+        "--workers", "2", "--port", str(port), "--graceful-timeout", "5"
+    )
+    try:
+        started = launched.wait_for(STARTED, 2)
+        assert ping(port) == 200
+
+        launched.signal(signal.SIGHUP)
+        replaced = launched.wait_for(STARTED, 4)[2:]
+        assert set(launched.wait_for(FINISHED, 2)) == set(started)
+        assert set(replaced).isdisjoint(started)
+        assert ping(port) == 200
+
+        launched.signal(signal.SIGTERM)
+        assert launched.process.wait(timeout=30) == 0
+        assert set(launched.wait_for(FINISHED, 4)[2:]) == set(replaced)
+    finally:
+        launched.close()
@@ -0,0 +1,94 @@
+import random
+
+import pytest
+
+from sonority.ranking import (
+    check_key,
+    FIRST_KEY,
+    key_between,
+    keys_between,
+    spread_keys,
+)
+
+
+def test_key_between():
+    """
+    Test that keys fall between their neighbours
+    """
+    assert key_between(None, None) == FIRST_KEY
+    assert key_between("a", "c") == "b"
+    assert "a" < key_between("a", "b") < "b"
+    assert "a" < key_between("a", "a1") < "a1"
+    assert key_between("a", None) == "b"
+    assert key_between(None, "b") == "a"
+
+
+def test_key_between_random_inserts():
+    """
+    Test that keys stay ordered and short under random inserts
+    """
+    rng = random.Random(0)
+    keys = []
+    for _ in range(5000):
+        i = rng.randrange(len(keys) + 1)
+        before = keys[i - 1] if i > 0 else None
+        after = keys[i] if i < len(keys) else None
+        key = key_between(before, after)
+        check_key(key)
+        keys.insert(i, key)
+
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+    assert max(map(len, keys)) <= 6
+
+
+def test_key_between_ends():
+    """
+    Test that keys added at either end stay short
+    """
+    last = first = FIRST_KEY
+    for _ in range(10_000):
+        last = key_between(last, None)
+        first = key_between(None, first)
+    assert first < FIRST_KEY < last
+    assert len(last) <= 10 and len(first) <= 10
+
+
+def test_key_between_invalid():
+    """
+    Test that keys out of order or malformed are rejected
+    """
+    for before, after in [("b", "a"), ("a", "a"), ("a0", None), ("A", None), ("", "b")]:
+        with pytest.raises(ValueError):
+            key_between(before, after)
+
+
+@pytest.mark.parametrize(
+    "before, after", [(None, None), ("a", None), (None, "b"), ("a", "b")]
+)
+def test_keys_between(before, after):
+    """
+    Test that keys added together are ordered, between their neighbours
+    """
+    keys = keys_between(before, after, 1000)
+    assert len(set(keys)) == 1000
+    assert keys == sorted(keys)
+    assert before is None or before < keys[0]
+    assert after is None or keys[-1] < after
+    assert max(map(len, keys)) <= 4
+
+
+def test_spread_keys():
+    """
+    Test that spread keys are ordered, of one length, and leave room
+    """
+    assert spread_keys(0) == []
+    for count in [1, 2, 35, 36, 10_000]:
+        keys = spread_keys(count)
+        assert len(set(keys)) == count
+        assert keys == sorted(keys)
+        assert len(set(map(len, keys))) == 1
+        for key in keys:
+            check_key(key)
+    assert len(key_between(keys[0], keys[1])) <= len(keys[0])
+    assert len(key_between(keys[-1], None)) == len(keys[-1])
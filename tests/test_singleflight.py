@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+from sqlalchemy.orm import Session
+
+from sonority.artists.models import Artist
+from sonority.artists.service import get_artist_by_id
+from sonority.singleflight import coalesce, SingleFlight
+from tests.database import Session as TestSession
+
+
+def run_concurrently(count: int, target):
+    """
+    Run target in count threads started at the same time
+    """
+    start = threading.Barrier(count)
+    results = [None] * count
+
+    def worker(i):
+        start.wait()
+        results[i] = target()
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_do_coalesces_concurrent_calls():
+    """
+    Test that concurrent calls with the same key execute once
+    """
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(timeout=1)
+        return "result"
+
+    timer = threading.Timer(0.1, release.set)
+    timer.start()
+    results = run_concurrently(8, lambda: flight.do("key", fn)[0])
+
+    assert results == ["result"] * 8
+    assert flight.stats() == {"calls": 8, "executions": 1, "coalesced": 7}
+
+
+def test_do_distinct_keys():
+    """
+    Test that calls with different keys are not coalesced
+    """
+    flight = SingleFlight("test")
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats() == {"calls": 2, "executions": 2, "coalesced": 0}
+
+
+def test_do_shares_errors():
+    """
+    Test that waiting callers receive the error of the call they joined
+    """
+    flight = SingleFlight("test")
+    release = threading.Event()
+
+    def fn():
+        release.wait(timeout=1)
+        raise ValueError("failed")
+
+    def call():
+        try:
+            flight.do("key", fn)
+        except ValueError as e:
+            return e.args[0]
+
+    timer = threading.Timer(0.1, release.set)
+    timer.start()
+    assert run_concurrently(4, call) == ["failed"] * 4
+    assert flight.stats() == {"calls": 4, "executions": 1, "coalesced": 3}
+
+
+def test_coalesce_merges_into_own_session(session: Session, artist: Artist):
+    """
+    Test that a shared result is rebuilt in the waiting caller's session
+    """
+    flight = SingleFlight("test")
+    in_flight = threading.Event()
+    release = threading.Event()
+    leader_result = {}
+
+    def leader():
+        with TestSession() as db:
+
+            def query():
+                in_flight.set()
+                release.wait(timeout=1)
+                return get_artist_by_id(db, artist.id)
+
+            leader_result["artist"] = coalesce(flight, artist.id, db, query)
+            leader_result["session"] = db
+
+    thread = threading.Thread(target=leader)
+    thread.start()
+    in_flight.wait(timeout=1)
+
+    with TestSession() as db:
+        timer = threading.Timer(0.05, release.set)
+        timer.start()
+        shared = coalesce(flight, artist.id, db, pytest.fail)
+        thread.join()
+
+        assert shared is not leader_result["artist"]
+        assert shared in db
+        assert shared.id == artist.id
+        assert shared.name == artist.name
+        assert shared.follower_count == 0
+
+    assert flight.stats()["coalesced"] == 1
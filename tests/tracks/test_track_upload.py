@@ -1,9 +1,18 @@
+import hashlib
 from uuid import UUID
 
 import pytest
+from sqlalchemy.orm import Session
 
-from sonority.tracks.upload import delete_file, get_file, upload_file
-from tests import settings
+from sonority.tracks.jobs import schedule_processing
+from sonority.tracks.upload import (
+    delete_file,
+    get_file,
+    get_metadata,
+    process_file,
+    upload_file,
+)
+from tests import settings, utils
 
 
 @pytest.fixture(scope="function")
@@ -42,3 +51,32 @@ def test_delete_file(uploaded_file_id: UUID):
     delete_file(uploaded_file_id, settings.TEST_TRACKS_DIR)
     file = get_file(uploaded_file_id, settings.TEST_TRACKS_DIR)
     assert not file.exists()
+
+
+def test_process_file(uploaded_file_id: UUID):
+    """
+    Test computing the metadata of a file.
+    """
+    assert get_metadata(uploaded_file_id, settings.TEST_TRACKS_DIR) is None
+    metadata = process_file(uploaded_file_id, settings.TEST_TRACKS_DIR)
+    assert metadata == {"size": 4, "sha256": hashlib.sha256(b"test").hexdigest()}
+    assert get_metadata(uploaded_file_id, settings.TEST_TRACKS_DIR) == metadata
+
+
+def test_delete_processed_file(uploaded_file_id: UUID):
+    """
+    Test that deleting a file deletes its metadata.
+    """
+    process_file(uploaded_file_id, settings.TEST_TRACKS_DIR)
+    delete_file(uploaded_file_id, settings.TEST_TRACKS_DIR)
+    assert get_metadata(uploaded_file_id, settings.TEST_TRACKS_DIR) is None
+
+
+def test_process_upload_job(session: Session, uploaded_file_id: UUID):
+    """
+    Test processing an uploaded file in a job.
+    """
+    schedule_processing(session, uploaded_file_id, settings.TEST_TRACKS_DIR)
+    session.commit()
+    assert utils.run_jobs() == 1
+    assert get_metadata(uploaded_file_id, settings.TEST_TRACKS_DIR)["size"] == 4
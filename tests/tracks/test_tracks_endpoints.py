@@ -0,0 +1,174 @@
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+import pytest
+
+from tests import utils
+
+
+@pytest.fixture(scope="function")
+def album_id(artist_client: TestClient):
+    """
+    Shortcut for the ID of a new draft album of artist_client
+    """
+    return utils.create_randomized_test_album_for_artist_client(artist_client)["id"]
+
+
+def upload(client: TestClient):
+    """
+    Shortcut for uploading the file of a track, returning its file_id
+    """
+    response = client.post("/tracks/upload", files={"file": ("track.mp3", b"test")})
+    assert response.status_code == 201
+    return response.json()["file_id"]
+
+
+def add(client: TestClient, album_id: str, *names: str):
+    """
+    Shortcut for adding tracks to an album
+    """
+    tracks = [{"name": name, "file_id": upload(client)} for name in names]
+    return client.post(f"/albums/{album_id}/tracks", json=tracks)
+
+
+def test_add_tracks(artist_client: TestClient, album_id: str):
+    """
+    Test adding tracks to a draft album
+    """
+    add(artist_client, album_id, "One")
+    response = add(artist_client, album_id, "Two", "Three")
+    assert response.status_code == 201
+    tracks = response.json()
+    assert [(t["name"], t["number"]) for t in tracks] == [
+        ("One", 1),
+        ("Two", 2),
+        ("Three", 3),
+    ]
+    assert all(t["album_id"] == album_id for t in tracks)
+
+    response = artist_client.get(f"/albums/drafts/{album_id}")
+    assert response.json()["track_count"] == 3
+
+
+def test_add_tracks_unknown_file(artist_client: TestClient, album_id: str):
+    """
+    Test adding a track from a file that was never uploaded
+    """
+    response = artist_client.post(
+        f"/albums/{album_id}/tracks", json=[{"name": "One", "file_id": str(uuid4())}]
+    )
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Track file does not exist"}
+
+
+def test_add_tracks_file_in_use(artist_client: TestClient, album_id: str):
+    """
+    Test adding a track from the file of another track
+    """
+    (track,) = add(artist_client, album_id, "One").json()
+    response = artist_client.post(
+        f"/albums/{album_id}/tracks",
+        json=[{"name": "Two", "file_id": track["file_id"]}],
+    )
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Track file is already in use"}
+
+
+def test_add_tracks_empty(artist_client: TestClient, album_id: str):
+    """
+    Test adding no tracks
+    """
+    response = artist_client.post(f"/albums/{album_id}/tracks", json=[])
+    assert response.status_code == 422
+
+
+def test_add_tracks_not_owned(artist_client: TestClient, album_id: str):
+    """
+    Test adding tracks to the album of another artist
+    """
+    client2 = utils.create_randomized_test_artist_client()
+    response = add(client2, album_id, "One")
+    assert response.status_code == 403
+
+
+def test_add_tracks_released(artist_client: TestClient, album_id: str):
+    """
+    Test adding tracks to a released album
+    """
+    artist_client.post(f"/albums/{album_id}/release")
+    response = add(artist_client, album_id, "One")
+    assert response.status_code == 409
+
+
+def test_get_tracks(artist_client: TestClient, client: TestClient, album_id: str):
+    """
+    Test that the tracks of an album are listed once it is released
+    """
+    add(artist_client, album_id, "One", "Two")
+    response = client.get(f"/albums/{album_id}/tracks")
+    assert response.status_code == 404
+
+    response = artist_client.get(f"/albums/drafts/{album_id}/tracks")
+    assert [t["name"] for t in response.json()] == ["One", "Two"]
+
+    artist_client.post(f"/albums/{album_id}/release")
+    response = client.get(f"/albums/{album_id}/tracks")
+    assert response.status_code == 200
+    assert [t["name"] for t in response.json()] == ["One", "Two"]
+
+
+def test_reorder_tracks(artist_client: TestClient, album_id: str):
+    """
+    Test putting the tracks of an album in a new order
+    """
+    one, two, three = add(artist_client, album_id, "One", "Two", "Three").json()
+    response = artist_client.put(
+        f"/albums/{album_id}/tracks",
+        json={"track_ids": [three["id"], one["id"], two["id"]]},
+    )
+    assert response.status_code == 200
+    assert [(t["name"], t["number"]) for t in response.json()] == [
+        ("Three", 1),
+        ("One", 2),
+        ("Two", 3),
+    ]
+
+
+def test_reorder_tracks_invalid(artist_client: TestClient, album_id: str):
+    """
+    Test putting the tracks of an album in an order that leaves one out
+    """
+    one, _ = add(artist_client, album_id, "One", "Two").json()
+    response = artist_client.put(
+        f"/albums/{album_id}/tracks", json={"track_ids": [one["id"]]}
+    )
+    assert response.status_code == 400
+    assert response.json() == {
+        "detail": "Tracklist must list each track of the album once"
+    }
+
+
+def test_remove_track(artist_client: TestClient, album_id: str):
+    """
+    Test removing a track from an album
+    """
+    one, _, _ = add(artist_client, album_id, "One", "Two", "Three").json()
+    response = artist_client.delete(f"/albums/{album_id}/tracks/{one['id']}")
+    assert response.status_code == 204
+
+    response = artist_client.get(f"/albums/drafts/{album_id}/tracks")
+    assert [(t["name"], t["number"]) for t in response.json()] == [
+        ("Two", 1),
+        ("Three", 2),
+    ]
+    response = artist_client.get(f"/albums/drafts/{album_id}")
+    assert response.json()["track_count"] == 2
+
+
+def test_remove_track_does_not_exist(artist_client: TestClient, album_id: str):
+    """
+    Test removing a track that is not in the album
+    """
+    response = artist_client.delete(f"/albums/{album_id}/tracks/{uuid4()}")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Track does not exist"}
@@ -0,0 +1,145 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from sonority.albums.exceptions import ReleasedAlbumIsImmutable
+from sonority.albums.models import Album
+from sonority.albums.service import delete_album, release_album
+from sonority.tracks.exceptions import (
+    InvalidTracklist,
+    TrackFileDoesNotExist,
+    TrackFileInUse,
+)
+from sonority.tracks.models import Track
+from sonority.tracks.schemas import TrackCreateSchema
+from sonority.tracks.service import (
+    add_tracks,
+    get_tracks,
+    remove_track,
+    reorder_tracks,
+)
+from sonority.tracks.upload import get_file, upload_file
+from tests import settings
+from tests.utils import count_queries
+
+
+def new_tracks(count: int):
+    """
+    Shortcut for uploading the files of count tracks, returning the schemas
+    to add them with
+    """
+    return [
+        TrackCreateSchema(
+            name=f"Track {i}", file_id=upload_file(b"test", settings.TEST_TRACKS_DIR)
+        )
+        for i in range(count)
+    ]
+
+
+def get_tracklist(session: Session, album: Album):
+    """
+    Shortcut for the names and numbers of the tracks of an album, in order
+    """
+    return [(track.name, track.number) for track in get_tracks(session, album)]
+
+
+def test_add_tracks(session: Session, album: Album):
+    """
+    Test that tracks are added at the end, counted on the album
+    """
+    add_tracks(session, album, new_tracks(2))
+    tracks = add_tracks(session, album, new_tracks(1))
+
+    assert [track.number for track in tracks] == [1, 2, 3]
+    assert [track.name for track in tracks] == ["Track 0", "Track 1", "Track 0"]
+    assert album.track_count == 3
+
+
+def test_add_tracks_unknown_file(session: Session, album: Album):
+    """
+    Test that tracks can only be added from uploaded files
+    """
+    tracks = new_tracks(1)
+    get_file(tracks[0].file_id, settings.TEST_TRACKS_DIR).unlink()
+    with pytest.raises(TrackFileDoesNotExist):
+        add_tracks(session, album, tracks)
+    assert album.track_count == 0
+
+
+def test_add_tracks_file_in_use(session: Session, album: Album):
+    """
+    Test that a file is the file of one track only
+    """
+    tracks = new_tracks(1)
+    with pytest.raises(TrackFileInUse):
+        add_tracks(session, album, tracks * 2)
+
+    add_tracks(session, album, tracks)
+    with pytest.raises(TrackFileInUse):
+        add_tracks(session, album, tracks)
+
+
+def test_add_tracks_released_album(session: Session, album: Album):
+    """
+    Test that released albums keep their tracklist
+    """
+    release_album(session, album)
+    with pytest.raises(ReleasedAlbumIsImmutable):
+        add_tracks(session, album, new_tracks(1))
+
+
+def test_reorder_tracks(session: Session, album: Album):
+    """
+    Test putting the tracks of an album in a new order
+    """
+    a, b, c = add_tracks(session, album, new_tracks(3))
+    tracks = reorder_tracks(session, album, [c.id, a.id, b.id])
+
+    assert [track.id for track in tracks] == [c.id, a.id, b.id]
+    assert [track.number for track in tracks] == [1, 2, 3]
+
+
+def test_reorder_tracks_invalid(session: Session, album: Album):
+    """
+    Test that a new order must list each track of the album once
+    """
+    a, b = add_tracks(session, album, new_tracks(2))
+    for track_ids in [[a.id], [a.id, a.id], [a.id, b.id, b.id]]:
+        with pytest.raises(InvalidTracklist):
+            reorder_tracks(session, album, track_ids)
+
+
+def test_remove_track(session: Session, album: Album):
+    """
+    Test that removing a track deletes its file and moves up those after it
+    """
+    tracks = add_tracks(session, album, new_tracks(3))
+    file_id = tracks[0].file_id
+    remove_track(session, album, tracks[0])
+
+    assert get_tracklist(session, album) == [("Track 1", 1), ("Track 2", 2)]
+    assert album.track_count == 2
+    assert not get_file(file_id, settings.TEST_TRACKS_DIR).exists()
+
+
+def test_track_count_read_from_album(session: Session, album: Album):
+    """
+    Test that reading an album does not count its tracks
+    """
+    add_tracks(session, album, new_tracks(2))
+    session.expire_all()
+    with count_queries() as queries:
+        assert session.get(Album, album.id).track_count == 2
+    assert not any("tracks" in query for query in queries)
+
+
+def test_delete_album_deletes_tracks(session: Session, album: Album):
+    """
+    Test that deleting an album deletes its tracks and their files
+    """
+    (track,) = add_tracks(session, album, new_tracks(1))
+    file_id = track.file_id
+    delete_album(session, album)
+
+    assert session.execute(select(Track)).all() == []
+    assert not get_file(file_id, settings.TEST_TRACKS_DIR).exists()
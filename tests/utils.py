@@ -1,7 +1,9 @@
 import secrets
+from contextlib import contextmanager
 
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from sonority.albums.models import Album
 from sonority.albums.schemas import AlbumCreateSchema
@@ -12,7 +14,7 @@ from sonority.artists.service import create_artist
 from sonority.auth.models import User
 from sonority.auth.schemas import UserCreateSchema
 from sonority.auth.service import register_user
-from tests.database import Session
+from tests.database import Session, engine
 
 
 class Anything:
@@ -54,6 +56,7 @@ DEFAULT_ARTIST_INFO = {
     "id": anything,
     "is_verified": False,
     "follower_count": 0,
+    "play_count": 0,
     **DEFAULT_ARTIST_CREATE_INFO,
 }
 
@@ -71,6 +74,7 @@ DEFAULT_UNRELEASED_ALBUM_INFO = {
 
 DEFAULT_RELEASED_ALBUM_INFO = {
     "release_date": anything,
+    "play_count": 0,
     **DEFAULT_UNRELEASED_ALBUM_INFO,
 }
 
@@ -96,6 +100,33 @@ def create_randomized_test_user(session: Session) -> User:
     return register_user(session, user_schema)
 
 
+@contextmanager
+def count_queries():
+    """
+    Collect the statements executed on the test database in a block
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *_):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def run_jobs() -> int:
+    """
+    Run the queued jobs that are due, returning how many were run
+    """
+    from sonority.jobs.worker import load_handlers, Worker
+
+    load_handlers()
+    return Worker(Session).run_pending()
+
+
 def get_test_app() -> FastAPI:
     """
     Return a new test app